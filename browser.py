@@ -0,0 +1,588 @@
+import os
+import json
+import time
+import queue
+import random
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+from scrapers.rate_governor import governor
+from scrapers.network_usage import NetworkUsage, blocked_url_patterns
+
+try:
+    import fcntl # POSIX only; on Windows every process gets its own profile directory instead
+except ImportError:
+    fcntl = None
+
+# ChromeDriver path resolved once per process (see resolve_driver_path)
+_resolved_driver_path = None
+_driver_path_lock = threading.Lock()
+
+# Persistent Chrome profile claimed by this process (see claim_chrome_profile_dir)
+_claimed_profile_dir = None
+_claimed_profile_lock_file = None
+_profile_dir_lock = threading.Lock()
+
+# Profile directories tried per base path before giving up on a persistent profile
+MAX_PROFILE_SLOTS = 16
+
+
+def resolve_driver_path(config):
+    """
+    Returns the ChromeDriver executable path without touching the network when possible:
+      1. settings.chromedriver_path, if set;
+      2. the path cached in settings.chromedriver_cache_file by an earlier install, if it still exists;
+      3. otherwise ChromeDriverManager().install(), whose result is written to the cache file.
+    The result is memoised, so every session in a process shares a single resolution and runs
+    work offline after the first install.
+    """
+    global _resolved_driver_path
+    with _driver_path_lock:
+        if _resolved_driver_path and os.path.exists(_resolved_driver_path):
+            return _resolved_driver_path
+
+        configured_path = config["settings"].get("chromedriver_path")
+        if configured_path and os.path.exists(configured_path):
+            _resolved_driver_path = configured_path
+            return _resolved_driver_path
+
+        cache_file = config["settings"].get("chromedriver_cache_file", os.path.join("data", "chromedriver_path.txt"))
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, "r") as cached:
+                cached_path = cached.read().strip()
+            if cached_path and os.path.exists(cached_path):
+                _resolved_driver_path = cached_path
+                return _resolved_driver_path
+
+        _resolved_driver_path = ChromeDriverManager().install()
+        if cache_file:
+            cache_dir = os.path.dirname(cache_file)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file, "w") as cached:
+                cached.write(_resolved_driver_path)
+        return _resolved_driver_path
+
+
+def claim_chrome_profile_dir(base_dir):
+    """
+    Returns a persistent Chrome profile directory that no other process is using.
+
+    Chrome locks its profile directory, so a second worker or a CLI run next to a worker cannot
+    share one. Each process claims the first free slot (base_dir, base_dir_2, base_dir_3, ...)
+    by holding an exclusive lock on "<slot>.lock" until it exits; a later run reclaims the same
+    slot and keeps its cookies and cache. Without fcntl (Windows) the slot is suffixed with the
+    process id, which keeps processes apart but does not persist between runs.
+
+    Returns:
+        str or None: Absolute path of the claimed directory, or None if every slot is taken.
+    """
+    global _claimed_profile_dir, _claimed_profile_lock_file
+    with _profile_dir_lock:
+        if _claimed_profile_dir is not None:
+            return _claimed_profile_dir # One profile session per process at a time
+
+        base_dir = os.path.abspath(base_dir)
+        if fcntl is None:
+            _claimed_profile_dir = f"{base_dir}_{os.getpid()}"
+            return _claimed_profile_dir
+
+        parent_dir = os.path.dirname(base_dir)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        for slot in range(1, MAX_PROFILE_SLOTS + 1):
+            slot_dir = base_dir if slot == 1 else f"{base_dir}_{slot}"
+            lock_file = open(f"{slot_dir}.lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close() # Another process holds this slot
+                continue
+            _claimed_profile_dir, _claimed_profile_lock_file = slot_dir, lock_file # Held until the process exits
+            return slot_dir
+        return None
+
+
+def create_driver(config, user_agent=None, use_profile_dir=False):
+    """
+    Launches a Chrome WebDriver configured from config.yaml.
+
+    Args:
+        config (dict): The loaded configuration dictionary.
+        user_agent (str, optional): User agent for this session. Picked at random from
+                                    config['user_agents'] if not given.
+        use_profile_dir (bool): Launch with a persistent Chrome profile derived from settings.chrome_profile_dir
+                                (see claim_chrome_profile_dir), so cookies and the HTTP cache survive
+                                between runs. Chrome locks a profile directory, so only one session
+                                per process may use it.
+
+    Returns:
+        WebDriver: The launched Chrome session. Raises on failure.
+    """
+    options = webdriver.ChromeOptions()
+    if not config["settings"].get("visible_browser", False):
+        options.add_argument("--headless")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+
+    options.add_argument(f"user-agent={user_agent or random.choice(config['user_agents'])}")
+    options.add_argument("--window-size=1920,1080") # Ensure consistent window size
+
+    chrome_profile_dir = config["settings"].get("chrome_profile_dir")
+    if use_profile_dir and chrome_profile_dir:
+        profile_dir = claim_chrome_profile_dir(chrome_profile_dir)
+        if profile_dir:
+            options.add_argument(f"--user-data-dir={profile_dir}")
+        else:
+            print(f"⚠️ All {MAX_PROFILE_SLOTS} Chrome profile slots are in use. Starting without a persistent profile.")
+
+    # Resource blocking: we only read text and hrefs, so images, video and fonts are refused at the
+    # network layer. The performance log lets us count what was transferred and what was blocked.
+    block_resources = config["settings"].get("block_resources", False)
+    if block_resources:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    driver_path = resolve_driver_path(config)
+    print(f"Using ChromeDriver from: {driver_path}")
+    service = Service(driver_path)
+    driver = webdriver.Chrome(service=service, options=options)
+
+    if block_resources:
+        patterns = blocked_url_patterns(
+            config["settings"].get("block_resource_types", ["image", "media", "font"]),
+            config["settings"].get("blocked_url_patterns", [])
+        )
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        driver.network_usage = NetworkUsage() # Filled by network_usage.drain_network_log
+        print(f"🚫 Blocking {len(patterns)} resource URL pattern(s) in this session.")
+    return driver
+
+
+def login_instagram(driver, instagram_username, instagram_password):
+    """
+    Runs the full Instagram login flow (credentials, optional 2FA prompt, post-login pop-ups).
+
+    Returns:
+        bool: True if the session ended up logged in, False otherwise. The caller owns the driver
+              and decides whether to quit it.
+    """
+    # Open Instagram login page
+    print("🔍 Opening Instagram login page...")
+    governor.pace("login")
+    driver.get("https://www.instagram.com/accounts/login/")
+
+    # Enter login credentials
+    try:
+        print("🔑 Entering login credentials...")
+        username_field = WebDriverWait(driver, 20).until(
+            EC.presence_of_element_located((By.NAME, "username"))
+        )
+        password_field = driver.find_element(By.NAME, "password")
+
+        username_field.send_keys(instagram_username)
+        password_field.send_keys(instagram_password)
+        password_field.send_keys(Keys.RETURN)
+
+        governor.pace("login")
+        print("✅ Login details entered successfully!")
+    except TimeoutException:
+        print("❌ Login failed: Username/password fields or login button not found within timeout.")
+        print("Current page source for debugging login issue:")
+        print(driver.page_source[:2000])
+        return False
+    except NoSuchElementException as e:
+        print(f"❌ Login failed: Element not found - {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Failed to enter login credentials: {e}")
+        return False
+
+    # Detect and handle Two-Factor Authentication (2FA)
+    try:
+        print("🔍 Checking for 2FA prompt...")
+        WebDriverWait(driver, 15).until(
+            EC.any_of(
+                EC.presence_of_element_located((By.NAME, "verificationCode")),
+                EC.url_contains("instagram.com")
+            )
+        )
+
+        security_code_inputs = driver.find_elements(By.NAME, "verificationCode")
+
+        if security_code_inputs:
+            print("⚠️ Instagram requires Two-Factor Authentication (2FA).")
+            security_code = input("🔐 Enter the 2FA code sent to your device: ")
+
+            if security_code:
+                security_code_inputs[0].send_keys(security_code)
+                try:
+                    verify_button = WebDriverWait(driver, 10).until(
+                        EC.element_to_be_clickable((By.XPATH, "//button[text()='Confirm'] | //button[text()='Verify'] | //button[text()='Next']"))
+                    )
+                    verify_button.click()
+                    print("✅ Two-factor authentication submitted! Waiting for confirmation...")
+                    WebDriverWait(driver, 20).until(EC.url_contains("instagram.com"))
+                    print("✅ 2FA authentication successful!")
+                except TimeoutException:
+                    print("❌ 2FA verification button not found or 2FA failed to confirm within timeout.")
+                    return False
+                except Exception as e:
+                    print(f"❌ Error submitting 2FA: {e}")
+                    return False
+            else:
+                print("❌ No 2FA code entered, exiting.")
+                return False
+        else:
+            print("✅ No 2FA challenge detected or already passed.")
+
+        # Handle post-login pop-ups (Save Info, Turn on Notifications)
+        try:
+            not_now_button = WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.XPATH, "//div[@role='dialog']//button[text()='Not Now']"))
+            )
+            not_now_button.click()
+            print("Clicked 'Not Now' on pop-up.")
+            governor.pace("ui_dismiss")
+        except TimeoutException:
+            pass
+        except Exception as e:
+            print(f"Error handling post-login pop-up: {e}")
+
+    except Exception as e:
+        print(f"⚠️ An error occurred during 2FA check/handling: {e}")
+
+    # Final login confirmation
+    try:
+        governor.pace("login")
+        current_url = driver.current_url
+        print(f"🔗 Current URL after login confirmation: {current_url}")
+
+        if "accounts/login" in current_url or "challenge" in current_url:
+            print("❌ Login failed! Verify credentials or complete security checks.")
+            return False
+        print("✅ Login successful and confirmed!")
+    except Exception as e:
+        print(f"❌ Unexpected login confirmation failure: {e}")
+        return False
+
+    return True
+
+
+def copy_session_cookies(source_driver, target_driver):
+    """
+    Copies the Instagram session cookies from a logged-in driver into another one,
+    so extra pool sessions do not each have to go through the login flow.
+
+    Returns:
+        bool: True if the target session is logged in afterwards.
+    """
+    # Cookies can only be set for the domain that is currently loaded.
+    target_driver.get("https://www.instagram.com/")
+    for cookie in source_driver.get_cookies():
+        cookie.pop("sameSite", None) # Chrome rejects some sameSite values when they are set explicitly
+        try:
+            target_driver.add_cookie(cookie)
+        except Exception as e:
+            print(f"    ⚠️ Could not copy cookie '{cookie.get('name')}': {e}")
+    governor.pace("navigate")
+    target_driver.refresh()
+    return "accounts/login" not in target_driver.current_url
+
+
+def is_logged_in(driver):
+    """
+    Checks with a single page load whether the driver's session is logged in to Instagram:
+    the home page must not redirect to the login page, must not show the login form,
+    and a sessionid cookie must be present.
+    """
+    governor.pace("navigate")
+    driver.get("https://www.instagram.com/")
+    try:
+        WebDriverWait(driver, 10).until(
+            EC.any_of(
+                EC.presence_of_element_located((By.NAME, "username")),
+                EC.presence_of_element_located((By.XPATH, "//nav | //a[contains(@href, '/direct/')]"))
+            )
+        )
+    except TimeoutException:
+        pass # Decide from URL and cookies alone
+    if "accounts/login" in driver.current_url or "challenge" in driver.current_url:
+        return False
+    if driver.find_elements(By.NAME, "username"):
+        return False
+    return driver.get_cookie("sessionid") is not None
+
+
+def load_cookie_jar(cookie_jar_path):
+    """
+    Reads a cookie jar written by save_cookie_jar.
+
+    Returns:
+        dict or None: {"user_agent": str, "cookies": [cookie dicts]}, or None if there is no usable jar.
+    """
+    if not cookie_jar_path or not os.path.exists(cookie_jar_path):
+        return None
+    try:
+        with open(cookie_jar_path, "r") as jar_file:
+            cookie_jar = json.load(jar_file)
+        return cookie_jar if cookie_jar.get("cookies") else None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read saved session from {cookie_jar_path}: {e}")
+        return None
+
+
+def save_cookie_jar(driver, cookie_jar_path):
+    """Saves the driver's Instagram cookies and user agent so the next run can skip the login flow."""
+    if not cookie_jar_path:
+        return
+    jar_dir = os.path.dirname(cookie_jar_path)
+    if jar_dir:
+        os.makedirs(jar_dir, exist_ok=True)
+    cookie_jar = {
+        "user_agent": driver.execute_script("return navigator.userAgent;"),
+        "cookies": driver.get_cookies(),
+        "saved_at": time.time(),
+    }
+    # The jar holds a live session token: keep it readable by the owner only.
+    with open(os.open(cookie_jar_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as jar_file:
+        json.dump(cookie_jar, jar_file)
+    print(f"💾 Saved session cookies to {cookie_jar_path}.")
+
+
+def restore_or_login(driver, config, instagram_username, instagram_password):
+    """
+    Gets the driver logged in as cheaply as possible:
+      1. a persistent Chrome profile (settings.chrome_profile_dir) may already hold a valid session;
+      2. otherwise the saved cookie jar (settings.cookie_jar_path) is loaded into the driver;
+      3. only if neither is valid does the full login flow run.
+    After a successful full login the cookie jar is refreshed for the next run.
+
+    Returns:
+        bool: True if the session is logged in.
+    """
+    cookie_jar_path = config["settings"].get("cookie_jar_path")
+
+    if config["settings"].get("chrome_profile_dir") and is_logged_in(driver):
+        print("✅ Reusing the logged-in session from the persistent Chrome profile.")
+        return True
+
+    cookie_jar = load_cookie_jar(cookie_jar_path)
+    if cookie_jar:
+        print("🍪 Restoring saved session cookies...")
+        if "instagram.com" not in driver.current_url:
+            driver.get("https://www.instagram.com/") # Cookies can only be set for the domain that is currently loaded
+        for cookie in cookie_jar["cookies"]:
+            cookie.pop("sameSite", None)
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                print(f"    ⚠️ Could not restore cookie '{cookie.get('name')}': {e}")
+        if is_logged_in(driver):
+            print("✅ Saved session is still valid. Skipping the login flow.")
+            return True
+        print("⚠️ Saved session has expired. Logging in again.")
+
+    if not login_instagram(driver, instagram_username, instagram_password):
+        return False
+    save_cookie_jar(driver, cookie_jar_path)
+    return True
+
+
+def launch_logged_in_drivers(config, session_count, instagram_username, instagram_password):
+    """
+    Launches `session_count` Chrome sessions that share one Instagram login.
+
+    The first session uses the persistent profile / saved cookies (restore_or_login) and only
+    logs in if those are no longer valid; the others copy its cookies. Every session gets its
+    own user agent, except that a saved session keeps the user agent it was created with.
+
+    Returns:
+        list: The logged-in drivers (first one is the primary). Empty if the primary session could
+              not be started or logged in; extra sessions that fail are dropped with a warning.
+    """
+    session_user_agents = random.sample(config["user_agents"], len(config["user_agents"]))
+
+    # A saved session is tied to the user agent it was created with; keep using it for the first session.
+    saved_session = load_cookie_jar(config["settings"].get("cookie_jar_path"))
+    if saved_session and saved_session.get("user_agent"):
+        session_user_agents.insert(0, saved_session["user_agent"])
+
+    try:
+        print("🚀 Initializing Chrome WebDriver...")
+        driver = create_driver(config, session_user_agents[0], use_profile_dir=True)
+        print("✅ Chrome WebDriver launched successfully!")
+    except Exception as e:
+        print(f"❌ WebDriver initialization failed: {e}")
+        return []
+
+    # Reuse the persistent profile or saved cookies when they are still valid; log in only as a fallback.
+    if not restore_or_login(driver, config, instagram_username, instagram_password):
+        driver.quit()
+        return []
+
+    drivers = [driver]
+    for session_index in range(1, session_count):
+        try:
+            print(f"🚀 Initializing pooled Chrome session {session_index + 1}/{session_count}...")
+            pooled_driver = create_driver(config, session_user_agents[session_index % len(session_user_agents)])
+        except Exception as e:
+            print(f"❌ Pooled WebDriver initialization failed: {e}. Continuing with {len(drivers)} session(s).")
+            break
+        if copy_session_cookies(driver, pooled_driver):
+            drivers.append(pooled_driver)
+        else:
+            print(f"⚠️ Pooled session {session_index + 1} is not logged in after copying cookies. Discarding it.")
+            pooled_driver.quit()
+    return drivers
+
+
+def driver_is_alive(driver):
+    """Returns True if the Chrome session still answers (one cheap WebDriver round trip)."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class BrowserPool:
+    """
+    Pre-launched, logged-in Chrome sessions kept warm by a long-running process (the RQ worker),
+    so a job borrows a ready browser instead of cold-starting Chrome and logging in.
+
+    Jobs call `acquire()` and must hand the driver back with `release()`. Sessions that died
+    while idle or during a job are replaced with a fresh one that copies a live session's cookies
+    (or logs in again if none is left).
+    """
+
+    def __init__(self, config, size, instagram_username, instagram_password):
+        self.config = config
+        self.size = max(1, size)
+        self.instagram_username = instagram_username
+        self.instagram_password = instagram_password
+        self.idle = queue.Queue()
+        self.all_drivers = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Launches and logs in every session. Returns the number of warm sessions."""
+        drivers = launch_logged_in_drivers(self.config, self.size, self.instagram_username, self.instagram_password)
+        with self._lock:
+            self.all_drivers.extend(drivers)
+        for driver in drivers:
+            self.idle.put(driver)
+        print(f"🔥 Browser pool ready with {len(drivers)} warm session(s).")
+        return len(drivers)
+
+    def _replace(self, dead_driver):
+        """Quits a dead session and launches a logged-in replacement (None if that fails)."""
+        with self._lock:
+            if dead_driver in self.all_drivers:
+                self.all_drivers.remove(dead_driver)
+            live_drivers = [driver for driver in self.all_drivers if driver_is_alive(driver)]
+        try:
+            dead_driver.quit()
+        except Exception:
+            pass
+
+        if live_drivers:
+            try:
+                replacement = create_driver(self.config)
+            except Exception as e:
+                print(f"❌ Could not launch a replacement browser: {e}")
+                return None
+            if not copy_session_cookies(live_drivers[0], replacement):
+                replacement.quit()
+                return None
+        else:
+            drivers = launch_logged_in_drivers(self.config, 1, self.instagram_username, self.instagram_password)
+            if not drivers:
+                return None
+            replacement = drivers[0]
+
+        with self._lock:
+            self.all_drivers.append(replacement)
+        return replacement
+
+    def acquire(self, timeout=None):
+        """
+        Borrows a warm, live session. Blocks until one is free.
+
+        Raises:
+            queue.Empty: If no session became free within `timeout` seconds.
+            RuntimeError: If a dead session could not be replaced.
+        """
+        driver = self.idle.get(timeout=timeout)
+        if driver_is_alive(driver):
+            return driver
+        print("♻️ Pooled browser session died while idle. Launching a replacement...")
+        replacement = self._replace(driver)
+        if replacement is None:
+            raise RuntimeError("Could not replace a dead pooled browser session.")
+        return replacement
+
+    def acquire_many(self, count, timeout=None):
+        """
+        Borrows up to `count` sessions for one job: blocks for the first, then takes whichever
+        others are idle right now. Every returned session must be handed back with release().
+
+        Returns:
+            list: At least one live session.
+        """
+        drivers = [self.acquire(timeout)]
+        while len(drivers) < count:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if not driver_is_alive(driver):
+                driver = self._replace(driver)
+                if driver is None:
+                    continue
+            drivers.append(driver)
+        return drivers
+
+    def release(self, driver):
+        """Returns a borrowed session to the pool, replacing it first if it no longer responds."""
+        if not driver_is_alive(driver):
+            driver = self._replace(driver)
+            if driver is None:
+                print("⚠️ Browser pool shrank by one session (replacement failed).")
+                return
+        self.idle.put(driver)
+
+    def close(self):
+        """Quits every session, idle or borrowed."""
+        with self._lock:
+            drivers, self.all_drivers = self.all_drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+# Warm pool of the current process, installed by a long-running worker (see instagram-scraper-webapp/worker.py).
+shared_browser_pool = None
+
+
+def install_shared_browser_pool(pool):
+    """Makes `pool` the process-wide warm browser pool that in-process crawl jobs borrow from."""
+    global shared_browser_pool
+    shared_browser_pool = pool
+
+
+def get_shared_browser_pool():
+    """Returns the process-wide warm browser pool, or None if this process has none."""
+    return shared_browser_pool
+
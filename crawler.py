@@ -0,0 +1,314 @@
+import os
+import json
+import time
+
+from scrapers.followers_scraper import scrape_followers_and_following
+from scrapers.crawl_pool import run_crawl_pool
+from scrapers.classifier import classify_profile
+from scrapers.frontier import CrawlFrontier
+from scrapers.rejection_cache import RejectionCache
+from scrapers.collected_index import CollectedUsernames
+from scrapers.graph_store import GraphStore
+from scrapers.candidate_scoring import SEED_PRIORITY
+from scrapers.fetch_backends import create_profile_fetcher
+from scrapers.network_usage import drain_network_log
+from scrapers import progress
+from exporter import LiveExporter
+from browser import launch_logged_in_drivers
+
+
+# --- Result sinks ---
+# A sink receives every accepted, classified profile as soon as it is found.
+# Sinks only need two methods: write(profile_data) and close().
+
+class ExportSink:
+    """Writes each profile to the formats enabled in config['export_settings'] through one LiveExporter kept open for the crawl."""
+
+    def __init__(self, config):
+        self.config = config
+        self.exporter = LiveExporter(config)
+
+    def write(self, profile_data):
+        # Buffered; the exporter flushes in batches and always on close()
+        self.exporter.write(profile_data)
+
+    def close(self):
+        self.exporter.close()
+
+
+class CollectingSink:
+    """Keeps every profile in memory, for callers that want the results back as objects."""
+
+    def __init__(self):
+        self.profiles = []
+
+    def write(self, profile_data):
+        self.profiles.append(dict(profile_data))
+
+    def close(self):
+        pass
+
+
+class JsonFileSink:
+    """Writes all profiles as one JSON list to `output_path` when the crawl ends."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.profiles = []
+
+    def write(self, profile_data):
+        self.profiles.append(dict(profile_data))
+
+    def close(self):
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(self.output_path, "w", encoding="utf-8") as output_file:
+            json.dump(self.profiles, output_file, ensure_ascii=False, indent=2)
+        print(f"✅ Wrote {len(self.profiles)} profile(s) to JSON: {self.output_path}")
+
+
+def run_crawl(config, driver=None, sinks=None, deadline=None, max_profiles=None,
+              instagram_username=None, instagram_password=None, progress_reporter=None):
+    """
+    Runs a complete crawl in-process: browser start-up and login (unless a driver is given),
+    Step 1 (queue the seeds in the persistent frontier) and Step 2/3 (visit, filter, classify,
+    export and expand profiles until the frontier is empty or a stop condition is met).
+
+    Args:
+        config (dict): Full configuration (same layout as config.yaml). Callers can pass a
+                       per-job copy with their own seeds, keywords, depth and frontier_db_path.
+        driver (WebDriver or list, optional): An already logged-in session, or several (crawled in pool
+                                              mode), e.g. borrowed from a warm BrowserPool. They are not
+                                              quit afterwards. If omitted, the crawl launches
+                                              settings.browser_pool_size sessions and quits them at the end.
+        sinks (list, optional): Objects with write(profile_data) and close(). Defaults to
+                                [ExportSink(config)], i.e. the formats in export_settings.
+        deadline (float, optional): time.time() value after which no new profile is started.
+        max_profiles (int, optional): Stop once this many profiles have been accepted and exported.
+        instagram_username (str, optional): Login for a fresh session (defaults to $INSTAGRAM_USERNAME).
+        instagram_password (str, optional): Password for a fresh session (defaults to $INSTAGRAM_PASSWORD).
+        progress_reporter (ProgressReporter, optional): Receives structured progress events (visited,
+                                                        accepted, exported, error, status), e.g. a
+                                                        progress.RedisStreamReporter for the web app.
+
+    Returns:
+        dict: {"status": "completed" | "deadline" | "limit" | "incomplete" | "login_failed",
+               "profiles_exported": int, "pending": int, "elapsed_seconds": float}
+    """
+    started_at = time.time()
+    settings = config["settings"]
+    sinks = sinks if sinks is not None else [ExportSink(config)]
+    previous_reporter = progress.set_reporter(progress_reporter)
+    try:
+        result = _run_crawl(config, settings, driver, sinks, deadline, max_profiles,
+                            instagram_username, instagram_password, started_at)
+    except Exception as e:
+        progress.emit("error", message=f"crawl aborted: {e}")
+        progress.emit("status", status="failed")
+        raise
+    finally:
+        progress.set_reporter(previous_reporter)
+    return result
+
+
+def _run_crawl(config, settings, driver, sinks, deadline, max_profiles, instagram_username, instagram_password, started_at):
+    """Body of run_crawl; runs with the crawl's progress reporter installed."""
+    progress.emit("status", status="starting")
+
+    # --- Browser session(s) ---
+    owns_drivers = driver is None
+    if owns_drivers:
+        drivers = launch_logged_in_drivers(
+            config,
+            max(1, settings.get("browser_pool_size", 1)),
+            instagram_username or os.getenv("INSTAGRAM_USERNAME"),
+            instagram_password or os.getenv("INSTAGRAM_PASSWORD")
+        )
+        if not drivers:
+            progress.emit("status", status="login_failed")
+            return {"status": "login_failed", "profiles_exported": 0, "pending": 0, "elapsed_seconds": time.time() - started_at}
+        driver = drivers[0]
+    else:
+        drivers = list(driver) if isinstance(driver, (list, tuple)) else [driver]
+        driver = drivers[0]
+
+    # Everything the crawl opens is created inside the try, so a failure part-way through the
+    # setup (a locked database, an unwritable data directory, ...) still closes what was opened
+    # and quits the browsers this crawl launched.
+    processed_usernames_for_export = None
+    frontier = rejection_cache = graph_store = profile_fetcher = None
+    exported_this_run = []
+    try:
+        # Track usernames that have been processed and exported
+        # This prevents re-processing and re-exporting the same profile multiple times.
+        # With global_dedup on, this is the persistent index shared by every CLI run and web app job,
+        # so profiles collected by any earlier run are skipped too; otherwise a plain per-run set.
+        if settings.get("global_dedup", True):
+            processed_usernames_for_export = CollectedUsernames(
+                settings.get("collected_index_path", os.path.join("data", "collected_usernames.bloom")),
+                settings.get("collected_db_path", os.path.join("data", "collected_usernames.db")),
+                capacity=settings.get("collected_index_capacity", 10_000_000),
+                error_rate=settings.get("collected_index_error_rate", 0.05),
+                source=config.get("export_settings", {}).get("run_id") or "cli"
+            )
+        else:
+            processed_usernames_for_export = set()
+
+        # Helper function to classify and hand a single profile to every sink
+        def process_and_live_export_profile(profile_data_item, config, processed_usernames_set):
+            """
+            Classifies a single profile dictionary and immediately sends it to the sinks.
+            Prevents re-processing and re-exporting the same username if already handled.
+
+            Args:
+                profile_data_item (dict): A dictionary containing scraped profile data.
+                config (dict): The loaded configuration dictionary.
+                processed_usernames_set (set): A set to track usernames already processed and exported.
+            """
+            username = profile_data_item.get("Username")
+            if not username:
+                print("⚠️ Skipping profile with no Username for live export.")
+                return
+
+            if username in processed_usernames_set:
+                return
+
+            print(f"    Classifying and preparing for live export: {username}...")
+
+            # Classify the profile. This function modifies `profile_data_item` in place,
+            # adding 'Classification', cleaning 'Bio', and extracting other details.
+            classify_profile(profile_data_item)
+
+            for sink in sinks:
+                try:
+                    sink.write(profile_data_item)
+                except Exception as e:
+                    print(f"❌ Sink {type(sink).__name__} failed for {username}: {e}")
+
+            # Add username to the set of processed profiles to avoid future duplicates
+            processed_usernames_set.add(username)
+            exported_this_run.append(username)
+            progress.emit("exported", username=username, classification=profile_data_item.get("Classification"))
+
+        def should_stop():
+            if deadline is not None and time.time() >= deadline:
+                return True
+            return max_profiles is not None and len(exported_this_run) >= max_profiles
+
+        # --- Step 1: Queue Seed Instagram Usernames in the persistent crawl frontier ---
+        # The frontier lives on disk, so a run that was killed (crash, Chrome hang, job deadline)
+        # resumes from the next queued username instead of starting over from the seeds.
+        frontier = CrawlFrontier(settings.get("frontier_db_path", os.path.join("data", "crawl_frontier.db")))
+
+        if not settings.get("resume_crawl", True) or (frontier.total_count() and not frontier.pending_count()):
+            # Resuming is disabled, or the previous crawl ran to completion: start a fresh crawl.
+            frontier.reset()
+
+        # Profiles that failed the keyword filter in this or earlier runs are skipped without a page load.
+        rejection_cache = RejectionCache(
+            settings.get("rejection_cache_path", os.path.join("data", "rejected_profiles.db")),
+            config.get("keywords", []),
+            ttl_hours=settings.get("rejection_cache_ttl_hours", 168)
+        )
+
+        # Every harvested follower/following edge is kept; fresh cached lists replace pop-up scrolling.
+        if settings.get("graph_store", True):
+            graph_store = GraphStore(
+                settings.get("graph_store_dir", os.path.join("data", "graph")),
+                max_age_hours=settings.get("graph_edge_max_age_hours", 168)
+            )
+
+        requeued_count = frontier.requeue_in_flight()
+        if frontier.total_count():
+            print(f"\n♻️ Resuming previous crawl: {frontier.pending_count()} username(s) pending ({requeued_count} were in flight).")
+
+        # Profiles accepted and exported by the interrupted run must not be exported again.
+        processed_usernames_for_export.update(frontier.accepted_usernames())
+
+        print("\n🚀 Step 1: Queueing initial seed usernames...")
+        for username in config["seed_usernames"]:
+            frontier.add(username, 0, priority=SEED_PRIORITY) # Seeds are always visited before discovered candidates
+
+        # Profile fields come from the configured fetch backend: a Chrome page render ("selenium"), or the
+        # profile JSON over pooled HTTP ("http"), which keeps the browser for followers/following only.
+        # The HTTP backend prefetches the next queued candidates concurrently, except those the crawl will skip anyway.
+        profile_fetcher = create_profile_fetcher(
+            config, driver, upcoming_usernames=frontier.peek_queued,
+            skip_username=lambda username: username in processed_usernames_for_export
+            or rejection_cache.is_rejected(username, count_hit=False)
+        )
+        print(f"✅ Using the '{profile_fetcher.name}' profile fetch backend.")
+
+        # --- Step 2 & 3: Expand search for new relevant profiles with live export ---
+        progress.emit("status", status="crawling", pending=frontier.pending_count())
+        print("\n🚀 Step 2 & 3: Scraping seeds and expanding search for new relevant profiles using followers/following and filtering (Live Export)...")
+        if len(drivers) > 1:
+            # Worker-pool mode: every session pulls from the same frontier and feeds one export writer.
+            run_crawl_pool(
+                drivers,
+                frontier,
+                process_and_live_export_profile,
+                profile_fetcher,
+                config,
+                scraped_usernames_set=processed_usernames_for_export,
+                rejection_cache=rejection_cache,
+                should_stop=should_stop,
+                graph_store=graph_store,
+                max_profiles=max_profiles # Counted as profiles reach the export writer, so it is never overshot
+            )
+        else:
+            # scrape_followers_and_following drains the frontier and handles the full scrape and live export internally
+            scrape_followers_and_following(
+                driver,
+                frontier, # Persistent frontier holding the seeds and everything discovered from them
+                process_and_live_export_profile, # Classify and hand to the sinks
+                profile_fetcher, # Single-pass profile fetcher (at most one page load per profile)
+                config,
+                scraped_usernames_set=processed_usernames_for_export, # Master set for tracking
+                rejection_cache=rejection_cache, # Shared "seen and rejected" cache
+                should_stop=should_stop,
+                graph_store=graph_store # Persistent follower/following edges
+            )
+    finally:
+        pending = None
+        if frontier is not None:
+            pending = frontier.pending_count()
+            frontier.close()
+        if rejection_cache is not None:
+            rejection_cache.close()
+        if profile_fetcher is not None:
+            profile_fetcher.close()
+        if graph_store is not None:
+            graph_store.close()
+        if isinstance(processed_usernames_for_export, CollectedUsernames):
+            processed_usernames_for_export.close()
+        for sink in sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"❌ Sink {type(sink).__name__} failed to close: {e}")
+
+        for session_index, session_driver in enumerate(drivers):
+            drain_network_log(session_driver)
+            if getattr(session_driver, "network_usage", None) is not None:
+                print(f"📉 Browser session {session_index + 1}: {session_driver.network_usage.summary()}")
+            if owns_drivers:
+                session_driver.quit()
+
+    if not pending:
+        status = "completed"
+    elif max_profiles is not None and len(exported_this_run) >= max_profiles:
+        status = "limit"
+    elif deadline is not None and time.time() >= deadline:
+        status = "deadline"
+    else:
+        status = "incomplete" # e.g. every browser session failed with usernames still queued
+    print(f"\n✅ Crawl finished ({status}). Profiles exported in this run: {len(exported_this_run)}")
+    progress.emit("status", status=status, pending=pending)
+    return {
+        "status": status,
+        "profiles_exported": len(exported_this_run),
+        "pending": pending,
+        "elapsed_seconds": time.time() - started_at,
+    }
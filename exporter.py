@@ -4,88 +4,567 @@ import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 # from airtable import Airtable
 import time
+import csv
+import glob
+import re
+import sqlite3
+import threading
+import uuid
+from urllib.parse import quote
 from dotenv import load_dotenv
-import openpyxl # NEW: Import openpyxl for Excel appending
+import openpyxl # Excel export (write-only streaming mode)
 
 # Load environment variables (for Airtable and Google Sheets credentials)
 dotenv_path = os.path.join(os.getcwd(), ".env")
 load_dotenv(dotenv_path)
 
-# This set will keep track of which usernames have already been exported
-# to prevent duplicates when using append mode.
-# Note: In a multi-process/multi-thread scenario, this would need to be shared.
-# For a single-threaded script, it's fine here, but conceptually might be better in main.py
-# and passed around or managed by a higher-level object.
-# However, for simple append, managing headers per file is more critical.
+# LiveExporter (below) is the export path of a crawl: it buffers classified profiles and flushes
+# them in batches to the enabled sinks (CSV file, ExcelStreamWriter workbooks, ParquetPartitionWriter
+# part files, SqliteLeadStore, and Airtable/Google Sheets via export_to_services).
+# It does not de-duplicate: the crawl's set of exported usernames (or the cross-run collected-username
+# index) decides what gets exported, and the SQLite lead store upserts by username.
 
-def export_data_live(new_profiles_data_list, config):
+def numbered_workbook_paths(base_path):
     """
-    Exports a list of new profile data dictionaries to various formats,
-    appending to existing files/databases.
+    Returns every existing workbook of the ExcelStreamWriter series for `base_path`
+    (instagram_leads.xlsx, instagram_leads_2.xlsx, ...), in part order.
+    """
+    stem, extension = os.path.splitext(base_path)
+    parts = [(1, base_path)] if os.path.exists(base_path) else []
+    for path in glob.glob(f"{glob.escape(stem)}_*{extension}"):
+        suffix = path[len(stem) + 1:len(path) - len(extension)]
+        if suffix.isdigit():
+            parts.append((int(suffix), path))
+    return [path for _, path in sorted(parts)]
 
-    Args:
-        new_profiles_data_list (list): A list of dictionaries, each representing a classified profile.
-        config (dict): The loaded configuration dictionary from config.yaml.
+
+class ExcelStreamWriter:
     """
-    if not new_profiles_data_list:
-        return # Do nothing if no new data to export
+    Streams rows into .xlsx files with openpyxl's write-only mode: rows go straight to a
+    temporary file instead of a cell tree in memory, so time and memory per row stay flat.
 
-    df_to_export = pd.DataFrame(new_profiles_data_list)
-    
-    export_settings = config.get("export_settings", {})
-    enabled_formats = export_settings.get("enabled_formats", ["csv"])
-    output_dir = "data"
-
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    print(f"\n--- Live Exporting {len(new_profiles_data_list)} new data points ---")
-
-    # --- CSV Export ---
-    if "csv" in enabled_formats:
-        try:
-            csv_filename = export_settings.get("csv_filename", "instagram_leads.csv")
-            output_path = os.path.join(output_dir, csv_filename)
-            
-            # Check if file exists to determine if header is needed
-            file_exists = os.path.exists(output_path)
-            
-            df_to_export.to_csv(output_path, mode='a', header=not file_exists, index=False)
-            print(f"✅ Appended data to CSV: {output_path}")
-        except Exception as e:
-            print(f"❌ Error appending to CSV: {e}")
-
-    # --- Excel Export ---
-    # This section is enabled by default as it only requires openpyxl.
-    # To enable Excel export:
-    # 1. Ensure 'openpyxl' is installed (`pip install openpyxl`).
-    # 2. Ensure 'excel' is enabled in 'enabled_formats' in config.yaml.
-    if "excel" in enabled_formats:
-        try:
-            excel_filename = export_settings.get("excel_filename", "instagram_leads.xlsx")
-            output_path = os.path.join(output_dir, excel_filename)
-            
-            wb = None
-            if not os.path.exists(output_path):
-                # Create a new workbook if file doesn't exist and write header
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "Instagram Leads" # Set sheet title
-                ws.append(df_to_export.columns.tolist()) # Write header row
-            else:
-                # Load existing workbook
-                wb = openpyxl.load_workbook(output_path)
-                ws = wb.active # Get the active sheet
-
-            # Append each row of the new data
-            for r_idx, row in df_to_export.iterrows():
-                ws.append(row.tolist())
-            
-            wb.save(output_path)
-            print(f"✅ Appended data to Excel: {output_path}")
-        except Exception as e:
-            print(f"❌ Error appending to Excel: {e}")
+    Write-only workbooks cannot be reopened or saved twice, so each workbook is saved exactly once:
+    when it reaches rows_per_workbook rows, when it has been open for seconds_per_workbook (the
+    writer then rolls over to the next numbered file), or when close() is called. An existing
+    workbook from an earlier run is never modified; the run starts at the next free number
+    (instagram_leads.xlsx, instagram_leads_2.xlsx, ...).
+
+    The workbook in progress only exists in openpyxl's temporary file until it is saved, so a
+    crash loses the rows written since the last save (at most seconds_per_workbook worth).
+    The CSV export is the crash-safe format: every flush is on disk.
+    """
+
+    def __init__(self, path, rows_per_workbook=100000, seconds_per_workbook=None):
+        self.base_path = path
+        self.rows_per_workbook = max(1, rows_per_workbook)
+        self.seconds_per_workbook = seconds_per_workbook
+        self.columns = None
+        self.saved_paths = []
+        self._workbook = None
+        self._worksheet = None
+        self._current_path = None
+        self._rows_in_workbook = 0
+        self._opened_at = None
+        self._part_number = 1
+
+    def _next_path(self):
+        stem, extension = os.path.splitext(self.base_path)
+        while True:
+            path = self.base_path if self._part_number == 1 else f"{stem}_{self._part_number}{extension}"
+            self._part_number += 1
+            if not os.path.exists(path):
+                return path
+
+    def _open_workbook(self):
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._worksheet = self._workbook.create_sheet("Instagram Leads")
+        self._worksheet.append(self.columns) # Header row in every part
+        self._current_path = self._next_path()
+        self._rows_in_workbook = 0
+        self._opened_at = time.time()
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self.columns is None:
+                self.columns = list(row.keys())
+            if self._workbook is None:
+                self._open_workbook()
+            self._worksheet.append([row.get(column) for column in self.columns])
+            self._rows_in_workbook += 1
+            if self._rows_in_workbook >= self.rows_per_workbook:
+                self._save() # Roll over: the next row opens the next numbered workbook
+        self.save_if_due()
 
+    def save_if_due(self):
+        """Saves the workbook in progress once it has been open for seconds_per_workbook (time-based rollover)."""
+        if (self._workbook is not None and self.seconds_per_workbook
+                and time.time() - self._opened_at >= self.seconds_per_workbook):
+            self._save()
+
+    def _save(self):
+        self._workbook.save(self._current_path)
+        self.saved_paths.append(self._current_path)
+        print(f"✅ Saved Excel workbook ({self._rows_in_workbook} rows): {self._current_path}")
+        self._workbook = None
+        self._worksheet = None
+
+    def close(self):
+        """Saves the workbook in progress (if any rows were written to it)."""
+        if self._workbook is not None:
+            self._save()
+
+
+# Columns of the Parquet export and their types. Counts are stored as integers ("12.9K" -> 12900),
+# so analysis does not have to re-parse strings. run_id and Classification are partition
+# directories rather than columns in the files.
+PARQUET_STRING_COLUMNS = [
+    "Username", "Full Name", "Bio", "WhatsApp Number", "WhatsApp Group Link",
+    "Region", "External Link", "Profile URL",
+]
+PARQUET_COUNT_COLUMNS = ["Follower Count", "Following Count"]
+
+COUNT_SUFFIX_MULTIPLIERS = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+
+
+def parse_count(value):
+    """
+    Converts a follower/following count as shown by Instagram to an int.
+
+    "1,234" -> 1234, "12.9K" -> 12900, "1.2M" -> 1200000, "" or unparseable -> None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().lower().replace(" ", "")
+    match = re.fullmatch(r"([\d.,]+)([kmb]?)", text)
+    if not match:
+        return None
+    number, suffix = match.groups()
+    if suffix:
+        number = number.replace(",", ".") # "12,9K" in some locales
+    else:
+        number = number.replace(",", "").replace(".", "") # Thousands separators only
+    try:
+        return int(round(float(number) * COUNT_SUFFIX_MULTIPLIERS.get(suffix, 1)))
+    except ValueError:
+        return None
+
+
+class ParquetPartitionWriter:
+    """
+    Writes profiles as Parquet under <root>/run_id=<run>/Classification=<value>/part-<time>-<id>.parquet
+    (Hive-style partitions, readable with pyarrow.dataset / pandas.read_parquet on <root>).
+    Every writer names its files uniquely, so a re-run with the same run_id (e.g. a resumed
+    web app job) adds part files next to the earlier ones and never truncates them.
+
+    Rows are collected per classification and written as one row group every row_group_size rows,
+    so files are not made of many tiny row groups. A part file is only readable once it is closed
+    (the footer is written last), so each classification's part is finished (remaining rows
+    written, file closed) after seconds_per_part and at close(); the next rows start a new part.
+    Open parts are written under a dot-prefixed name, which pyarrow and pandas skip when reading
+    the directory, and renamed when finished. A killed process therefore loses at most the rows
+    of the parts still open (seconds_per_part worth), and never leaves a file that breaks reading
+    the parts already finished. Requires pyarrow (imported on first use).
+    """
+
+    def __init__(self, root_dir, run_id, row_group_size=5000, compression="zstd", seconds_per_part=None):
+        import pyarrow as pa # Only needed when the parquet format is enabled
+
+        self.pa = pa
+        self.root_dir = root_dir
+        self.run_id = run_id
+        self.row_group_size = max(1, row_group_size)
+        self.compression = compression
+        self.seconds_per_part = seconds_per_part
+        self.schema = pa.schema(
+            [(column, pa.string()) for column in PARQUET_STRING_COLUMNS]
+            + [(column, pa.int64()) for column in PARQUET_COUNT_COLUMNS]
+        )
+        self._writers = {} # Classification -> (open pyarrow.parquet.ParquetWriter, its in-progress path)
+        self._pending = {} # Classification -> rows waiting for the next row group
+        self._part_started = {} # Classification -> time the first row of its current part arrived
+        self.written_paths = []
+
+    def write_rows(self, rows):
+        for row in rows:
+            classification = row.get("Classification") or "Unclassified"
+            record = {column: (None if row.get(column) is None else str(row.get(column))) for column in PARQUET_STRING_COLUMNS}
+            record.update({column: parse_count(row.get(column)) for column in PARQUET_COUNT_COLUMNS})
+            pending = self._pending.setdefault(classification, [])
+            pending.append(record)
+            self._part_started.setdefault(classification, time.time())
+            if len(pending) >= self.row_group_size:
+                self._write_row_group(classification)
+        self.finish_due_parts()
+
+    def finish_due_parts(self):
+        """Finishes every part that has been open for seconds_per_part (time-based rollover)."""
+        if not self.seconds_per_part:
+            return
+        now = time.time()
+        for classification, started in list(self._part_started.items()):
+            if now - started >= self.seconds_per_part:
+                self._finish_part(classification)
+
+    def _finish_part(self, classification):
+        """Writes the classification's buffered rows and closes its part file, so it is complete on disk."""
+        self._write_row_group(classification)
+        writer, in_progress_path = self._writers.pop(classification, (None, None))
+        if writer is not None:
+            writer.close()
+            # The dot-less name is free: it shares the reserved file's unique suffix
+            path = os.path.join(os.path.dirname(in_progress_path), os.path.basename(in_progress_path)[1:])
+            os.replace(in_progress_path, path)
+            self.written_paths.append(path)
+        self._part_started.pop(classification, None)
+
+    def _write_row_group(self, classification):
+        import pyarrow.parquet as pq
+
+        rows, self._pending[classification] = self._pending.get(classification, []), []
+        if not rows:
+            return
+        writer, _ = self._writers.get(classification, (None, None))
+        if writer is None:
+            partition_dir = os.path.join(
+                self.root_dir,
+                f"run_id={quote(str(self.run_id), safe='')}",
+                f"Classification={quote(classification, safe='')}" # URI-encoded, as pyarrow's Hive partitioning expects
+            )
+            os.makedirs(partition_dir, exist_ok=True)
+            in_progress_path = self._new_part_path(partition_dir)
+            writer = pq.ParquetWriter(in_progress_path, self.schema, compression=self.compression)
+            self._writers[classification] = (writer, in_progress_path)
+        writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def _new_part_path(self, partition_dir):
+        """
+        Returns an in-progress part path (".part-<time>-<id>.parquet") in `partition_dir` that did not
+        exist yet and is now reserved for this writer.
+        """
+        while True:
+            path = os.path.join(partition_dir, f".part-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:12]}.parquet")
+            try:
+                # O_EXCL: never hand out a file that already exists, even if another writer raced us to the name
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return path
+            except FileExistsError:
+                continue
+
+    def close(self):
+        """Writes the remaining rows of every classification and closes the files."""
+        for classification in set(self._pending) | set(self._writers):
+            self._finish_part(classification)
+        if self.written_paths:
+            print(f"✅ Wrote Parquet export for run {self.run_id}: {len(self.written_paths)} partition file(s) under {self.root_dir}")
+
+
+# Profile field -> column of the SQLite lead store's `leads` table
+LEAD_STORE_COLUMNS = {
+    "Full Name": "full_name",
+    "Follower Count": "follower_count",
+    "Following Count": "following_count",
+    "Bio": "bio",
+    "WhatsApp Number": "whatsapp_number",
+    "WhatsApp Group Link": "whatsapp_group_link",
+    "Region": "region",
+    "External Link": "external_link",
+    "Profile URL": "profile_url",
+    "Classification": "classification",
+}
+
+
+class SqliteLeadStore:
+    """
+    De-duplicated, queryable lead storage: one row per username in a `leads` table.
+
+    A profile seen again (in a later run, or after a restart) updates its row instead of
+    adding a duplicate: fields are refreshed, last_seen moves forward, seen_count goes up and
+    first_seen is kept. Follower/following counts are stored as integers. Classification,
+    Region and WhatsApp Number are indexed for lookups.
+
+    The database runs in WAL mode (readers, e.g. a dashboard or a notebook, do not block the
+    crawl) and each batch is written in one transaction with executemany.
+    """
+
+    def __init__(self, db_path, run_id=None):
+        """
+        Args:
+            db_path (str): Path to the SQLite file, e.g. "data/leads.db".
+            run_id (str, optional): Stored as last_run_id on every row written by this run.
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.db_path = db_path
+        self.run_id = run_id
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL") # Safe with WAL; fsync at checkpoints only
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS leads (
+                username            TEXT PRIMARY KEY,
+                full_name           TEXT,
+                follower_count      INTEGER,
+                following_count     INTEGER,
+                bio                 TEXT,
+                whatsapp_number     TEXT,
+                whatsapp_group_link TEXT,
+                region              TEXT,
+                external_link       TEXT,
+                profile_url         TEXT,
+                classification      TEXT,
+                first_seen          REAL NOT NULL,
+                last_seen           REAL NOT NULL,
+                seen_count          INTEGER NOT NULL DEFAULT 1,
+                last_run_id         TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_leads_classification ON leads (classification);
+            CREATE INDEX IF NOT EXISTS idx_leads_region ON leads (region);
+            CREATE INDEX IF NOT EXISTS idx_leads_whatsapp_number ON leads (whatsapp_number);
+            """
+        )
+        self.conn.commit()
+
+        columns = ["username"] + list(LEAD_STORE_COLUMNS.values()) + ["first_seen", "last_seen", "seen_count", "last_run_id"]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in LEAD_STORE_COLUMNS.values())
+        self._upsert_sql = (
+            f"INSERT INTO leads ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT(username) DO UPDATE SET {updates}, "
+            "last_seen = excluded.last_seen, seen_count = leads.seen_count + 1, last_run_id = excluded.last_run_id"
+        )
+
+    def upsert_rows(self, rows):
+        """Inserts or refreshes a batch of profiles in a single transaction."""
+        now = time.time()
+        parameters = []
+        for row in rows:
+            if not row.get("Username"):
+                continue
+            values = [row.get("Username")]
+            for field, column in LEAD_STORE_COLUMNS.items():
+                value = row.get(field)
+                values.append(parse_count(value) if column.endswith("_count") else value)
+            values.extend([now, now, 1, self.run_id])
+            parameters.append(values)
+        with self.conn: # One transaction per batch: commits on success, rolls back on error
+            self.conn.executemany(self._upsert_sql, parameters)
+
+    def close(self):
+        self.conn.close()
+
+
+class LiveExporter:
+    """
+    Stays open for a whole crawl and writes profiles in batches, so the cost of exporting one
+    profile does not grow with the size of the output file.
+
+    - CSV: one file handle opened in append mode and a csv.DictWriter; each flush writes
+      the buffered rows and flushes the handle, so the file is always readable mid-run.
+    - Excel: an ExcelStreamWriter (openpyxl write-only mode) that rolls over to a new
+      numbered workbook every excel_rows_per_workbook rows or excel_minutes_per_workbook
+      minutes, and saves the last one at close(). Rows in the unsaved workbook are lost on a
+      crash; CSV is the crash-safe format.
+    - Parquet: a ParquetPartitionWriter partitioned by run id and Classification, with typed
+      (integer) follower/following counts. Part files are finished every
+      parquet_minutes_per_part minutes, so a killed run keeps everything but the open parts.
+    - SQLite: a SqliteLeadStore that upserts by username, one transaction per flush.
+
+    Rows are buffered and flushed when flush_every rows are waiting or flush_interval_seconds
+    have passed, and always at close(). The time limit is enforced by a background timer thread
+    (started with the first row), so a lead never waits in the buffer longer than
+    flush_interval_seconds just because no further profile arrived. Safe to call from the crawl
+    pool's export writer thread.
+    """
+
+    def __init__(self, config, output_dir="data"):
+        export_settings = config.get("export_settings", {})
+        self.export_settings = export_settings
+        self.enabled_formats = export_settings.get("enabled_formats", ["csv"])
+        self.output_dir = output_dir
+        self.flush_every = max(1, export_settings.get("flush_every", 25))
+        self.flush_interval = export_settings.get("flush_interval_seconds", 30)
+        self.excel_rows_per_workbook = export_settings.get("excel_rows_per_workbook", 100000)
+        self.excel_seconds_per_workbook = (export_settings.get("excel_minutes_per_workbook", 15) or 0) * 60
+        self.csv_path = os.path.join(output_dir, export_settings.get("csv_filename", "instagram_leads.csv"))
+        self.excel_path = os.path.join(output_dir, export_settings.get("excel_filename", "instagram_leads.xlsx"))
+        self.parquet_dir = os.path.join(output_dir, export_settings.get("parquet_dir", "parquet"))
+        self.parquet_row_group_size = export_settings.get("parquet_row_group_size", 5000)
+        self.parquet_seconds_per_part = (export_settings.get("parquet_minutes_per_part", 15) or 0) * 60
+        self.sqlite_path = os.path.join(output_dir, export_settings.get("sqlite_filename", "leads.db"))
+        # Identifies this run's partition; the web app sets one per job, the CLI uses the start time
+        self.run_id = export_settings.get("run_id") or time.strftime("%Y%m%d-%H%M%S")
+
+        self._pending = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flush_timer = None
+        self._csv_file = None
+        self._csv_writer = None
+        self._excel_writer = None
+        self._parquet_writer = None
+        self._lead_store = None
+        self.exported_count = 0
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, profile_data):
+        """Buffers one classified profile; flushes when a size or time threshold is reached."""
+        with self._lock:
+            self._pending.append(dict(profile_data))
+            if len(self._pending) >= self.flush_every or time.time() - self._last_flush >= self.flush_interval:
+                self._flush()
+            if self._flush_timer is None and self.flush_interval > 0 and not self._closed.is_set():
+                self._flush_timer = threading.Thread(target=self._flush_periodically, name="export-flush-timer", daemon=True)
+                self._flush_timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def maybe_flush(self):
+        """Flushes if rows are buffered and flush_interval_seconds have passed since the last flush."""
+        with self._lock:
+            if self._pending and time.time() - self._last_flush >= self.flush_interval:
+                self._flush()
+            if self._excel_writer is not None:
+                try:
+                    self._excel_writer.save_if_due() # A quiet crawl still gets its workbook saved on time
+                except Exception as e:
+                    print(f"❌ Error saving Excel workbook: {e}")
+            if self._parquet_writer is not None:
+                try:
+                    self._parquet_writer.finish_due_parts() # ...and its Parquet parts finished on time
+                except Exception as e:
+                    print(f"❌ Error finishing Parquet part: {e}")
+
+    def _flush_periodically(self):
+        # Timer thread: wakes up when the oldest possible buffered row reaches flush_interval_seconds
+        while True:
+            with self._lock:
+                wait_seconds = self._last_flush + self.flush_interval - time.time()
+            if self._closed.wait(max(0.5, wait_seconds)):
+                return
+            self.maybe_flush()
+
+    def close(self):
+        """
+        Writes everything still buffered, finalizes the Excel workbook and closes the CSV file.
+        run_crawl calls this from its finally block, so it also runs when the crawl stops at a
+        deadline or on SIGTERM (main.py turns the signal into a normal exit, and the RQ worker
+        raises SystemExit in the job on a forced stop).
+        """
+        self._closed.set()
+        if self._flush_timer is not None:
+            self._flush_timer.join()
+            self._flush_timer = None
+        with self._lock:
+            self._flush()
+            if self._excel_writer is not None:
+                try:
+                    self._excel_writer.close()
+                except Exception as e:
+                    print(f"❌ Error saving Excel workbook: {e}")
+                self._excel_writer = None
+            if self._parquet_writer is not None:
+                try:
+                    self._parquet_writer.close()
+                except Exception as e:
+                    print(f"❌ Error finishing Parquet export: {e}")
+                self._parquet_writer = None
+            if self._lead_store is not None:
+                self._lead_store.close()
+                self._lead_store = None
+            if self._csv_file is not None:
+                self._csv_file.close()
+                self._csv_file = None
+        if self.exported_count:
+            print(f"✅ Live export finished: {self.exported_count} profile(s) written.")
+
+    def _flush(self):
+        # Caller holds self._lock
+        rows, self._pending = self._pending, []
+        self._last_flush = time.time()
+        if not rows:
+            return
+
+        print(f"\n--- Live Exporting {len(rows)} new data points ---")
+
+        if "csv" in self.enabled_formats:
+            try:
+                self._write_csv(rows)
+                print(f"✅ Appended data to CSV: {self.csv_path}")
+            except Exception as e:
+                print(f"❌ Error appending to CSV: {e}")
+
+        # --- Excel Export ---
+        # To enable Excel export:
+        # 1. Ensure 'openpyxl' is installed (`pip install openpyxl`).
+        # 2. Ensure 'excel' is enabled in 'enabled_formats' in config.yaml.
+        if "excel" in self.enabled_formats:
+            try:
+                if self._excel_writer is None:
+                    self._excel_writer = ExcelStreamWriter(self.excel_path, self.excel_rows_per_workbook, self.excel_seconds_per_workbook)
+                self._excel_writer.write_rows(rows)
+            except Exception as e:
+                print(f"❌ Error appending to Excel: {e}")
+
+        if "parquet" in self.enabled_formats:
+            try:
+                if self._parquet_writer is None:
+                    self._parquet_writer = ParquetPartitionWriter(
+                        self.parquet_dir, self.run_id, self.parquet_row_group_size, seconds_per_part=self.parquet_seconds_per_part
+                    )
+                self._parquet_writer.write_rows(rows)
+            except ImportError:
+                print("❌ Parquet export needs pyarrow (`pip install pyarrow`). Skipping Parquet.")
+            except Exception as e:
+                print(f"❌ Error writing Parquet: {e}")
+
+        if "sqlite" in self.enabled_formats:
+            try:
+                if self._lead_store is None:
+                    self._lead_store = SqliteLeadStore(self.sqlite_path, self.run_id)
+                self._lead_store.upsert_rows(rows)
+                print(f"✅ Upserted data into SQLite lead store: {self.sqlite_path}")
+            except Exception as e:
+                print(f"❌ Error writing to SQLite lead store: {e}")
+
+        if "airtable" in self.enabled_formats or "google_sheets" in self.enabled_formats:
+            export_to_services(rows, self.export_settings, self.enabled_formats)
+
+        self.exported_count += len(rows)
+
+    def _write_csv(self, rows):
+        if self._csv_writer is None:
+            fieldnames = list(rows[0].keys())
+            has_header = os.path.exists(self.csv_path) and os.path.getsize(self.csv_path) > 0
+            if has_header:
+                # Appending to an earlier run's file: keep its column order
+                with open(self.csv_path, "r", newline="", encoding="utf-8") as existing_file:
+                    fieldnames = next(csv.reader(existing_file), fieldnames)
+            self._csv_file = open(self.csv_path, "a", newline="", encoding="utf-8")
+            self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=fieldnames, extrasaction="ignore")
+            if not has_header:
+                self._csv_writer.writeheader()
+        self._csv_writer.writerows(rows)
+        self._csv_file.flush()
+
+
+def export_to_services(new_profiles_data_list, export_settings, enabled_formats):
+    """
+    Sends a batch of profiles to Airtable and/or Google Sheets (both commented out by default).
+
+    Args:
+        new_profiles_data_list (list): Profile dictionaries to send.
+        export_settings (dict): config['export_settings'].
+        enabled_formats (list): The enabled export formats.
+    """
+    df_to_export = pd.DataFrame(new_profiles_data_list)
 
     # --- Airtable Export ---
     # This section is commented out by default.
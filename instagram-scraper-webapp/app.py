@@ -1,7 +1,10 @@
 import os
+import sys
+import csv
+import io
 from datetime import datetime
 
-from flask import Flask, render_template, redirect, url_for, flash, request, send_file
+from flask import Flask, render_template, redirect, url_for, flash, request, send_file, jsonify, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -19,11 +22,23 @@ from redis import Redis
 redis_connection = Redis(host='localhost', port=6379, db=0)
 q = Queue(connection=redis_connection) # Default queue
 
+# The scraper package lives in the project root, one level up from the webapp.
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_DIR)
+
+# Live job progress written by the worker (RedisStreamReporter): a summary hash of counters
+# and a capped stream of the most recent events, under the keys the reporter itself uses.
+from scrapers.progress import events_stream_key, progress_hash_key
+RECENT_EVENTS_SHOWN = 20
+
 # --- Flask App Configuration ---
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_strong_random_secret_key_here' # IMPORTANT: Change this to a strong, random key!
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///site.db')
 db = SQLAlchemy(app)
+
+JOBS_PER_PAGE = 20 # Rows in the dashboard's job table
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
@@ -64,14 +79,64 @@ class ScrapeJob(db.Model):
     results_file_path = db.Column(db.String(255), nullable=True)
     profiles = db.relationship('ScrapedProfile', backref='job', lazy=True)
 
+    # The dashboard lists a user's jobs newest first; this index serves that query without a sort
+    __table_args__ = (db.Index('ix_scrape_job_user_submitted', 'user_id', 'submitted_time'),)
+
 class ScrapedProfile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey('scrape_job.id'), nullable=False)
-    username = db.Column(db.String(255), nullable=False)
+    username = db.Column(db.String(255), nullable=False, index=True) # Lookups of a lead across jobs
     full_name = db.Column(db.String(255), nullable=True)
     whatsapp_number = db.Column(db.String(50), nullable=True)
     type = db.Column(db.String(50), nullable=True)
 
+    # A lead is stored once per job, however many times the worker inserts it.
+    # The index also serves every per-job lookup and count (job_id is its leading column).
+    __table_args__ = (db.UniqueConstraint('job_id', 'username', name='uq_scraped_profile_job_username'),)
+
+
+def ensure_database_indexes():
+    """
+    Adds the indexes declared on the models to a site.db created before they existed
+    (db.create_all does not alter existing tables). Non-destructive: if older jobs stored the
+    same lead twice, the (job_id, username) unique index cannot be built until
+    `flask dedupe-leads` has removed the duplicates.
+
+    The indexes are created through SQLAlchemy (checkfirst), so this works on every dialect the
+    lead ingest supports; MySQL/MariaDB have no CREATE INDEX IF NOT EXISTS.
+    """
+    with db.engine.begin() as connection:
+        for index in (*ScrapedProfile.__table__.indexes, *ScrapeJob.__table__.indexes):
+            index.create(connection, checkfirst=True)
+
+        # The (job_id, username) uniqueness is a table constraint on new databases; only add it
+        # as an index when neither a constraint nor a unique index covers those columns yet.
+        inspector = db.inspect(connection)
+        unique_columns = {tuple(constraint['column_names']) for constraint in inspector.get_unique_constraints('scraped_profile')}
+        unique_columns |= {tuple(index['column_names']) for index in inspector.get_indexes('scraped_profile') if index['unique']}
+        if ('job_id', 'username') not in unique_columns:
+            # Built on a copy of the table, so the model's metadata (and db.create_all) stay unchanged
+            profile_table = ScrapedProfile.__table__.to_metadata(db.MetaData())
+            db.Index('uq_scraped_profile_job_username', profile_table.c.job_id, profile_table.c.username,
+                     unique=True).create(connection)
+
+
+def remove_duplicate_leads():
+    """
+    One-off migration for databases from before leads were unique per job: deletes repeated
+    (job_id, username) rows, keeping the earliest copy. Destructive, so it only runs from the
+    `flask dedupe-leads` command, never from the web app or a worker.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    with db.engine.begin() as connection:
+        result = connection.execute(db.text(
+            "DELETE FROM scraped_profile WHERE id NOT IN "
+            "(SELECT MIN(id) FROM scraped_profile GROUP BY job_id, username)"
+        ))
+    return result.rowcount
+
 # --- WTForms for Dashboard Settings ---
 class UserSettingsForm(FlaskForm):
     seed_usernames = StringField('Seed Usernames (comma-separated)')
@@ -94,9 +159,23 @@ def initdb_command():
     """Initializes the database."""
     with app.app_context():
         db.create_all()
+        try:
+            ensure_database_indexes()
+        except Exception as e:
+            print(f'Could not add the lead indexes ({e}). Run "flask dedupe-leads" to remove duplicate leads first.')
+            return
         print('Initialized the database.')
 
 
+@app.cli.command('dedupe-leads')
+def dedupe_leads_command():
+    """Removes duplicate leads left by older jobs, then adds the lead indexes."""
+    with app.app_context():
+        deleted_count = remove_duplicate_leads()
+        ensure_database_indexes()
+        print(f'Removed {deleted_count} duplicate lead(s) and added the lead indexes.')
+
+
 # --- Routes ---
 
 @app.route("/register", methods=['GET', 'POST'])
@@ -155,7 +234,12 @@ def logout():
 def dashboard():
     form = UserSettingsForm()
     user_settings = current_user.settings
-    user_jobs = ScrapeJob.query.filter_by(user_id=current_user.id).order_by(ScrapeJob.submitted_time.desc()).all()
+    # One page of jobs at a time (?page=N); ix_scrape_job_user_submitted serves the filter and the order
+    page = request.args.get('page', 1, type=int)
+    jobs_page = ScrapeJob.query.filter_by(user_id=current_user.id).order_by(ScrapeJob.submitted_time.desc()).paginate(
+        page=page, per_page=JOBS_PER_PAGE, error_out=False
+    )
+    user_jobs = jobs_page.items
 
     # --- NEW DEBUG PRINT STATEMENT BLOCK (CRITICAL FOR DIAGNOSIS) ---
     if request.method == 'POST':
@@ -250,7 +334,50 @@ def dashboard():
     # so no need to explicitly set them here again for POST requests.
 
 
-    return render_template('dashboard.html', form=form, user_jobs=user_jobs)
+    # Counters for jobs that are still going (one HGETALL per job, never the whole event stream)
+    job_progress = {}
+    for job in user_jobs:
+        if job.status in ['pending', 'running']:
+            job_progress[job.id] = read_job_progress(job.id)
+
+    # Lead counts for the jobs on this page in one GROUP BY, instead of loading each job's profiles
+    lead_counts = dict(
+        db.session.query(ScrapedProfile.job_id, db.func.count(ScrapedProfile.id))
+        .filter(ScrapedProfile.job_id.in_([job.id for job in user_jobs]))
+        .group_by(ScrapedProfile.job_id)
+        .all()
+    ) if user_jobs else {}
+
+    return render_template('dashboard.html', form=form, user_jobs=user_jobs, jobs_page=jobs_page,
+                           lead_counts=lead_counts, job_progress=job_progress)
+
+
+def read_job_progress(job_id):
+    """Returns the job's progress counters from Redis as a dict of strings (empty if none yet)."""
+    try:
+        summary = redis_connection.hgetall(progress_hash_key(job_id))
+    except Exception as e:
+        print(f"DEBUG: Could not read progress for job {job_id}: {e}")
+        return {}
+    return {key.decode(): value.decode() for key, value in summary.items()}
+
+
+@app.route("/job_progress/<int:job_id>")
+@login_required
+def job_progress(job_id):
+    job = ScrapeJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        return jsonify({"error": "not authorized"}), 403
+
+    try:
+        recent = redis_connection.xrevrange(events_stream_key(job_id), count=RECENT_EVENTS_SHOWN)
+    except Exception:
+        recent = []
+    events = [
+        {key.decode(): value.decode() for key, value in fields.items()}
+        for _, fields in reversed(recent)
+    ]
+    return jsonify({"job_id": job.id, "status": job.status, "progress": read_job_progress(job_id), "events": events})
 
 @app.route("/download_results/<int:job_id>")
 @login_required
@@ -262,13 +389,42 @@ def download_results(job_id):
 
     if job.status in ['completed', 'terminated'] and job.results_file_path and os.path.exists(job.results_file_path):
         _, file_extension = os.path.splitext(job.results_file_path)
-        mimetype = 'application/json' if file_extension.lower() == '.json' else 'application/octet-stream'
-        
+        mimetype = {'.json': 'application/json', '.zip': 'application/zip'}.get(file_extension.lower(), 'application/octet-stream')
+
         return send_file(job.results_file_path, as_attachment=True, mimetype=mimetype, download_name=os.path.basename(job.results_file_path))
     else:
         flash("Results not available or job not completed/terminated with a file.", "warning")
         return redirect(url_for('dashboard'))
 
+@app.route("/download_partial/<int:job_id>")
+@login_required
+def download_partial_results(job_id):
+    """Streams the leads stored so far for a job as CSV, so results can be downloaded mid-job."""
+    job = ScrapeJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        flash("You are not authorized to download these results.", "danger")
+        return redirect(url_for('dashboard'))
+
+    def generate_rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['Username', 'Full Name', 'WhatsApp Number', 'Type'])
+        # yield_per keeps only one batch of rows in memory, however large the job
+        profiles = ScrapedProfile.query.filter_by(job_id=job.id).order_by(ScrapedProfile.id).yield_per(500)
+        for row_number, profile in enumerate(profiles, start=1):
+            writer.writerow([profile.username, profile.full_name, profile.whatsapp_number, profile.type])
+            if row_number % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate_rows()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename=instagram_leads_job_{job.id}_partial.csv'}
+    )
+
 @app.route("/")
 def home():
     if current_user.is_authenticated:
@@ -0,0 +1,85 @@
+"""
+Seeds a throwaway SQLite database with many jobs and leads, then times the dashboard.
+
+Usage (from instagram-scraper-webapp/):
+    python bench_dashboard.py [jobs] [leads_per_job] [requests]
+
+Defaults to 500 jobs x 400 leads (200,000 ScrapedProfile rows) and 20 dashboard requests.
+Redis does not need to be running: the seeded jobs are all finished, so the dashboard
+never reads live progress.
+"""
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime, timedelta
+
+
+def run_benchmark(job_count=500, leads_per_job=400, request_count=20):
+    """
+    Builds the database, logs a test client in as the seeded user and requests the dashboard.
+
+    Returns:
+        dict: seed time, plus mean/max dashboard response time in milliseconds.
+    """
+    db_dir = tempfile.mkdtemp(prefix="dashboard_bench_")
+    # app.py reads DATABASE_URL at import time, so it must be set before the import
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    from app import app, db, User, ScrapeJob, ScrapedProfile, ensure_database_indexes
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    seed_started = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        ensure_database_indexes()
+
+        user = User(username="bench", email="bench@example.com")
+        user.set_password("bench")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        # Bulk-insert through the Core table objects; the ORM would dominate the seed time
+        now = datetime.utcnow()
+        with db.engine.begin() as connection:
+            connection.execute(ScrapeJob.__table__.insert(), [
+                {"user_id": user_id, "status": "completed", "submitted_time": now - timedelta(minutes=job_number),
+                 "start_time": now, "end_time": now}
+                for job_number in range(job_count)
+            ])
+            job_ids = [row[0] for row in connection.execute(db.text("SELECT id FROM scrape_job"))]
+            for job_id in job_ids:
+                connection.execute(ScrapedProfile.__table__.insert(), [
+                    {"job_id": job_id, "username": f"lead_{job_id}_{lead_number}", "full_name": "Bench Lead",
+                     "whatsapp_number": "No number", "type": "Retailer"}
+                    for lead_number in range(leads_per_job)
+                ])
+    seed_seconds = time.perf_counter() - seed_started
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id) # Flask-Login's session key
+        session["_fresh"] = True
+
+    timings = []
+    for request_number in range(request_count):
+        started = time.perf_counter()
+        response = client.get(f"/dashboard?page={request_number % 5 + 1}")
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"Dashboard returned HTTP {response.status_code}")
+
+    return {
+        "jobs": job_count,
+        "leads": job_count * leads_per_job,
+        "seed_seconds": round(seed_seconds, 1),
+        "dashboard_mean_ms": round(sum(timings) / len(timings), 1),
+        "dashboard_max_ms": round(max(timings), 1),
+    }
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:4]]
+    result = run_benchmark(*args)
+    print(f"Seeded {result['jobs']} jobs / {result['leads']} leads in {result['seed_seconds']}s")
+    print(f"Dashboard: {result['dashboard_mean_ms']} ms mean, {result['dashboard_max_ms']} ms max")
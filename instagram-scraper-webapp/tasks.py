@@ -1,12 +1,18 @@
 import os
-import subprocess
+import sys
+import copy
 from datetime import datetime
-import json
 import time
+import threading
+import zipfile
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 
 # Assuming these are correctly imported from your Flask app's __init__.py or app.py
 from app import app, db
-from app import ScrapeJob, ScrapedProfile, UserSettings # Assuming these are your SQLAlchemy models
+from app import ScrapeJob, ScrapedProfile # Assuming these are your SQLAlchemy models
 
 # --- RQ Queue setup (usually done in app.py or a config, but kept here for context if needed elsewhere) ---
 # from redis import Redis
@@ -15,11 +21,189 @@ from app import ScrapeJob, ScrapedProfile, UserSettings # Assuming these are you
 # default_queue = Queue('default', connection=redis_connection)
 # --- End RQ Queue setup ---
 
+# The scraper lives in the project root, one level up from the webapp.
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_crawler():
+    """
+    Imports the scraper's crawl API into this (worker) process. The scraper modules read
+    config.yaml and write to data/ relative to the working directory, so the worker runs
+    from the project root. Imports are cached, so only the first job pays for them.
+
+    Returns:
+        tuple: (crawler module, base config dict loaded from config.yaml)
+    """
+    import yaml
+    from dotenv import load_dotenv
+
+    if os.getcwd() != PROJECT_ROOT_DIR:
+        os.chdir(PROJECT_ROOT_DIR)
+    if PROJECT_ROOT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT_DIR)
+    load_dotenv(os.path.join(PROJECT_ROOT_DIR, ".env")) # Instagram credentials
+
+    import crawler
+    with open(os.path.join(PROJECT_ROOT_DIR, "config.yaml"), "r") as config_file:
+        base_config = yaml.safe_load(config_file)
+    return crawler, base_config
+
+
+class ProfileIngestSink:
+    """
+    Crawl sink that stores leads in the ScrapedProfile table while the job runs, so the
+    dashboard can show and download partial results. Works the same for every export format,
+    since it receives the profiles themselves rather than reading the export file back.
+
+    Rows are buffered and written with one multi-row insert per batch (batch_size rows, or every
+    flush_interval seconds), de-duplicated on (job_id, username): INSERT ... ON CONFLICT DO NOTHING
+    on SQLite and PostgreSQL, INSERT IGNORE on MySQL/MariaDB, and on any other DATABASE_URL a
+    lookup of the batch's usernames already stored for the job before a plain INSERT.
+    A timer thread enforces flush_interval, so partial results reach the dashboard even while
+    the crawl finds nothing new. It uses the engine directly, so it is safe to call from the
+    crawl's export writer thread.
+    """
+
+    def __init__(self, job_id, batch_size=50, flush_interval=10.0):
+        self.job_id = job_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.engine = db.engine # Resolved here, inside the app context; usable from any thread
+        self.inserted_count = 0
+        self._pending = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flush_timer = threading.Thread(target=self._flush_periodically, name=f"ingest-flush-{job_id}", daemon=True)
+        self._flush_timer.start()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._pending and time.time() - self._last_flush >= self.flush_interval:
+                    self._flush()
+
+    def write(self, profile_data):
+        with self._lock:
+            self._pending.append({
+                "job_id": self.job_id,
+                "username": profile_data.get("Username"),
+                "full_name": profile_data.get("Full Name"),
+                "whatsapp_number": profile_data.get("WhatsApp Number"),
+                "type": profile_data.get("Classification"),
+            })
+            if len(self._pending) >= self.batch_size or time.time() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        # Caller holds self._lock
+        rows, self._pending = self._pending, []
+        self._last_flush = time.time()
+        if not rows:
+            return
+        try:
+            with self.engine.begin() as connection:
+                self.inserted_count += self._insert_new_rows(connection, rows)
+        except Exception as e:
+            print(f"[{datetime.now()}] Error loading {len(rows)} profiles into DB for job {self.job_id}: {e}")
+
+    def _insert_new_rows(self, connection, rows):
+        """Inserts the rows, skipping (job_id, username) pairs already stored. Returns the number inserted."""
+        table = ScrapedProfile.__table__
+        dialect = self.engine.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            statement = insert(table).values(rows).on_conflict_do_nothing(index_elements=["job_id", "username"])
+        elif dialect in ("mysql", "mariadb"):
+            statement = table.insert().values(rows).prefix_with("IGNORE")
+        else:
+            # Portable fallback: leave out usernames this job already stored (and repeats within the batch)
+            stored_usernames = set(connection.execute(
+                select(table.c.username).where(
+                    table.c.job_id == self.job_id,
+                    table.c.username.in_([row["username"] for row in rows])
+                )
+            ).scalars())
+            new_rows = []
+            for row in rows:
+                if row["username"] not in stored_usernames:
+                    stored_usernames.add(row["username"])
+                    new_rows.append(row)
+            if not new_rows:
+                return 0
+            connection.execute(table.insert(), new_rows)
+            return len(new_rows)
+        return connection.execute(statement).rowcount
+
+    def close(self):
+        self._closed.set()
+        self._flush_timer.join()
+        with self._lock:
+            self._flush()
+        print(f"[{datetime.now()}] Loaded {self.inserted_count} profiles into DB from job {self.job_id}.")
+
+
+def build_job_config(base_config, user_settings_dict, job_id, output_filename):
+    """
+    Returns a per-job copy of config.yaml with the user's dashboard settings applied.
+    Each job gets its own crawl frontier, so a terminated job can be resumed by re-running it.
+    """
+    job_config = copy.deepcopy(base_config)
+    settings = job_config.setdefault("settings", {})
+
+    seed_usernames = [name.strip().lstrip("@") for name in (user_settings_dict.get("seed_usernames") or "").split(",") if name.strip()]
+    if seed_usernames:
+        job_config["seed_usernames"] = seed_usernames
+    keywords = [keyword.strip() for keyword in (user_settings_dict.get("keywords") or "").split(",") if keyword.strip()]
+    if keywords:
+        job_config["keywords"] = keywords
+
+    settings["recursion_depth"] = user_settings_dict["recursion_depth"]
+    settings["visible_browser"] = bool(user_settings_dict.get("visible_browser"))
+    settings["frontier_db_path"] = os.path.join("data", f"crawl_frontier_job_{job_id}.db")
+
+    export_settings = job_config.setdefault("export_settings", {})
+    export_format = user_settings_dict["export_format"]
+    export_settings["enabled_formats"] = [{"xlsx": "excel"}.get(export_format, export_format)]
+    export_settings["csv_filename"] = output_filename
+    export_settings["excel_filename"] = output_filename
+    export_settings["run_id"] = f"job_{job_id}" # Parquet partition for this job's leads
+    return job_config
+
+
+def job_results_path(scraper_output_file, export_format):
+    """
+    Returns the one file to record as the job's results.
+
+    An Excel job can leave several workbooks: the exporter rolls over to a new numbered workbook
+    by size and age, and re-running a terminated job starts the next number rather than touching
+    the earlier file. All of them are bundled into <output>_workbooks.zip, rebuilt after every run,
+    so the download always holds every workbook the job has written.
+    """
+    if export_format != 'xlsx':
+        return scraper_output_file
+    from exporter import numbered_workbook_paths # Project root is on sys.path once load_crawler has run
+
+    workbook_paths = numbered_workbook_paths(scraper_output_file)
+    if not workbook_paths:
+        return scraper_output_file
+    if len(workbook_paths) == 1:
+        return workbook_paths[0]
+    bundle_path = f"{os.path.splitext(scraper_output_file)[0]}_workbooks.zip"
+    temp_path = f"{bundle_path}.tmp"
+    with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for workbook_path in workbook_paths:
+            bundle.write(workbook_path, arcname=os.path.basename(workbook_path))
+    os.replace(temp_path, bundle_path) # A download in progress keeps reading the previous bundle
+    print(f"[{datetime.now()}] Bundled {len(workbook_paths)} Excel workbook(s) into {bundle_path}")
+    return bundle_path
+
 
 def run_instagram_scraper(user_id, job_id, user_settings_dict):
     """
-    Executes the Instagram scraper as a subprocess for a given job.
-    Updates job status in the database.
+    Runs the Instagram crawl in-process for a given job (crawler.run_crawl), borrowing a warm
+    browser from the worker's pool when there is one. Updates job status in the database and
+    stores the scraped profiles.
     """
     with app.app_context(): # Ensure database operations happen within Flask app context
         job = ScrapeJob.query.get(job_id)
@@ -39,119 +223,92 @@ def run_instagram_scraper(user_id, job_id, user_settings_dict):
 
         print(f"[{datetime.now()}] User Settings for job {job_id}: {user_settings_dict}")
 
-        # --- PATH CONSTRUCTION (CRITICAL FIX) ---
-        # Get the directory where tasks.py is located (.../instagram-scraper-webapp)
-        current_tasks_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # Go up one level to the project root directory (.../latam-instagram-whatsapp-scraper-1)
-        project_root_dir = os.path.dirname(current_tasks_dir)
-        
-        # Construct the full path to main.py, which is in the project root
-        scraper_script_path = os.path.join(project_root_dir, 'main.py')
-
         # Define the directory where scraper output data should be stored
         # Assuming a 'data' folder directly in the project root
-        data_output_dir = os.path.join(project_root_dir, 'data')
+        data_output_dir = os.path.join(PROJECT_ROOT_DIR, 'data')
         os.makedirs(data_output_dir, exist_ok=True) # Ensure 'data' directory exists
 
         # Define the specific output filename for this job
         output_filename = f"instagram_leads_job_{job_id}.{user_settings_dict['export_format']}"
         scraper_output_file = os.path.join(data_output_dir, output_filename)
-        # --- END PATH CONSTRUCTION ---
-
-        # Prepare arguments for the scraper subprocess
-        # Use 'python3' for WSL compatibility
-        scraper_args = [
-            'python3',
-            scraper_script_path,
-            '--seed_usernames', user_settings_dict['seed_usernames'],
-            '--keywords', user_settings_dict['keywords'],
-            '--scrape_limit', str(user_settings_dict['scrape_limit']),
-            '--recursion_depth', str(user_settings_dict['recursion_depth']),
-            '--export_format', user_settings_dict['export_format'],
-            '--output_file', scraper_output_file, # Pass the full output path to the scraper
-        ]
-
-        # Add --visible_browser flag if enabled
-        if user_settings_dict.get('visible_browser'): # Use .get() for safety
-            scraper_args.append('--visible_browser')
-
-        # Calculate subprocess timeout based on user setting
+
+        # The job stops starting new profiles at this deadline (replaces the old subprocess timeout)
         scrape_timeout_seconds = user_settings_dict['scrape_duration_hours'] * 3600
-        print(f"[{datetime.now()}] Scraper will be terminated after {scrape_timeout_seconds} seconds ({user_settings_dict['scrape_duration_hours']:.2f} hours).")
+        print(f"[{datetime.now()}] Scraper will stop after {scrape_timeout_seconds} seconds ({user_settings_dict['scrape_duration_hours']:.2f} hours).")
 
-        process = None # Initialize process variable
+        browser_pool = None
+        drivers = []
+        ingest_sink = None
+        crawl_started = False # From then on run_crawl closes the sinks, whatever happens
         try:
-            # Run the scraper as a subprocess
-            print(f"[{datetime.now()}] Running scraper subprocess: {' '.join(scraper_args)}")
-            process = subprocess.run(
-                scraper_args,
-                capture_output=True, # Capture stdout and stderr
-                text=True,           # Decode output as text
-                check=False,         # Do not raise CalledProcessError for non-zero exit codes immediately
-                timeout=scrape_timeout_seconds # Set timeout for the subprocess
+            # Run the crawl in this process instead of shelling out to main.py
+            crawler, base_config = load_crawler()
+            job_config = build_job_config(base_config, user_settings_dict, job_id, output_filename)
+
+            # Leads go into the DB in batches as they are found, whatever the export format
+            ingest_sink = ProfileIngestSink(job_id)
+            sinks = [ingest_sink]
+            if user_settings_dict['export_format'] == 'json':
+                sinks.append(crawler.JsonFileSink(scraper_output_file))
+            else:
+                sinks.append(crawler.ExportSink(job_config))
+
+            # Live progress (visited / accepted / exported / errors / depth) goes to a capped Redis
+            # stream that the dashboard reads; the worker's stdout is no longer the only record.
+            from app import redis_connection
+            from scrapers.progress import RedisStreamReporter
+            progress_reporter = RedisStreamReporter(redis_connection, job_id)
+
+            # Borrow the worker's warm, logged-in browsers if it keeps a pool (WARM_BROWSER_POOL_SIZE);
+            # with more than one, the job crawls in pool mode
+            from browser import get_shared_browser_pool
+            browser_pool = get_shared_browser_pool()
+            if browser_pool is not None:
+                drivers = browser_pool.acquire_many(max(1, job_config["settings"].get("browser_pool_size", 1)))
+                print(f"[{datetime.now()}] Job {job_id} borrowed {len(drivers)} warm browser session(s).")
+
+            crawl_started = True
+            result = crawler.run_crawl(
+                job_config,
+                driver=drivers or None,
+                sinks=sinks,
+                deadline=time.time() + scrape_timeout_seconds,
+                max_profiles=user_settings_dict['scrape_limit'],
+                progress_reporter=progress_reporter,
             )
+            print(f"[{datetime.now()}] Crawl result for job {job_id}: {result}")
 
-            # Check subprocess return code
-            if process.returncode != 0:
-                print(f"[{datetime.now()}] [SCRAPER ERROR] Scraper exited with code {process.returncode}")
-                print(f"[{datetime.now()}] [SCRAPER STDOUT]\n{process.stdout}")
-                print(f"[{datetime.now()}] [SCRAPER STDERR]\n{process.stderr}")
+            if result['status'] == 'login_failed':
                 job.status = 'failed'
+            elif result['status'] == 'deadline':
+                print(f"[{datetime.now()}] Scraper for job {job_id} reached its deadline after {scrape_timeout_seconds} seconds.")
+                job.status = 'terminated'
             else:
-                print(f"[{datetime.now()}] Scraper process for job {job_id} completed naturally.")
-                if process.stdout:
-                    print(f"[{datetime.now()}] [SCRAPER STDOUT]\n{process.stdout}")
-                if process.stderr: # Scrapers sometimes print info/warnings to stderr
-                    print(f"[{datetime.now()}] [SCRAPER STDERR]\n{process.stderr}")
                 job.status = 'completed'
-
-            # Handle cases where the process might have been killed (e.g., by system or external timeout)
-            # Common negative return codes for being killed by signal
-            if process.returncode in [-9, -15]:
-                print(f"[{datetime.now()}] Scraper process for job {job_id} was terminated (possibly by timeout or external signal).")
-                job.status = 'terminated'
-
-        except subprocess.TimeoutExpired:
-            print(f"[{datetime.now()}] Scraper process for job {job_id} timed out after {scrape_timeout_seconds} seconds.")
-            job.status = 'terminated'
-            if process and process.poll() is None: # If process is still running after timeout, terminate it
-                process.terminate()
-                # process.wait() # Wait for it to actually terminate if needed
         except Exception as e:
             print(f"[{datetime.now()}] An unexpected error occurred during scraper execution: {e}")
             job.status = 'failed'
+        finally:
+            for driver in drivers:
+                browser_pool.release(driver)
+            if ingest_sink is not None and not crawl_started:
+                ingest_sink.close() # Stops its flush timer; run_crawl never got to close it
 
         job.end_time = datetime.utcnow() # Record end time regardless of outcome
 
+        # Leads were already stored during the run by ProfileIngestSink (flushed when the crawl closed its sinks)
         # --- Handle results file ---
+        if job.status in ['completed', 'terminated']:
+            try:
+                scraper_output_file = job_results_path(scraper_output_file, user_settings_dict['export_format'])
+            except Exception as e:
+                print(f"[{datetime.now()}] Error bundling the Excel workbooks of job {job_id}: {e}")
         if job.status in ['completed', 'terminated'] and os.path.exists(scraper_output_file):
             job.results_file_path = scraper_output_file
             print(f"[{datetime.now()}] Scraper results file found and path stored: {scraper_output_file}")
-            
-            # Optional: Load profiles into DB if export_format is JSON and structure matches
-            if user_settings_dict['export_format'] == 'json':
-                try:
-                    with open(scraper_output_file, 'r', encoding='utf-8') as f:
-                        scraped_data = json.load(f)
-                        for profile_data in scraped_data:
-                            # Assuming profile_data has keys like 'username', 'full_name', 'whatsapp_number', 'type'
-                            profile = ScrapedProfile(
-                                job=job,
-                                username=profile_data.get('username'),
-                                full_name=profile_data.get('full_name'),
-                                whatsapp_number=profile_data.get('whatsapp_number'),
-                                type=profile_data.get('type')
-                            )
-                            db.session.add(profile)
-                        db.session.commit()
-                        print(f"[{datetime.now()}] Loaded {len(scraped_data)} profiles into DB from job {job_id}.")
-                except json.JSONDecodeError as e:
-                    print(f"[{datetime.now()}] Error decoding JSON from scraper output for job {job_id}: {e}")
-                    db.session.rollback()
-                except Exception as e:
-                    print(f"[{datetime.now()}] Error loading profiles from JSON to DB for job {job_id}: {e}")
-                    db.session.rollback()
+
+        elif job.status in ['completed', 'terminated'] and ingest_sink is not None and not ingest_sink.inserted_count:
+            print(f"[{datetime.now()}] Job {job_id} finished without finding any relevant profiles; no results file was written.")
         elif job.status in ['completed', 'terminated'] and not os.path.exists(scraper_output_file):
             print(f"[{datetime.now()}] Warning: Scraper status is {job.status} but output file not found at {scraper_output_file}")
             # If status says completed/terminated but no file, it's likely a silent failure
@@ -1,14 +1,61 @@
+import os
 import sys
-from rq import Worker, Queue
+from rq import Queue
 from redis import Redis
-from app import app, db # Assuming app and db are correctly imported from your Flask app
+from app import app # Assuming app is correctly imported from your Flask app
 from rq.worker import SimpleWorker # Import SimpleWorker
 
 # Set up Redis connection
 redis_connection = Redis(host='localhost', port=6379, db=0)
 
+# Number of pre-launched, logged-in Chrome sessions this worker keeps warm for its jobs (0 = none).
+# SimpleWorker runs one job at a time and a job crawls with settings.browser_pool_size sessions,
+# so the pool is capped at that size; more sessions would only sit idle holding a login.
+WARM_BROWSER_POOL_SIZE = int(os.getenv("WARM_BROWSER_POOL_SIZE", "0"))
+
+# The scraper lives in the project root, one level up from the webapp.
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_warm_browser_pool(pool_size):
+    """
+    Launches the warm browser pool inside this worker process and installs it as the
+    process-wide pool, so jobs (which SimpleWorker runs in this same process) borrow a
+    logged-in browser instead of cold-starting Chrome and logging in.
+
+    Importing the scraper modules here also means selenium/pandas are imported once per
+    worker, not once per job.
+    """
+    import yaml
+    from dotenv import load_dotenv
+
+    # The scraper modules read config.yaml from the working directory.
+    os.chdir(PROJECT_ROOT_DIR)
+    sys.path.insert(0, PROJECT_ROOT_DIR)
+    load_dotenv(os.path.join(PROJECT_ROOT_DIR, ".env"))
+
+    from browser import BrowserPool, install_shared_browser_pool
+
+    with open("config.yaml", "r") as config_file:
+        config = yaml.safe_load(config_file)
+
+    sessions_per_job = max(1, config["settings"].get("browser_pool_size", 1))
+    if pool_size > sessions_per_job:
+        print(f"⚠️ WARM_BROWSER_POOL_SIZE={pool_size} is more than a job uses (browser_pool_size: {sessions_per_job}). "
+              f"Keeping {sessions_per_job} warm session(s).")
+        pool_size = sessions_per_job
+
+    pool = BrowserPool(config, pool_size, os.getenv("INSTAGRAM_USERNAME"), os.getenv("INSTAGRAM_PASSWORD"))
+    if not pool.start():
+        print("⚠️ Warm browser pool could not be started. Jobs will launch their own browser.")
+        return None
+    install_shared_browser_pool(pool)
+    return pool
+
+
 if __name__ == '__main__':
     # Explicitly use SimpleWorker for compatibility on Windows
+    # (it also runs jobs in this process, which is what lets them share the warm browser pool)
     worker_class_to_use = SimpleWorker
 
     # Create queues
@@ -18,8 +65,14 @@ if __name__ == '__main__':
     # This might allow it to start and run the job, but timeouts might not work as expected
     worker = worker_class_to_use(queues, connection=redis_connection)
 
+    browser_pool = start_warm_browser_pool(WARM_BROWSER_POOL_SIZE) if WARM_BROWSER_POOL_SIZE > 0 else None
+
     # To ensure tasks run within the Flask application context,
     # which is necessary for DB operations, current_user, etc.
-    with app.app_context():
-        print("Starting RQ worker, listening on queues: default (with Flask app context)...")
-        worker.work()
\ No newline at end of file
+    try:
+        with app.app_context():
+            print("Starting RQ worker, listening on queues: default (with Flask app context)...")
+            worker.work()
+    finally:
+        if browser_pool is not None:
+            browser_pool.close()
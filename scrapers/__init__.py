@@ -0,0 +1,3 @@
+# Scraper modules. Everything imports them package-qualified (from scrapers.x import ...),
+# with the project root on sys.path, so each module (and its shared singletons such as
+# the rate governor and the progress reporter) is loaded exactly once.
@@ -0,0 +1,232 @@
+import asyncio
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+import aiohttp
+
+from scrapers.fetch_backends import INSTAGRAM_WEB_APP_ID, PROFILE_INFO_PATH, profile_data_from_json
+from scrapers.rate_governor import governor, RateGovernor
+
+# Statuses worth another attempt after a back-off pause
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def prefetch_budget(per_minute, burst):
+    """
+    Rate budget for the prefetcher, separate from the browser's governor: a bucket of `per_minute`
+    fetches with room for `burst` back-to-back, and no per-request jitter (per-host pacing adds it).
+    """
+    return RateGovernor({"navigate": (0, 0), "fetch": (0, 0)}, actions_per_minute=per_minute, burst=burst, hourly_caps={})
+
+
+class AsyncProfileFetcher:
+    """
+    asyncio engine that fetches many profile JSONs at once for the light-filter stage.
+
+    - Keep-alive connection pooling: one aiohttp session (and connector) for the fetcher's lifetime.
+      The synchronous entry point (prefetch_profiles) runs every batch on one long-lived event loop
+      in a background thread, so connections stay open between batches.
+    - Global concurrency limit: at most `concurrency` requests in flight.
+    - Per-host pacing: request starts to the same host are spaced `per_host_interval` seconds apart
+      (with jitter), across batches.
+    - Budget: with a `budget` (see prefetch_budget), every request also takes one of its tokens.
+      It is the prefetcher's own allowance; sharing the browser governor's 20 actions a minute
+      would leave concurrency nothing to do. Throttling responses are still reported to the shared
+      governor, since Instagram's pushback applies to the whole account.
+    - Retries: network errors and RETRY_STATUSES are retried with exponential back-off.
+
+    Results are the same profile_data dicts the browser scraper produces (see profile_data_from_json),
+    so they flow through classify_profile and the exporter unchanged.
+    """
+
+    def __init__(self, base_url="https://i.instagram.com", cookies=None, user_agent=None, concurrency=8,
+                 per_host_interval=0.5, max_retries=3, backoff_base_seconds=1.0, timeout=10, budget=None):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.per_host_interval = per_host_interval
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.timeout = timeout
+        self.budget = budget
+        self.requests_sent = 0
+
+        # Created on the loop that first uses them, and reused by every later batch
+        self._session = None
+        self._semaphore = None
+        self._host_state = {} # {host: (lock, next_slot)}
+        self._loop = None # Background loop used by prefetch_profiles
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+
+        self.headers = {"X-IG-App-ID": INSTAGRAM_WEB_APP_ID, "Accept": "application/json"}
+        if user_agent:
+            self.headers["User-Agent"] = user_agent
+        self.cookies = {}
+        for cookie in cookies or []:
+            self.cookies[cookie["name"]] = cookie["value"]
+            if cookie["name"] == "csrftoken":
+                self.headers["X-CSRFToken"] = cookie["value"]
+
+    async def _pace_host(self, host, host_state):
+        """Waits for this host's next free request slot. host_state is {host: (lock, next_slot)}."""
+        lock, _ = host_state.setdefault(host, (asyncio.Lock(), 0.0))
+        async with lock:
+            loop = asyncio.get_running_loop()
+            wait_seconds = host_state[host][1] - loop.time()
+            if wait_seconds > 0:
+                await asyncio.sleep(wait_seconds)
+            host_state[host] = (lock, loop.time() + self.per_host_interval * random.uniform(0.8, 1.2))
+
+    async def _fetch_one(self, session, semaphore, host_state, username):
+        """
+        Returns (username, profile_data), (username, None) if the profile does not exist,
+        or (username, False) if it could not be fetched after all retries.
+        """
+        url = f"{self.base_url}{PROFILE_INFO_PATH}"
+        host = urlparse(url).netloc
+        loop = asyncio.get_running_loop()
+
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(self.backoff_base_seconds * (2 ** (attempt - 1)) * random.uniform(0.8, 1.2))
+                if self.budget is not None:
+                    # The budget blocks, so run it on a worker thread instead of stalling the event loop.
+                    await loop.run_in_executor(None, self.budget.pace, "fetch")
+                await self._pace_host(host, host_state)
+
+                self.requests_sent += 1
+                try:
+                    async with session.get(url, params={"username": username}, allow_redirects=False) as response:
+                        if response.status == 404:
+                            return username, None
+                        if response.status == 200:
+                            payload = await response.json(content_type=None)
+                            return username, profile_data_from_json(username, payload["data"]["user"])
+                        if response.status in (301, 302, 401):
+                            # Logged out or sent to a challenge: retrying will not help.
+                            await loop.run_in_executor(None, governor.report_throttled, f"HTTP {response.status}")
+                            return username, False
+                        if response.status == 429:
+                            await loop.run_in_executor(None, governor.report_throttled, "HTTP 429")
+                        if response.status not in RETRY_STATUSES:
+                            return username, False
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    pass # Network hiccup: retry after back-off
+                except (ValueError, KeyError, TypeError):
+                    return username, False # Unexpected JSON layout; the browser fallback will handle it
+        return username, False
+
+    async def fetch_many(self, usernames):
+        """
+        Fetches every username concurrently.
+
+        Returns:
+            dict: {username: profile_data or None (profile does not exist)}. Usernames that could not be
+                  fetched are left out, so the caller can fall back to another backend for them.
+        """
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency, keepalive_timeout=30)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=self.headers, cookies=self.cookies,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        results = await asyncio.gather(*(
+            self._fetch_one(self._session, self._semaphore, self._host_state, username)
+            for username in dict.fromkeys(usernames)
+        ))
+        return {username: profile_data for username, profile_data in results if profile_data is not False}
+
+    async def aclose(self):
+        """Closes the pooled session (call on the loop that ran fetch_many)."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _background_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="prefetch-loop", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def prefetch_profiles(self, usernames):
+        """
+        Synchronous entry point for the (threaded) crawler: runs fetch_many on the fetcher's
+        background event loop and waits for the batch.
+        """
+        if not usernames:
+            return {}
+        return asyncio.run_coroutine_threadsafe(self.fetch_many(usernames), self._background_loop()).result()
+
+    def close(self):
+        """Closes the session and stops the background loop started by prefetch_profiles."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop_thread.join()
+        loop.close()
+
+
+def run_benchmark(profile_count=40, concurrency=8, latency_seconds=1.0, per_minute=120, per_host_interval=0.5):
+    """
+    Compares one-at-a-time fetching with concurrent fetching against a local mock server that
+    returns a canned profile payload after `latency_seconds`. Both runs are paced exactly as the
+    crawler paces prefetches (the prefetch budget plus per-host spacing; defaults match config.yaml),
+    so the gain shown is the one a crawl actually gets: concurrency hides response latency, but
+    never pushes past `per_minute`.
+    """
+    from aiohttp import web
+
+    canned_user = {
+        "full_name": "Mock Celulares Mayorista",
+        "biography": "Distribuidor de celulares y accesorios. WhatsApp +57 300 123 4567",
+        "external_url": "https://wa.me/573001234567",
+        "edge_followed_by": {"count": 12900},
+        "edge_follow": {"count": 310},
+    }
+
+    async def profile_info(request):
+        await asyncio.sleep(latency_seconds)
+        return web.json_response({"data": {"user": canned_user}})
+
+    async def bench():
+        app = web.Application()
+        app.router.add_get(PROFILE_INFO_PATH, profile_info)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        usernames = [f"mock_user_{index}" for index in range(profile_count)]
+
+        print(f"Budget: {per_minute} fetches/min, {per_host_interval}s between request starts, {latency_seconds}s server latency")
+        try:
+            for label, limit in (("sequential", 1), (f"concurrency={concurrency}", concurrency)):
+                fetcher = AsyncProfileFetcher(
+                    base_url=f"http://127.0.0.1:{port}", concurrency=limit,
+                    per_host_interval=per_host_interval, budget=prefetch_budget(per_minute, concurrency)
+                )
+                started = time.perf_counter()
+                try:
+                    results = await fetcher.fetch_many(usernames)
+                finally:
+                    await fetcher.aclose()
+                elapsed = time.perf_counter() - started
+                print(f"{label:>16}: {len(results)} profiles in {elapsed:.2f}s ({len(results) / elapsed * 60:.0f} profiles/min)")
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(bench())
+
+
+if __name__ == "__main__":
+    # python -m scrapers.async_fetcher [profile_count] [concurrency]
+    run_benchmark(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,65 @@
+import re
+
+# Seeds are known starting points and are always visited before any discovered candidate.
+SEED_PRIORITY = 100.0
+
+# Score added every time another relevant profile links to an already-queued candidate.
+# Accounts that show up in several relevant followers/following lists are much more likely to be leads.
+EXTRA_PARENT_BONUS = 1.5
+
+# Points per distinct keyword found in the candidate's username or display name (capped).
+KEYWORD_HIT_SCORE = 3.0
+MAX_KEYWORD_HITS = 3
+
+# Points lost per level of recursion depth, so closer candidates win ties.
+DEPTH_PENALTY = 1.0
+
+# How promising the parent's classification (from classify_profile) makes its connections.
+PARENT_CLASSIFICATION_SCORES = {
+    "Distributor": 2.0,
+    "Reseller": 2.0,
+    "Retailer": 1.5,
+    "Repair Shop": 1.0,
+    "Phone & Accessories": 1.0,
+    "Potentially Relevant": 0.5,
+    "Other": 0.0,
+}
+
+
+def count_keyword_hits(text, keywords):
+    """
+    Counts how many distinct keywords appear in a username or display name.
+    Usernames use '_' and '.' as word separators, so those are treated as spaces.
+    """
+    if not text:
+        return 0
+    normalized_text = re.sub(r"[_.]+", " ", text.lower())
+    compact_text = normalized_text.replace(" ", "") # "mobile_shop" should still match "mobile shop"
+    hits = 0
+    for keyword in keywords:
+        if keyword in normalized_text or keyword.replace(" ", "") in compact_text:
+            hits += 1
+    return hits
+
+
+def score_candidate(username, depth, keywords, display_name="", parent_classification=None):
+    """
+    Scores a harvested follower/following candidate before any page load is spent on it.
+    Higher scores are visited first.
+
+    Args:
+        username (str): The candidate's username.
+        depth (int): The depth the candidate would be queued at.
+        keywords (list): Lowercase keywords from config.yaml.
+        display_name (str, optional): The display name shown next to the username in the pop-up.
+        parent_classification (str, optional): Classification of the profile the candidate was found on.
+
+    Returns:
+        float: The candidate's priority. The number of relevant parents is added by the frontier
+               (EXTRA_PARENT_BONUS per additional parent) when the same candidate is queued again.
+    """
+    keyword_hits = count_keyword_hits(username, keywords) + count_keyword_hits(display_name, keywords)
+    score = KEYWORD_HIT_SCORE * min(keyword_hits, MAX_KEYWORD_HITS)
+    score += PARENT_CLASSIFICATION_SCORES.get(parent_classification, 0.0)
+    score -= DEPTH_PENALTY * depth
+    return score
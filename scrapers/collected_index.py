@@ -0,0 +1,195 @@
+import os
+import mmap
+import math
+import struct
+import sqlite3
+import hashlib
+import threading
+import time
+
+BLOOM_MAGIC = b"IGBLOOM1"
+BLOOM_HEADER = struct.Struct("<8sQII") # magic, number of bits, number of hash functions, reserved
+
+
+def bloom_parameters(capacity, error_rate):
+    """
+    Returns (num_bits, num_hashes) for a Bloom filter holding `capacity` items at `error_rate`
+    false positives. E.g. 10 million usernames at 5% is ~62 million bits (7.4 MB) and 4 hashes.
+    """
+    num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+    num_bits = (num_bits + 7) // 8 * 8 # Whole bytes
+    num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+    return num_bits, num_hashes
+
+
+class MmapBloomFilter:
+    """
+    Bloom filter whose bit array is a memory-mapped file, so opening it costs one mmap call
+    (no loading) and the OS page cache shares it between every process using the same path.
+
+    A "no" is definite; a "yes" may be a false positive and has to be confirmed elsewhere.
+    """
+
+    def __init__(self, path, capacity, error_rate):
+        self.path = path
+        self.num_bits, self.num_hashes = bloom_parameters(capacity, error_rate)
+        self.created = False
+
+        if not self._matches_existing_file():
+            self._create_file()
+            self.created = True
+        self._file = open(path, "r+b")
+        self.mm = mmap.mmap(self._file.fileno(), 0)
+
+    def _matches_existing_file(self):
+        try:
+            with open(self.path, "rb") as bloom_file:
+                magic, num_bits, num_hashes, _ = BLOOM_HEADER.unpack(bloom_file.read(BLOOM_HEADER.size))
+            return (magic == BLOOM_MAGIC and num_bits == self.num_bits and num_hashes == self.num_hashes
+                    and os.path.getsize(self.path) == BLOOM_HEADER.size + num_bits // 8)
+        except (OSError, struct.error):
+            return False
+
+    def _create_file(self):
+        # Write the empty filter under a temporary name first, so another process never maps a half-written file
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as bloom_file:
+            bloom_file.write(BLOOM_HEADER.pack(BLOOM_MAGIC, self.num_bits, self.num_hashes, 0))
+            bloom_file.truncate(BLOOM_HEADER.size + self.num_bits // 8) # Sparse zero-filled bit array
+        os.replace(temp_path, self.path)
+
+    def _bit_positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = struct.unpack("<QQ", digest)
+        second |= 1 # Odd step, so the k positions differ
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for position in self._bit_positions(key):
+            offset = BLOOM_HEADER.size + position // 8
+            self.mm[offset] = self.mm[offset] | (1 << (position % 8))
+
+    def __contains__(self, key):
+        for position in self._bit_positions(key):
+            if not self.mm[BLOOM_HEADER.size + position // 8] & (1 << (position % 8)):
+                return False
+        return True
+
+    def close(self):
+        self.mm.flush()
+        self.mm.close()
+        self._file.close()
+
+
+class CollectedUsernames:
+    """
+    Cross-run "already collected" index of usernames, shared by main.py runs and web app jobs.
+
+    Used like a set (`in`, add, update) in place of the crawl's per-run set of exported usernames:
+    - fast path: a Bloom filter in a memory-mapped file (a few MB for millions of usernames);
+      most usernames were never collected and are answered by it without touching the disk
+    - exact store: a SQLite table of every collected username, queried only when the filter
+      says "maybe", so false positives never cause a profile to be skipped
+
+    The filter is rebuilt from the exact store if its file is missing or sized differently.
+    Thread-safe, so pooled browser sessions and the export writer can share one instance.
+    """
+
+    def __init__(self, bloom_path, db_path, capacity=10_000_000, error_rate=0.05, source=None):
+        """
+        Args:
+            bloom_path (str): Path of the Bloom filter file, e.g. "data/collected_usernames.bloom".
+            db_path (str): Path of the exact store, e.g. "data/collected_usernames.db".
+            capacity (int): Expected number of usernames; beyond it the false positive rate rises.
+            error_rate (float): Target false positive rate of the filter.
+            source (str, optional): Recorded with each new username (e.g. "cli" or "job_12").
+        """
+        for path in (bloom_path, db_path):
+            path_dir = os.path.dirname(path)
+            if path_dir and not os.path.exists(path_dir):
+                os.makedirs(path_dir)
+
+        self.source = source
+        self.capacity = capacity
+        self.run_usernames = set() # Added or confirmed during this run: no lookup needed
+        self.exact_lookups = 0
+        self.false_positives = 0
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL") # main.py and worker jobs may write at the same time
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS collected_usernames (
+                username     TEXT PRIMARY KEY,
+                collected_at REAL NOT NULL,
+                source       TEXT
+            )
+            """
+        )
+        self.conn.commit()
+
+        started = time.time()
+        self.bloom = MmapBloomFilter(bloom_path, capacity, error_rate)
+        if self.bloom.created:
+            self._rebuild_bloom()
+        stored_count = self.conn.execute("SELECT COUNT(*) FROM collected_usernames").fetchone()[0]
+        print(f"✅ Collected-username index ready: {stored_count} username(s) from earlier runs "
+              f"({(time.time() - started) * 1000:.0f} ms).")
+        if stored_count > capacity:
+            print(f"⚠️ The index holds more than collected_index_capacity ({capacity}) usernames; "
+                  f"raise it to keep the filter effective (results stay exact either way).")
+
+    def _rebuild_bloom(self):
+        cursor = self.conn.execute("SELECT username FROM collected_usernames")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for (username,) in rows:
+                self.bloom.add(username)
+
+    def __contains__(self, username):
+        with self._lock:
+            if username in self.run_usernames:
+                return True
+            if username not in self.bloom:
+                return False # Definitely never collected
+            self.exact_lookups += 1
+            found = self.conn.execute(
+                "SELECT 1 FROM collected_usernames WHERE username = ?", (username,)
+            ).fetchone() is not None
+            if found:
+                self.run_usernames.add(username)
+            else:
+                self.false_positives += 1
+            return found
+
+    def add(self, username):
+        """Records the username as collected, for this run and every later one."""
+        with self._lock:
+            if username in self.run_usernames:
+                return
+            self.conn.execute(
+                "INSERT OR IGNORE INTO collected_usernames (username, collected_at, source) VALUES (?, ?, ?)",
+                (username, time.time(), self.source)
+            )
+            self.conn.commit()
+            self.bloom.add(username)
+            self.run_usernames.add(username)
+
+    def update(self, usernames):
+        for username in usernames:
+            self.add(username)
+
+    def __len__(self):
+        return len(self.run_usernames)
+
+    def close(self):
+        with self._lock:
+            if self.exact_lookups:
+                print(f"📇 Collected-username index: {self.exact_lookups} exact lookup(s), "
+                      f"{self.false_positives} filter false positive(s).")
+            self.bloom.close()
+            self.conn.close()
@@ -0,0 +1,177 @@
+import time
+import random
+import queue
+import threading
+from selenium.common.exceptions import WebDriverException
+
+from scrapers.followers_scraper import visit_frontier_item
+from scrapers.rate_governor import governor
+from scrapers import progress
+
+# How long a stopping pool waits for sessions that are mid-visit before closing the export writer
+SESSION_STOP_TIMEOUT = 30
+
+
+class ProfileLimitReached(Exception):
+    """Raised by ExportWriter.submit once the run's profile limit has been handed to the writer."""
+
+
+class ExportWriter(threading.Thread):
+    """
+    Single consumer thread that performs every live export for the pool.
+
+    Pool sessions hand accepted profiles to `submit()`, which has the same signature as
+    process_and_live_export_profile, so it can be passed wherever that function is expected.
+    Only this thread ever calls the real export function, which keeps output files from being
+    written by several sessions at once and makes it the only thread that adds to the
+    shared scraped-usernames set (sessions only read from it).
+
+    Profiles are counted when they are submitted, not when the writer gets to them, so the
+    profile limit holds even while the writer lags behind the sessions.
+    """
+
+    def __init__(self, process_and_live_export_profile_func, max_profiles=None):
+        super().__init__(name="export-writer", daemon=True)
+        self.process_func = process_and_live_export_profile_func
+        self.max_profiles = max_profiles
+        self.submitted_count = 0
+        self.closed = False
+        self.pending = queue.Queue()
+        self._lock = threading.Lock()
+
+    def submit(self, profile_data_item, config, processed_usernames_set):
+        with self._lock:
+            if self.closed:
+                # The run is shutting down; raising keeps the profile from being marked accepted,
+                # so it stays in flight and is visited again on resume.
+                raise RuntimeError("export writer is closed")
+            if self.max_profiles is not None and self.submitted_count >= self.max_profiles:
+                raise ProfileLimitReached()
+            self.submitted_count += 1
+            self.pending.put((profile_data_item, config, processed_usernames_set))
+
+    def limit_reached(self):
+        with self._lock:
+            return self.max_profiles is not None and self.submitted_count >= self.max_profiles
+
+    def run(self):
+        while True:
+            job = self.pending.get()
+            if job is None:
+                break
+            try:
+                self.process_func(*job)
+            except Exception as e:
+                print(f"❌ Export writer failed for {job[0].get('Username')}: {e}")
+
+    def close(self):
+        """Flushes everything still queued and stops the thread."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.pending.put(None)
+        self.join()
+
+
+def run_crawl_pool(drivers, frontier, process_and_live_export_profile_func, scrape_single_profile_function, config_from_main, scraped_usernames_set, rejection_cache=None, should_stop=None, graph_store=None, max_profiles=None):
+    """
+    Drains the shared crawl frontier with several independent browser sessions in parallel.
+
+    Each session runs in its own thread and repeatedly claims the next username from the
+    frontier (which is thread-safe and dedupes every username), visits it with
+    visit_frontier_item, and sleeps for its own pacing delay. Accepted profiles are funnelled
+    into a single ExportWriter thread. A visit that fails is put back in the queue and retried
+    up to max_visit_attempts times.
+
+    Every session paces its page loads, clicks and scrolls with its own token bucket of the
+    process-wide rate governor (rate_governor.actions_per_minute each), so throughput grows with
+    the number of sessions up to rate_governor.max_total_actions_per_minute, if set. Back-off
+    after throttling and the hourly caps still apply to the pool as a whole.
+
+    Args:
+        drivers (list): Logged-in WebDriver sessions, one per worker thread.
+        max_profiles (int, optional): Stop once this many profiles have been handed to the export writer.
+        (remaining arguments as for followers_scraper.scrape_followers_and_following)
+    """
+    settings = config_from_main.get("settings", {})
+    session_delay_min = settings.get("session_delay_min", 0)
+    session_delay_max = settings.get("session_delay_max", 0)
+    max_visit_attempts = settings.get("max_visit_attempts", 3)
+
+    writer = ExportWriter(process_and_live_export_profile_func, max_profiles=max_profiles)
+    writer.start()
+    stopping = threading.Event() # Set when the pool is interrupted (e.g. SIGTERM in the main thread)
+
+    def requeue_failed(item):
+        if not frontier.requeue(item["username"], max_attempts=max_visit_attempts):
+            print(f"    Giving up on {item['username']} after {max_visit_attempts} failed visit(s).")
+
+    def session_worker(session_index, driver):
+        with governor.session(): # This session's own rate budget
+            crawl_session(session_index, driver)
+
+    def crawl_session(session_index, driver):
+        # Stagger session start-up so the pool does not hit Instagram in lock-step.
+        time.sleep(session_index * random.uniform(1, 3))
+        visited = 0
+        while True:
+            if stopping.is_set() or writer.limit_reached():
+                break
+            if should_stop is not None and should_stop():
+                break # Deadline or profile limit reached; unvisited usernames stay queued
+            item = frontier.claim_next()
+            if item is None:
+                if frontier.pending_count() == 0:
+                    break # Nothing queued and nothing in flight that could queue more work
+                time.sleep(2) # Other sessions are still expanding profiles; wait for new candidates
+                continue
+
+            try:
+                visit_frontier_item(
+                    driver, item, frontier, writer.submit, scrape_single_profile_function,
+                    config_from_main, scraped_usernames_set, rejection_cache, graph_store
+                )
+                visited += 1
+            except ProfileLimitReached:
+                # Not a failure: the profile is visited again by a later run.
+                frontier.requeue(item["username"], count_attempt=False)
+                break
+            except WebDriverException as e:
+                print(f"❌ [session {session_index}] Browser session failed on {item['username']}: {e}. Stopping this session.")
+                progress.emit("error", username=item["username"], depth=item["depth"], message=f"browser session failed: {e}")
+                requeue_failed(item) # Another session (or a later run) retries it
+                break
+            except Exception as e:
+                if stopping.is_set():
+                    break # Shutting down; the item stays in flight and is re-queued on resume
+                print(f"❌ [session {session_index}] Error visiting {item['username']}: {e}")
+                progress.emit("error", username=item["username"], depth=item["depth"], message=str(e))
+                requeue_failed(item)
+
+            time.sleep(random.uniform(session_delay_min, session_delay_max))
+        print(f"✅ [session {session_index}] Finished after visiting {visited} profile(s).")
+
+    print(f"\n✨ Crawling frontier with {len(drivers)} browser session(s) ({frontier.pending_count()} username(s) pending).")
+    threads = [
+        threading.Thread(target=session_worker, args=(index, driver), name=f"crawl-session-{index}", daemon=True)
+        for index, driver in enumerate(drivers)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        # Also runs when SIGTERM interrupts the joins: sessions get a moment to finish their
+        # current visit, then the writer drains its queue before the caller closes the sinks.
+        stopping.set()
+        for thread in threads:
+            thread.join(timeout=SESSION_STOP_TIMEOUT)
+        writer.close()
+    if frontier.pending_count():
+        print(f"⏹️ Stopped early: {frontier.pending_count()} username(s) left queued for a later resume.")
+    else:
+        print(f"✅ Frontier exhausted. {frontier.total_count()} username(s) visited in this crawl.")
+    if rejection_cache is not None:
+        print(f"    Skipped {rejection_cache.hits} page load(s) for profiles already rejected by the keyword filter.")
@@ -0,0 +1,306 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scrapers.rate_governor import governor
+from scrapers.whatsapp import extract_whatsapp_data
+
+# Backends selectable with settings.fetch_backend in config.yaml
+FETCH_BACKENDS = ("selenium", "http")
+
+# App id the Instagram web client sends with its own API calls; the profile endpoint rejects requests without it.
+INSTAGRAM_WEB_APP_ID = "936619743392459"
+PROFILE_INFO_PATH = "/api/v1/users/web_profile_info/"
+
+
+class ProfileFetchError(Exception):
+    """Raised when a backend could not tell whether a profile exists (network error, unexpected response)."""
+
+
+class SeleniumProfileFetcher:
+    """
+    Fetch backend that renders the profile page in Chrome (scrape_single_profile_details).
+
+    Instances are callable with the same (driver, username) signature as
+    scrape_single_profile_details, so they can be passed wherever a
+    scrape_single_profile_function is expected.
+    """
+    name = "selenium"
+    # The profile page is still open in the driver afterwards, so the followers/following
+    # dialogs can be opened without navigating again.
+    leaves_profile_loaded = True
+
+    def fetch(self, driver, username):
+        from scrapers.profile_scraper import scrape_single_profile_details # Selenium is only needed to render pages
+        return scrape_single_profile_details(driver, username)
+
+    __call__ = fetch
+
+    def close(self):
+        pass
+
+
+class HttpProfileFetcher:
+    """
+    Fetch backend that reads the profile JSON over a pooled HTTP session instead of rendering
+    the page. It returns the same profile_data dict as scrape_single_profile_details, so keyword
+    filtering runs without a browser and only relevant profiles get a page load (for their
+    followers/following).
+
+    The session reuses the logged-in browser's cookies and user agent. base_url is configurable
+    so the fetcher can be pointed at a local server replaying recorded JSON responses.
+
+    With a `prefetcher` (async_fetcher.AsyncProfileFetcher) and an `upcoming_usernames` source
+    (CrawlFrontier.peek_queued), a cache miss fetches the requested profile together with the next
+    queued candidates concurrently, so most later calls are answered from memory. Candidates that
+    `skip_username` says the crawl will skip anyway (already collected, recently rejected) are
+    never prefetched.
+
+    Whether the profile page is left open depends on the path the last fetch took (only the
+    browser fallback loads it), so leaves_profile_loaded is tracked per calling thread.
+    """
+    name = "http"
+
+    def __init__(self, base_url="https://i.instagram.com", cookies=None, user_agent=None,
+                 timeout=10, pool_size=4, fallback_function=None, prefetcher=None,
+                 upcoming_usernames=None, prefetch_batch_size=16, skip_username=None):
+        """
+        Args:
+            base_url (str): Scheme and host that serve PROFILE_INFO_PATH.
+            cookies (list, optional): Cookie dicts as returned by driver.get_cookies().
+            user_agent (str, optional): User agent to send (should match the browser session).
+            timeout (float): Per-request timeout in seconds.
+            pool_size (int): Connections kept open to the host (one per pooled browser session is enough).
+            fallback_function (function, optional): Called as fallback_function(driver, username) when the
+                                                    HTTP request fails, e.g. scrape_single_profile_details.
+            prefetcher (AsyncProfileFetcher, optional): Engine used to fetch a batch of profiles concurrently.
+            upcoming_usernames (function, optional): Called with a limit; returns the usernames that will
+                                                     be requested next (e.g. CrawlFrontier.peek_queued).
+            prefetch_batch_size (int): Profiles fetched per prefetch batch.
+            skip_username (function, optional): Returns True for upcoming usernames not worth prefetching.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.fallback_function = fallback_function
+        self.prefetcher = prefetcher
+        self.upcoming_usernames = upcoming_usernames
+        self.prefetch_batch_size = prefetch_batch_size
+        self.skip_username = skip_username
+        self.prefetched = {} # username -> profile_data (None if the profile does not exist)
+        self._prefetch_lock = threading.Lock()
+        self._last_fetch = threading.local() # Per pooled session: did its last fetch load the page?
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504], allowed_methods=["GET"])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "X-IG-App-ID": INSTAGRAM_WEB_APP_ID,
+            "Accept": "application/json",
+        })
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+        for cookie in cookies or []:
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+            if cookie["name"] == "csrftoken":
+                self.session.headers["X-CSRFToken"] = cookie["value"]
+
+    @classmethod
+    def from_driver(cls, driver, config, upcoming_usernames=None, skip_username=None):
+        """
+        Builds an HTTP fetcher that shares the logged-in driver's cookies and user agent.
+        If http_fetch.async_concurrency is above 0 (and a source of upcoming usernames is given),
+        candidates are prefetched concurrently with AsyncProfileFetcher, within their own
+        http_fetch.prefetch_per_minute budget.
+        """
+        from scrapers.profile_scraper import scrape_single_profile_details # Selenium is only needed for the fallback
+        http_settings = config.get("http_fetch", {}) or {}
+        base_url = http_settings.get("base_url", "https://i.instagram.com")
+        cookies = driver.get_cookies()
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        timeout = http_settings.get("timeout", 10)
+
+        prefetcher = None
+        async_concurrency = http_settings.get("async_concurrency", 8)
+        if async_concurrency and upcoming_usernames is not None:
+            from scrapers.async_fetcher import AsyncProfileFetcher, prefetch_budget # aiohttp is only needed when prefetching is enabled
+            prefetcher = AsyncProfileFetcher(
+                base_url=base_url,
+                cookies=cookies,
+                user_agent=user_agent,
+                concurrency=async_concurrency,
+                per_host_interval=http_settings.get("per_host_interval", 0.5),
+                max_retries=http_settings.get("max_retries", 3),
+                timeout=timeout,
+                budget=prefetch_budget(http_settings.get("prefetch_per_minute", 120), async_concurrency),
+            )
+
+        return cls(
+            base_url=base_url,
+            cookies=cookies,
+            user_agent=user_agent,
+            timeout=timeout,
+            pool_size=max(1, config.get("settings", {}).get("browser_pool_size", 1)),
+            fallback_function=scrape_single_profile_details,
+            prefetcher=prefetcher,
+            upcoming_usernames=upcoming_usernames,
+            prefetch_batch_size=http_settings.get("prefetch_batch_size", 16),
+            skip_username=skip_username,
+        )
+
+    @property
+    def leaves_profile_loaded(self):
+        """True if this thread's last fetch fell back to the browser, which left the profile page open."""
+        return getattr(self._last_fetch, "profile_loaded", False)
+
+    def fetch_json(self, username):
+        """
+        Returns the 'user' object of the profile JSON, or None if the profile does not exist.
+        Raises ProfileFetchError on throttling, network errors or an unexpected response.
+        """
+        governor.pace("fetch")
+        try:
+            response = self.session.get(
+                f"{self.base_url}{PROFILE_INFO_PATH}",
+                params={"username": username},
+                timeout=self.timeout,
+                allow_redirects=False # A redirect here is always to the login or challenge page
+            )
+        except requests.RequestException as e:
+            raise ProfileFetchError(f"request failed: {e}")
+
+        if response.status_code == 404:
+            governor.report_ok()
+            return None
+        if response.status_code in (401, 429) or response.is_redirect:
+            governor.report_throttled(f"HTTP {response.status_code}")
+            raise ProfileFetchError(f"throttled (HTTP {response.status_code})")
+        if response.status_code != 200:
+            raise ProfileFetchError(f"unexpected HTTP {response.status_code}")
+
+        try:
+            user = response.json()["data"]["user"]
+        except (ValueError, KeyError, TypeError):
+            raise ProfileFetchError("unexpected JSON layout")
+        governor.report_ok()
+        return user
+
+    def _take_prefetched(self, username):
+        """Returns (True, profile_data) if `username` is in the prefetch cache, removing it; else (False, None)."""
+        with self._prefetch_lock:
+            if username in self.prefetched:
+                return True, self.prefetched.pop(username)
+        return False, None
+
+    def _prefetch_batch(self, username):
+        """Fetches `username` and the next queued candidates concurrently into the prefetch cache."""
+        with self._prefetch_lock:
+            # Look further ahead than one batch, since some upcoming usernames are filtered out
+            batch = [username] + [
+                upcoming for upcoming in self.upcoming_usernames(2 * self.prefetch_batch_size)
+                if upcoming != username and upcoming not in self.prefetched
+                and not (self.skip_username is not None and self.skip_username(upcoming))
+            ]
+        batch = batch[:self.prefetch_batch_size]
+        print(f"⚡ Prefetching {len(batch)} profile(s) concurrently...")
+        results = self.prefetcher.prefetch_profiles(batch)
+        with self._prefetch_lock:
+            if len(self.prefetched) > 4 * self.prefetch_batch_size:
+                # Entries nobody asked for (e.g. skipped via the rejection cache) would otherwise pile up.
+                self.prefetched.clear()
+            self.prefetched.update(results)
+
+    def fetch(self, driver, username):
+        """
+        Fetches one profile and returns a profile_data dict (same keys as scrape_single_profile_details),
+        or None if the profile does not exist. Falls back to fallback_function if the request fails.
+        """
+        self._last_fetch.profile_loaded = False
+        found, profile_data = self._take_prefetched(username)
+        if not found and self.prefetcher is not None and self.upcoming_usernames is not None:
+            self._prefetch_batch(username)
+            found, profile_data = self._take_prefetched(username)
+        if found:
+            if profile_data is None:
+                print(f"    Profile {username} not found.")
+            return profile_data
+
+        print(f"🔍 Fetching profile JSON for: {username}")
+        try:
+            user = self.fetch_json(username)
+        except ProfileFetchError as e:
+            if self.fallback_function is None:
+                print(f"❌ HTTP fetch failed for {username}: {e}. Skipping.")
+                return None
+            print(f"    ⚠️ HTTP fetch failed for {username}: {e}. Falling back to the browser.")
+            # The fallback renders the profile page, so expanding the profile needs no second navigation.
+            self._last_fetch.profile_loaded = True
+            return self.fallback_function(driver, username)
+
+        if user is None:
+            print(f"    Profile {username} not found.")
+            return None
+        return profile_data_from_json(username, user)
+
+    __call__ = fetch
+
+    def close(self):
+        self.session.close()
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+
+
+def profile_data_from_json(username, user):
+    """
+    Maps the 'user' object of Instagram's profile JSON onto the profile_data dict
+    produced by scrape_single_profile_details.
+    """
+    external_link = user.get("external_url") or ""
+    if "meta.com" in external_link or "instagram.com" in external_link:
+        external_link = "" # Same rule as the browser scraper: never store Meta/Instagram links
+    bio = (user.get("biography") or "").strip()
+
+    # Same WhatsApp search text as the browser scraper (bio plus external link), plus any
+    # business contact number, which the page only shows behind a button.
+    combined_text_for_whatsapp = f"{bio} {external_link} {user.get('business_phone_number') or ''}"
+    whatsapp_num, whatsapp_group, region_inferred = extract_whatsapp_data(combined_text_for_whatsapp)
+
+    return {
+        "Username": username,
+        "Full Name": (user.get("full_name") or "").strip(),
+        "Follower Count": str((user.get("edge_followed_by") or {}).get("count", 0)),
+        "Following Count": str((user.get("edge_follow") or {}).get("count", 0)),
+        "Bio": bio,
+        "WhatsApp Number": whatsapp_num,
+        "WhatsApp Group Link": whatsapp_group,
+        "Region": region_inferred,
+        "External Link": external_link,
+        "Profile URL": f"https://www.instagram.com/{username}/"
+    }
+
+
+def create_profile_fetcher(config, driver=None, upcoming_usernames=None, skip_username=None):
+    """
+    Returns the fetch backend selected by settings.fetch_backend ("selenium" or "http").
+
+    Args:
+        config (dict): The loaded configuration dictionary.
+        driver (WebDriver, optional): Logged-in session whose cookies the HTTP backend reuses.
+        upcoming_usernames (function, optional): Source of the next usernames to prefetch
+                                                 (CrawlFrontier.peek_queued); HTTP backend only.
+        skip_username (function, optional): True for upcoming usernames the crawl will skip without a
+                                            fetch, so they are not prefetched; HTTP backend only.
+    """
+    backend = config.get("settings", {}).get("fetch_backend", "selenium")
+    if backend == "http":
+        if driver is None:
+            raise ValueError("The http fetch backend needs a logged-in driver to copy the session from.")
+        return HttpProfileFetcher.from_driver(driver, config, upcoming_usernames, skip_username)
+    if backend != "selenium":
+        print(f"⚠️ Unknown fetch_backend '{backend}'. Using selenium.")
+    return SeleniumProfileFetcher()
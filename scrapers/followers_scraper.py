@@ -1,21 +1,19 @@
 import time
-import random
 import yaml
 import re
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException, StaleElementReferenceException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 
-# Ensure correct import paths for other scraper modules
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'scrapers')))
-
-# Corrected Import: Import 'scrape_profiles' as it's the main profile scraper function
-from profile_scraper import scrape_profiles
+from scrapers.rate_governor import governor
+from scrapers.classifier import classify_profile
+from scrapers.candidate_scoring import score_candidate, EXTRA_PARENT_BONUS
+from scrapers.popup_prefilter import prefilter_candidate, REJECT
+from scrapers.network_usage import drain_network_log
+from scrapers import progress
 
 
 # Load configuration (this file will still load its own config as per your request)
@@ -27,10 +25,7 @@ except FileNotFoundError:
     # Provide a robust default config if the file is missing
     config = {
         "settings": {
-            "delay_min": 5,
-            "delay_max": 10,
             "follower_scrape_limit": 500,
-            "unlimited_follower_scrape": False, # New config setting for UNLIMITED mode
             "scroll_attempts_max": 50, # Set to 50 as per your previous log output, for fixed scrolls
             "recursion_depth": 1 # Default for recursion
         },
@@ -38,75 +33,88 @@ except FileNotFoundError:
     }
 
 # Global variables read from config (as in your provided working file)
-DELAY_MIN = config["settings"]["delay_min"]
-DELAY_MAX = config["settings"]["delay_max"]
 FOLLOWER_LIMIT = config["settings"].get("follower_scrape_limit", 500)
-UNLIMITED_FOLLOWER_SCRAPE = config["settings"].get("unlimited_follower_scrape", False) # FORCED to False for fixed scrolls
 SCROLL_ATTEMPTS_MAX = config["settings"].get("scroll_attempts_max", 50) # Using this as the fixed scroll count
 RECURSION_DEPTH = config["settings"].get("recursion_depth", 5) # Get recursion depth from config
-
-# Ensure keywords are lowercase for case-insensitive matching (used for light_scrape_and_filter_profile)
-LIGHT_SCRAPE_KEYWORDS = [kw.lower() for kw in config.get("keywords", ["celulares", "accesorios", "mayorista", "distribuidor", "smartphone", "movil", "telefone", "tecnologia"])]
+SCROLL_LOAD_TIMEOUT = config["settings"].get("scroll_load_timeout", 8) # Upper bound (seconds) to wait for new pop-up rows after a scroll
 
 
-# This function now performs the light scrape for filtering by calling scrape_profiles
-# and extracts the relevant fields. It now returns the full profile_data if relevant.
-def light_scrape_and_filter_profile(driver, username, config_for_keywords): # Added config_for_keywords
+def is_relevant_profile(profile_data, keywords):
     """
-    Performs a light scrape to check for keywords in the bio/full name/external link.
-    Returns the profile_data dictionary if relevant, None otherwise.
-    This uses the 'scrape_profiles' function from profile_scraper for the light scrape,
-    but only processes a subset of its output for relevance.
-    """
-    # Use keywords from the passed config_for_keywords
-    current_light_scrape_keywords = [kw.lower() for kw in config_for_keywords.get("keywords", [])]
-
-    # Use scrape_profiles to get the full profile data (which includes bio, full name, external link)
-    # This is effectively a "light" scrape for filtering purposes here.
-    profile_data_list = scrape_profiles(driver, [username])
-
-    if not profile_data_list:
-        return None # Profile not found or couldn't be scraped
-
-    profile_data = profile_data_list[0] # We only scraped one username
+    Returns True if any keyword appears in the profile's bio, full name or external link.
 
+    Args:
+        profile_data (dict): A profile dictionary as produced by scrape_single_profile_details.
+        keywords (list): Lowercase keywords to look for.
+    """
     bio = profile_data.get("Bio", "").lower()
     full_name = profile_data.get("Full Name", "").lower()
     external_link = profile_data.get("External Link", "").lower()
 
     text_to_filter = f"{bio} {full_name} {external_link}"
+    return any(keyword in text_to_filter for keyword in keywords)
+
+
+# Rows of the followers/following pop-up, and the spinner shown while the next batch loads.
+POPUP_ROW_XPATH = "//div[@role='dialog']//div[./div/a[contains(@href, '/') and @role='link']] | //div[@role='dialog']//li"
+POPUP_SPINNER_XPATH = "//div[@role='dialog']//*[@role='progressbar'] | //div[@role='dialog']//*[name()='svg' and @aria-label='Loading...']"
+
+
+class popup_rows_loaded:
+    """
+    WebDriverWait condition that is met as soon as the pop-up holds more rows than before the
+    scroll, or a loading spinner that appeared during the wait has gone away again
+    (Instagram hides the spinner without adding rows once the list is exhausted).
+    """
+
+    def __init__(self, previous_row_count):
+        self.previous_row_count = previous_row_count
+        self.spinner_seen = False
+
+    def __call__(self, driver):
+        # Count rows inside the browser; fetching element references would cost a round trip per row.
+        row_count = driver.execute_script(
+            "return document.evaluate(arguments[0], document, null, XPathResult.NUMBER_TYPE, null).numberValue;",
+            f"count({POPUP_ROW_XPATH})"
+        )
+        if row_count > self.previous_row_count:
+            return True
+        spinner_visible = bool(driver.find_elements(By.XPATH, POPUP_SPINNER_XPATH))
+        if spinner_visible:
+            self.spinner_seen = True
+            return False
+        return self.spinner_seen
 
-    # Check if any of the defined keywords are present
-    if any(keyword in text_to_filter for keyword in current_light_scrape_keywords):
-        print(f"        '{username}' is relevant (matched keyword).")
-        return profile_data # Return the full profile data dictionary
-    else:
-        # print(f"        '{username}' is NOT relevant (no keyword match). # Uncomment for verbose filtering
-        return None
 
 def scroll_followers_popup(driver, scroll_attempts):
     """
     Scrolls inside the followers or following pop-up window by scrolling the last element into view.
     It will keep scrolling as long as new content is loaded or until it hits scroll_attempts.
+    After each scroll it waits only until new rows appear (at most SCROLL_LOAD_TIMEOUT seconds)
+    and reports the observed load time to the rate governor.
+
+    Returns:
+        dict: Every {username: display_name} seen while scrolling. Rows scrolled out of view may be
+              removed from the DOM, so this is more complete than re-reading the pop-up afterwards.
     """
+    all_collected_profiles = {}
     try:
         # Using the CSS Selector you provided for the scrollable area
         scrollable_element_selector = "body > div.x1n2onr6.xzkaem6 > div:nth-child(2) > div > div > div.x9f619.x1n2onr6.x1ja2u2z > div > div.x1uvtmcs.x4k7w5x.x1h91t0o.x1beo9mf.xaigb6o.x12ejxvf.x3igimt.xarpa2k.xedcshv.x1lytzrv.x1t2pt76.x7ja8zs.x1n2onr6.x1qrby5j.x1jfb8zj > div > div > div > div > div.x7r02ix.xf1ldfh.x131esax.xdajt7p.xxfnqb6.xb88tzc.xw2csxc.x1odjw0f.x5fp0pe > div > div > div.xyi19xy.x1ccrb07.xtf3nb5.x1pc53ja.x1lliihq.x1iyjqo2.xs83m0k.xz65tgg.x1rife3k.x1n2onr6 > div:nth-child(1) > div"
 
-        popup_scroll_area = WebDriverWait(driver, 15).until(
+        WebDriverWait(driver, 15).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, scrollable_element_selector))
         )
         print("✅ Followers/Following pop-up scrollable area detected using CSS selector!")
 
-        # Initial collection of usernames
-        initial_usernames_list = get_usernames_from_popup(driver)
-        all_collected_usernames = set(initial_usernames_list) # Use a set to store all unique usernames collected
+        # Initial collection of usernames (with the display name shown in each row)
+        all_collected_profiles.update(get_profiles_from_popup(driver))
 
-        print(f"    Initial unique usernames found: {len(all_collected_usernames)}")
+        print(f"    Initial unique usernames found: {len(all_collected_profiles)}")
         
         print(f"    Starting element-based scrolling attempts (max {SCROLL_ATTEMPTS_MAX})...")
 
-        last_known_username_count = len(all_collected_usernames)
+        last_known_username_count = len(all_collected_profiles)
         scroll_count = 0
         stagnation_count = 0 # To detect if scrolling isn't loading new content
 
@@ -116,10 +124,8 @@ def scroll_followers_popup(driver, scroll_attempts):
                 # Do NOT concatenate CSS selector with XPath directly like before.
                 # Instead, find any div or li elements *within the dialog role*,
                 # which are common containers for individual user items.
-                user_list_items_xpath = "//div[@role='dialog']//div[./div/a[contains(@href, '/') and @role='link']] | //div[@role='dialog']//li"
-                
                 user_elements = WebDriverWait(driver, 10).until(
-                    EC.presence_of_all_elements_located((By.XPATH, user_list_items_xpath))
+                    EC.presence_of_all_elements_located((By.XPATH, POPUP_ROW_XPATH))
                 )
 
                 if not user_elements:
@@ -131,17 +137,27 @@ def scroll_followers_popup(driver, scroll_attempts):
                 
                 # Scroll the last user element into view using JavaScript
                 # This explicitly makes the browser scroll to make the element visible
+                governor.pace("scroll")
                 driver.execute_script("arguments[0].scrollIntoView(true);", last_user_element)
-                
-                # Add a slightly longer, more random delay for content to load after scroll
-                time.sleep(random.uniform(5, 9))
 
-                # Re-fetch usernames after scrolling
-                current_visible_usernames = get_usernames_from_popup(driver)
-                new_users_added = len(set(current_visible_usernames) - all_collected_usernames)
-                all_collected_usernames.update(current_visible_usernames)
+                # Wait for the next batch instead of sleeping a fixed time
+                load_started = time.monotonic()
+                try:
+                    WebDriverWait(driver, SCROLL_LOAD_TIMEOUT, poll_frequency=0.25).until(
+                        popup_rows_loaded(len(user_elements))
+                    )
+                except TimeoutException:
+                    pass # Nothing new within the bound; the stagnation check below decides whether to stop
+                governor.observe_latency("scroll", time.monotonic() - load_started)
+
+                # Fetch only the rows added by this scroll
+                current_visible_profiles = get_profiles_from_popup(driver)
+                new_users_added = len(current_visible_profiles.keys() - all_collected_profiles.keys())
+                for visible_username, display_name in current_visible_profiles.items():
+                    if display_name or visible_username not in all_collected_profiles:
+                        all_collected_profiles[visible_username] = display_name
                 
-                if len(all_collected_usernames) == last_known_username_count:
+                if len(all_collected_profiles) == last_known_username_count:
                     stagnation_count += 1
                     print(f"    ⚠️ No new usernames detected. Stagnation count: {stagnation_count}")
                     if stagnation_count >= 3: # Allow 3 attempts for new content
@@ -149,10 +165,10 @@ def scroll_followers_popup(driver, scroll_attempts):
                         break
                 else:
                     stagnation_count = 0 # Reset stagnation if new users were found
-                    last_known_username_count = len(all_collected_usernames)
+                    last_known_username_count = len(all_collected_profiles)
                 
                 scroll_count += 1
-                print(f"    Scroll attempt {scroll_count}/{SCROLL_ATTEMPTS_MAX}. Found {new_users_added} new usernames. Total unique collected: {len(all_collected_usernames)}")
+                print(f"    Scroll attempt {scroll_count}/{SCROLL_ATTEMPTS_MAX}. Found {new_users_added} new usernames. Total unique collected: {len(all_collected_profiles)}")
                 
             except StaleElementReferenceException:
                 print("    ⚠️ Stale Element: User list items became stale. Attempting to re-locate.")
@@ -160,7 +176,7 @@ def scroll_followers_popup(driver, scroll_attempts):
                 if stagnation_count >= 3:
                     print("    🛑 Stagnation detected due to repeated stale elements. Stopping scrolling.")
                     break
-                time.sleep(random.uniform(2, 4)) # Small pause before re-attempt
+                governor.pace("popup_close") # Small pause before re-attempt
                 continue # Continue to the next iteration to re-find elements
             except TimeoutException:
                 print("    ❌ Timeout: No user list items found within 10 seconds during scroll attempt. Stopping scrolling.")
@@ -170,90 +186,138 @@ def scroll_followers_popup(driver, scroll_attempts):
                 break
 
         print(f"✅ Finished scrolling popup. Total scrolls performed: {scroll_count}. "
-              f"Final total unique usernames collected: {len(all_collected_usernames)}")
+              f"Final total unique usernames collected: {len(all_collected_profiles)}")
 
     except TimeoutException:
         print("❌ Timeout: Followers/Following pop-up scrollable area not found within 15 seconds. Check selector.")
     except Exception as e:
         print(f"❌ Error during initial pop-up setup: {e}")
+    return all_collected_profiles
+
+# Non-profile Instagram paths that show up as links inside the followers/following dialog
+NON_PROFILE_HREF_PARTS = ["/p/", "/explore/tags/", "/direct/", "/stories/", "/reels/", "/accounts/", "/legal/", "/about/", "/emails/", "/challenge/"]
 
-def get_usernames_from_popup(driver):
+# Button and badge labels that appear in a pop-up row next to the username and display name
+POPUP_ROW_NOISE = {"follow", "following", "remove", "message", "requested", "follow back", "verified", "·"}
+
+
+def username_from_popup_link(aria_label, href):
     """
-    Extracts visible usernames from the followers or following pop-up.
-    This function has been enhanced to be more robust, checking aria-label
-    and improving href parsing to pick up more usernames if they appear on screen.
+    Works out the username a pop-up link points to, checking aria-label first
+    and falling back to parsing the href. Returns None for non-profile links.
     """
-    usernames = set()
-    try:
-        # Looking for all 'a' tags within the dialog, which are typically used for profile links.
-        # This is a broad search for any clickable link within the dialog.
-        all_potential_elements = WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located((By.XPATH, "//div[@role='dialog']//a"))
-        )
+    # 1. Try to extract username from 'aria-label' attribute (very reliable for Instagram)
+    if aria_label:
+        # Example: "Profile picture of username" or "username"
+        # Prioritize exact username match if aria_label is simple
+        if ' ' not in aria_label and re.match(r"^[a-zA-Z0-9_.]+$", aria_label):
+            return aria_label
+        # If it's a "Profile picture of..." label
+        username_match_label = re.search(r'profile picture of (.+)', aria_label.lower())
+        if username_match_label:
+            username = username_match_label.group(1).strip()
+            if username and username.lower() not in ["null", "profile picture of"]: # Filter out non-real names
+                if re.match(r"^[a-zA-Z0-9_.]+$", username): # Validate format
+                    return username
+
+    # 2. If not found via aria-label, try to extract username from 'href' attribute
+    if href:
+        # Filter out non-profile links by common patterns
+        # These are specific Instagram internal paths that are not user profiles
+        if any(filter_part in href for filter_part in NON_PROFILE_HREF_PARTS):
+            return None # Skip this href as it's not a profile link
+
+        # Attempt to extract the last part of the URL path as a potential username
+        # Handle both full URLs (https://www.instagram.com/user/) and relative paths (/user/)
+        parts = href.strip('/').split('/')
+        username_candidate = None
+
+        # Iterate from the end to find the last non-empty, non-domain part
+        for part in reversed(parts):
+            if part and part.lower() not in ["www.instagram.com", "instagram.com"]:
+                username_candidate = part
+                break
 
-        for element in all_potential_elements:
-            try:
-                # 1. Try to extract username from 'aria-label' attribute (very reliable for Instagram)
-                aria_label = element.get_attribute("aria-label")
-                if aria_label:
-                    # Example: "Profile picture of username" or "username"
-                    # Prioritize exact username match if aria_label is simple
-                    if ' ' not in aria_label and re.match(r"^[a-zA-Z0-9_.]+$", aria_label):
-                        usernames.add(aria_label)
-                        continue # Found a username, move to the next element
-                    # If it's a "Profile picture of..." label
-                    username_match_label = re.search(r'profile picture of (.+)', aria_label.lower())
-                    if username_match_label:
-                        username = username_match_label.group(1).strip()
-                        if username and username.lower() not in ["null", "profile picture of"]: # Filter out non-real names
-                            if re.match(r"^[a-zA-Z0-9_.]+$", username): # Validate format
-                                usernames.add(username)
-                                continue # Found a username, move to the next element
-
-                # 2. If not found via aria-label, try to extract username from 'href' attribute
-                href = element.get_attribute("href")
-                if href:
-                    # Filter out non-profile links by common patterns
-                    # These are specific Instagram internal paths that are not user profiles
-                    if any(filter_part in href for filter_part in ["/p/", "/explore/tags/", "/direct/", "/stories/", "/reels/", "/accounts/", "/legal/", "/about/", "/emails/", "/challenge/"]):
-                        continue # Skip this href as it's not a profile link
-
-                    # Attempt to extract the last part of the URL path as a potential username
-                    # Handle both full URLs (https://www.instagram.com/user/) and relative paths (/user/)
-                    parts = href.strip('/').split('/')
-                    username_candidate = None
-
-                    # Iterate from the end to find the last non-empty, non-domain part
-                    for part in reversed(parts):
-                        if part and part.lower() not in ["www.instagram.com", "instagram.com"]:
-                            username_candidate = part
-                            break
-                    
-                    if username_candidate:
-                        # Validate the extracted candidate looks like an Instagram username
-                        # Instagram usernames consist of alphanumeric characters, periods, and underscores.
-                        if re.match(r"^[a-zA-Z0-9_.]+$", username_candidate):
-                            if username_candidate.lower() not in ["null", "accounts"]: # Additional common non-username words
-                                usernames.add(username_candidate)
+        if username_candidate:
+            # Validate the extracted candidate looks like an Instagram username
+            # Instagram usernames consist of alphanumeric characters, periods, and underscores.
+            if re.match(r"^[a-zA-Z0-9_.]+$", username_candidate):
+                if username_candidate.lower() not in ["null", "accounts"]: # Additional common non-username words
+                    return username_candidate
+    return None
 
-            except StaleElementReferenceException:
-                # This can happen if the DOM changes during iteration (e.g., more scrolling)
-                # print("        (Debug) Stale element encountered during username extraction. Skipping.") # Removed verbose debug
-                continue # Just skip this element and try the next one
-            except Exception as e:
-                # Catch any other unexpected errors during processing a single single element
-                # print(f"        (Debug) Error processing element for username: {e}") # Removed verbose debug
-                continue # Skip this element
 
-        return list(usernames)
+def display_name_from_row_text(row_text, username):
+    """
+    Picks the display name out of a pop-up row's visible text, which is usually
+    "username\nDisplay Name\nFollow". Returns "" if the row only shows the username.
+    """
+    for line in (row_text or "").split("\n"):
+        line = line.strip()
+        if not line or line.lower() == username.lower() or line.lower() in POPUP_ROW_NOISE:
+            continue
+        return line
+    return ""
+
+
+# Reads every not-yet-harvested link in the dialog in one round trip and marks it as harvested, so
+# later calls only return rows that appeared since (e.g. after a scroll). Returns null while the
+# dialog has no links yet. Each entry is [aria-label, href, text of the row the link sits in].
+POPUP_HARVEST_SCRIPT = """
+const dialog = document.querySelector("div[role='dialog']");
+if (!dialog || !dialog.querySelector('a')) { return null; }
+const rows = [];
+for (const link of dialog.querySelectorAll('a:not([data-harvested])')) {
+    link.setAttribute('data-harvested', '1');
+    // The row container is the nearest ancestor that also holds the row's button.
+    let row = link.parentElement;
+    while (row && row !== dialog && !(row.tagName === 'DIV' && row.querySelector("button, div[role='button']"))) {
+        row = row.parentElement;
+    }
+    rows.push([link.getAttribute('aria-label'), link.href, row && row !== dialog ? row.innerText : '']);
+}
+return rows;
+"""
+
+
+def get_profiles_from_popup(driver):
+    """
+    Extracts the followers or following pop-up rows that appeared since the previous call
+    as {username: display_name}. The first call on a freshly opened pop-up returns every
+    rendered row.
+
+    All links are read with a single execute_script call instead of two WebDriver round trips
+    per link; the same username/href filtering rules are then applied in Python. The display
+    name is the text shown under the username in each row, so candidates can be pre-filtered
+    and scored without loading their profile.
+    """
+    profiles = {}
+    try:
+        # Wait (up to 10s) for the dialog to render its first links, then harvest them.
+        harvested = []
+        def harvest(d):
+            rows = d.execute_script(POPUP_HARVEST_SCRIPT)
+            if rows is None:
+                return False # Dialog not rendered yet; keep waiting
+            harvested.extend(rows)
+            return True
+        WebDriverWait(driver, 10).until(harvest)
+
+        for aria_label, href, row_text in harvested:
+            username = username_from_popup_link(aria_label, href)
+            if not username or profiles.get(username):
+                continue # Not a profile link, or this row's display name is already known
+            profiles[username] = display_name_from_row_text(row_text, username)
+
+        return profiles
 
     except TimeoutException:
         # This means no 'a' tags were found in the dialog within the timeout.
-        # print("        (Debug) Timeout: No 'a' tags found in dialog for username extraction.") # Removed verbose debug
-        pass # Just return empty list if no elements found
+        pass # Just return an empty result if no elements found
     except Exception as e:
         print(f"❌ Failed to extract usernames from pop-up: {e}")
-    return [] # Ensure an empty list is returned on failure
+    return {} # Ensure an empty result is returned on failure
+
 
 def close_popup(driver):
     """
@@ -281,210 +345,314 @@ def close_popup(driver):
         except Exception as e:
             print(f"❌ Error closing pop-up with button: {e}")
     finally:
-        time.sleep(random.uniform(2, 4)) # Give time for popup to disappear
+        governor.pace("popup_close") # Give time for popup to disappear
 
 
-# Modified signature to accept process_and_live_export_profile_func and config
-def scrape_followers_and_following(driver, seed_usernames, process_and_live_export_profile_func, scrape_profiles_function, config_from_main, current_depth, scraped_usernames_set):
+def open_profile_page(driver, username):
     """
-    Scrapes followers and following lists for seed usernames (STEP 2),
-    filters profiles based on keywords in their bios using a light scrape (STEP 3),
-    and live-exports relevant profiles. Includes recursion.
+    Navigates to a profile page and waits for its header.
 
-    Args:
-        driver (WebDriver): The Selenium WebDriver instance.
-        seed_usernames (list): List of usernames to expand from at this depth.
-        process_and_live_export_profile_func (function): The function to call for live export.
-        scrape_profiles_function (function): The function used to scrape full profile data.
-        config_from_main (dict): The loaded configuration dictionary from main.py.
-        current_depth (int): The current recursion depth.
-        scraped_usernames_set (set): A set of all usernames already *fully processed and exported*
-                                     across all recursion depths. This set is managed by the initial caller
-                                     and updated by `process_and_live_export_profile_func`.
     Returns:
-        None: This function now handles live export internally and does not return a list.
+        bool: False only on a critical error that prevents any interaction with the page.
+              A header timeout only warns, since the follower/following buttons are sometimes
+              still interactive without it.
     """
-    
-    # RECURSION_DEPTH is a global variable in this file, read from its own config load.
-    if current_depth > RECURSION_DEPTH:
-        print(f"Max recursion depth ({RECURSION_DEPTH}) reached. Stopping.")
-        return # No return value, as we're live exporting
+    profile_url = f"https://www.instagram.com/{username}/"
+    governor.pace("navigate")
+    driver.get(profile_url)
+
+    try:
+        # Wait for the main profile header to load before trying to find buttons
+        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.XPATH, "//header//h2")))
+        print(f"    Profile page for {username} loaded.")
+        governor.check_page(driver)
+    except TimeoutException:
+        print(f"    ⚠️ Warning: Profile page for {username} header did not load in time. Attempting to proceed with button clicks anyway.")
+        if not governor.check_page(driver):
+            return False
+    except Exception as e:
+        print(f"    ❌ Critical Error loading profile page for {username}: {e}. Skipping this user's button clicks.")
+        return False
+    return True
 
-    print(f"\n✨ Entering recursion depth: {current_depth} for {len(seed_usernames)} seed(s).")
 
-    # This set will hold usernames that are relevant AND NEWLY FOUND for the next recursion depth
-    next_level_seed_usernames = set()
+def scrape_connection_list(driver, username, list_type):
+    """
+    Opens the followers or following pop-up of the profile currently loaded in the driver,
+    scrolls it and returns the usernames it contains.
 
-    for username in seed_usernames:
-        print(f"    Processing followers/following for @{username} (Depth: {current_depth})")
+    Args:
+        driver (WebDriver): The Selenium WebDriver instance, already on the profile page.
+        username (str): The profile whose list is being scraped (for logging).
+        list_type (str): "followers" or "following".
 
-        # Navigate to profile
-        profile_url = f"https://www.instagram.com/{username}/"
-        driver.get(profile_url)
-        time.sleep(random.uniform(DELAY_MIN, DELAY_MAX))
+    Returns:
+        dict or None: {username: display_name} collected from the pop-up (empty if the pop-up opened
+                      but listed nobody), or None if the pop-up could not be opened or scrolled.
+    """
+    collected_profiles = {}
+    scraped_successfully = False
+    try:
+        print(f"    Attempting to scrape {list_type} for {username}...")
+        button_xpath = f"//a[contains(@href, '/{list_type}/') and (./div/span/span[contains(text(), '{list_type}') or contains(text(), '{list_type.capitalize()}')])]"
+        button_xpath_fallback = f"//a[contains(@href, '/{list_type}/') and (@role='link' or contains(., '{list_type}') or contains(., '{list_type.capitalize()}'))]"
 
-        # --- FIX START ---
-        # Changed behavior for TimeoutException: now it warns but proceeds
-        # General Exception still causes a skip for the current user.
-        profile_page_loaded_successfully = False
         try:
-            # Wait for the main profile header to load before trying to find buttons
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.XPATH, "//header//h2")))
-            print(f"    Profile page for {username} loaded.")
-            profile_page_loaded_successfully = True
+            list_button = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.XPATH, button_xpath))
+            )
         except TimeoutException:
-            # This is the specific change: Print warning, but DO NOT 'continue'.
-            # This allows the code to proceed and try clicking the follower/following buttons,
-            # as sometimes the header might not appear but the buttons are still interactive.
-            print(f"    ⚠️ Warning: Profile page for {username} header did not load in time. Attempting to proceed with button clicks anyway.")
-            profile_page_loaded_successfully = False # Mark as not fully loaded, but proceed
-        except Exception as e:
-            # For more critical errors that prevent any interaction with the profile, skip the user.
-            print(f"    ❌ Critical Error loading profile page for {username}: {e}. Skipping this user for current depth's button clicks.")
-            continue # Skip to the next seed_username if there's a fundamental issue with the profile page.
-        # --- FIX END ---
+            print(f"        Trying fallback XPath for {list_type} button...")
+            list_button = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.XPATH, button_xpath_fallback))
+            )
 
+        governor.pace("click")
+        driver.execute_script("arguments[0].click();", list_button)
+        print(f"    Clicked {list_type} button for {username}.")
 
-        # --- STEP 2: Scrape Followers ---
-        followers_scraped_successfully = False
-        try:
-            print(f"    Attempting to scrape followers for {username}...")
-            # --- NEW XPATH for Followers button ---
-            followers_button_xpath = "//a[contains(@href, '/followers/') and (./div/span/span[contains(text(), 'followers') or contains(text(), 'Followers')])]"
-            followers_button_xpath_fallback = "//a[contains(@href, '/followers/') and (@role='link' or contains(., 'followers') or contains(., 'Followers'))]"
+        # Call scroll_followers_popup to scroll using element-based method
+        collected_profiles = scroll_followers_popup(driver, scroll_attempts=SCROLL_ATTEMPTS_MAX)
 
-            followers_button = None
-            try:
-                followers_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, followers_button_xpath))
-                )
-            except TimeoutException:
-                print("        Trying fallback XPath for followers button...")
-                followers_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, followers_button_xpath_fallback))
-                )
+        # After scrolling is done, add any rows rendered since the last harvest
+        for visible_username, display_name in get_profiles_from_popup(driver).items():
+            if display_name or visible_username not in collected_profiles:
+                collected_profiles[visible_username] = display_name
+        print(f"    Collected {len(collected_profiles)} {list_type} for {username} after fixed scrolls.")
+        scraped_successfully = True
 
-            driver.execute_script("arguments[0].click();", followers_button)
-            print(f"    Clicked followers button for {username}.")
-            time.sleep(random.uniform(3, 6)) # Allow pop-up to load
+    except TimeoutException as e:
+        print(f"    ⚠️ Timeout: {list_type.capitalize()} button not found/clickable or pop-up not visible for {username}. Error: {e}")
+    except NoSuchElementException as e:
+        print(f"    ⚠️ Element not found: {list_type.capitalize()} button or pop-up element for {username}. Error: {e}")
+    except Exception as e:
+        print(f"    ❌ Error scraping {list_type} for {username}: {e}")
+    finally:
+        if scraped_successfully:
+            close_popup(driver)
 
-            # Call scroll_followers_popup to scroll using element-based method
-            scroll_followers_popup(driver, scroll_attempts=SCROLL_ATTEMPTS_MAX) 
+    return collected_profiles if scraped_successfully else None
 
-            # After scrolling is done, get the final list of unique usernames from the popup
-            followers_list = get_usernames_from_popup(driver)
-            print(f"    Collected {len(followers_list)} followers for {username} after fixed scrolls.")
 
-            # Filter and live-export profiles
-            processed_count_this_section = 0
-            for follower_username in followers_list:
-                if processed_count_this_section >= FOLLOWER_LIMIT:
-                    print(f"    Reached FOLLOWER_LIMIT ({FOLLOWER_LIMIT}) for profiles from this section.")
-                    break
+def expand_current_profile(driver, username):
+    """
+    Harvests the followers and following lists of the profile that is already loaded in the driver (STEP 2).
+    No navigation happens here, so it can run on the same page load that extracted the profile fields.
 
-                # Only perform light scrape and export if not already in the global scraped_usernames_set
-                # This prevents redundant work and duplicate exports.
-                if follower_username not in scraped_usernames_set:
-                    relevant_profile_data = light_scrape_and_filter_profile(driver, follower_username, config_from_main) # Pass config_from_main for keywords
-                    if relevant_profile_data:
-                        # Perform live export for this relevant profile.
-                        # The process_and_live_export_profile_func is responsible for adding
-                        # the profile's username to the scraped_usernames_set.
-                        process_and_live_export_profile_func(relevant_profile_data, config_from_main, scraped_usernames_set)
-                        next_level_seed_usernames.add(follower_username) # Add to next recursion seeds
-
-                processed_count_this_section += 1 
-            followers_scraped_successfully = True 
-
-        except TimeoutException as e:
-            print(f"    ⚠️ Timeout: Followers button not found/clickable or pop-up not visible for {username}. Error: {e}")
-        except NoSuchElementException as e:
-            print(f"    ⚠️ Element not found: Followers button or pop-up element for {username}. Error: {e}")
-        except Exception as e:
-            print(f"    ❌ Error scraping followers for {username}: {e}")
-        finally:
-            if followers_scraped_successfully: 
-                close_popup(driver)
-            time.sleep(random.uniform(DELAY_MIN, DELAY_MAX)) 
+    Returns:
+        dict: {"followers": {username: display_name}, "following": {username: display_name}}.
+              A list whose pop-up could not be harvested is left out, so it is not mistaken
+              for an empty one (e.g. cached as such by the graph store).
+    """
+    connections = {}
+    for list_type in ("followers", "following"):
+        harvested_profiles = scrape_connection_list(driver, username, list_type)
+        if harvested_profiles is not None:
+            connections[list_type] = harvested_profiles
+    return connections
 
 
-        # --- STEP 2: Scrape Following ---
-        # The logic here is similar to followers, ensuring it runs independently.
-        following_scraped_successfully = False
-        try:
-            print(f"    Attempting to scrape following for {username}...")
-            # --- NEW XPATH for Following button ---
-            following_button_xpath = "//a[contains(@href, '/following/') and (./div/span/span[contains(text(), 'following') or contains(text(), 'Following')])]"
-            following_button_xpath_fallback = "//a[contains(@href, '/following/') and (@role='link' or contains(., 'following') or contains(., 'Following'))]"
+def expand_profile(driver, username):
+    """
+    Loads a profile and harvests both its followers and following lists.
+    Only needed when the profile's fields were extracted on an earlier page load
+    (e.g. a resumed crawl that was interrupted mid-expansion).
 
-            following_button = None
-            try:
-                following_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, following_button_xpath))
-                )
-            except TimeoutException:
-                print("        Trying fallback XPath for following button...")
-                following_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, following_button_xpath_fallback))
+    Returns:
+        dict: As for expand_current_profile (empty if the profile page did not load).
+    """
+    if not open_profile_page(driver, username):
+        return {}
+    return expand_current_profile(driver, username)
+
+
+def harvest_connections(driver, username, graph_store=None, profile_loaded=True):
+    """
+    Returns the followers/following of `username`, from the graph store when its cached lists
+    are still fresh (no navigation, no pop-up scrolling), otherwise by scraping the pop-ups.
+    Freshly scraped lists are recorded in the graph store.
+
+    Args:
+        driver (WebDriver): The Selenium WebDriver session.
+        username (str): The account to expand.
+        graph_store (GraphStore, optional): Persistent follower/following graph.
+        profile_loaded (bool): True if the driver is already on the profile page.
+
+    Returns:
+        dict: As for expand_current_profile.
+    """
+    if graph_store is not None:
+        cached = graph_store.cached_connections(username)
+        if cached is not None:
+            print(f"    Using cached followers/following of @{username} "
+                  f"({len(cached['followers'])} / {len(cached['following'])}), no pop-up scrolling needed.")
+            return cached
+
+    if profile_loaded:
+        # Still on the profile page: open the dialogs without navigating again.
+        connections = expand_current_profile(driver, username)
+    else:
+        connections = expand_profile(driver, username)
+
+    if graph_store is not None:
+        graph_store.record_connections(username, connections)
+    return connections
+
+
+def visit_frontier_item(driver, item, frontier, process_and_live_export_profile_func, scrape_single_profile_function, config_from_main, scraped_usernames_set, rejection_cache=None, graph_store=None):
+    """
+    Single-pass visit of one claimed frontier item: the profile is loaded exactly once,
+    its fields are extracted, it is filtered (STEP 3), classified and live-exported, and,
+    if it qualifies and is within the configured recursion depth, its followers/following
+    are harvested on that same page load and queued for later visits (STEP 2).
+    The item is marked done in the frontier afterwards (checkpoint after every profile).
+
+    Args:
+        driver (WebDriver): The Selenium WebDriver session doing the visit.
+        item (dict): The row returned by `frontier.claim_next()`.
+        (remaining arguments as for scrape_followers_and_following)
+
+    Returns:
+        bool: True if the profile was accepted (relevant and exported).
+    """
+    settings = config_from_main.get("settings", {})
+    max_depth = settings.get("recursion_depth", RECURSION_DEPTH)
+    follower_limit = settings.get("follower_scrape_limit", FOLLOWER_LIMIT)
+    keywords = [kw.lower() for kw in config_from_main.get("keywords", [])]
+    prefilter_mode = settings.get("popup_prefilter_mode", "off")
+
+    username = item["username"]
+    depth = item["depth"]
+    accepted = bool(item["accepted"]) # True if accepted before a crash interrupted its expansion
+    parent_classification = item.get("classification")
+    connections = {}
+
+    if accepted:
+        # Fields were already exported by the interrupted run; only the expansion is left.
+        if depth <= max_depth:
+            print(f"    Resuming expansion of @{username} (Depth: {depth})")
+            connections = harvest_connections(driver, username, graph_store, profile_loaded=False)
+    elif depth > 0 and username in scraped_usernames_set:
+        # Already exported (in this run or, with global_dedup, an earlier one): no fetch and no second
+        # export. It was relevant, though, so it is still expanded (from the graph store when its lists
+        # are fresh), otherwise the crawl would stall wherever earlier runs already collected the graph.
+        if depth <= max_depth:
+            print(f"    @{username} was already collected; expanding its followers/following only (Depth: {depth})")
+            connections = harvest_connections(driver, username, graph_store, profile_loaded=False)
+    elif depth > 0 and rejection_cache is not None and rejection_cache.is_rejected(username):
+        pass # Rejected recently with the same keywords: skip without a page load
+    else:
+        # Single-pass visit: this is the only page load for this profile.
+        if depth == 0:
+            print(f"    Scraping full data for seed profile: {username}...")
+        profile_data = scrape_single_profile_function(driver, username)
+
+        if not profile_data:
+            print(f"    No profile data collected for {username}.")
+            progress.emit("error", username=username, depth=depth, message="no profile data collected")
+        elif depth == 0 or is_relevant_profile(profile_data, keywords):
+            # Seeds are always exported and expanded, without keyword filtering.
+            if depth > 0:
+                print(f"        '{username}' is relevant (matched keyword).")
+            # The process_and_live_export_profile_func is responsible for adding
+            # the profile's username to the scraped_usernames_set.
+            process_and_live_export_profile_func(profile_data, config_from_main, scraped_usernames_set)
+            # The export may run on another thread (pool mode), so classify a copy here
+            # to score this profile's connections without waiting for it.
+            parent_classification = profile_data.get("Classification") or classify_profile(dict(profile_data))
+            frontier.mark_accepted(username, parent_classification)
+            progress.emit("accepted", username=username, depth=depth, classification=parent_classification)
+            accepted = True
+
+            if depth <= max_depth:
+                print(f"    Processing followers/following for @{username} (Depth: {depth})")
+                # Fields from a backend that does not render the page (e.g. HTTP) leave the browser
+                # elsewhere: expanding then costs the profile's first and only page load (or none,
+                # when the graph store has fresh cached edges).
+                connections = harvest_connections(
+                    driver, username, graph_store,
+                    profile_loaded=getattr(scrape_single_profile_function, "leaves_profile_loaded", True)
                 )
+        elif rejection_cache is not None:
+            rejection_cache.record(username)
+
+    for list_type, harvested_profiles in connections.items():
+        # Score every candidate from its pop-up row before spending a page load on it, then keep
+        # the best follower_limit of them instead of an arbitrary cut of the pop-up order.
+        # Rows that the pre-filter rejects outright (e.g. obvious personal accounts) are never queued.
+        scored_candidates = []
+        prefiltered_count = 0
+        for candidate, display_name in harvested_profiles.items():
+            if candidate == username:
+                continue
+            # Collected candidates are queued too (their visit skips the fetch and export, see above),
+            # and were relevant already, so the pop-up pre-filter does not get to drop them.
+            if candidate not in scraped_usernames_set and prefilter_candidate(candidate, display_name, keywords, prefilter_mode) == REJECT:
+                prefiltered_count += 1
+                continue
+            scored_candidates.append((
+                candidate,
+                score_candidate(candidate, depth + 1, keywords, display_name=display_name, parent_classification=parent_classification)
+            ))
+        scored_candidates.sort(key=lambda scored: scored[1], reverse=True)
+        newly_queued = frontier.add_many(
+            scored_candidates[:follower_limit], depth + 1, parent=username, extra_parent_bonus=EXTRA_PARENT_BONUS
+        )
+        print(f"    Queued {newly_queued} new {list_type} of {username} for depth {depth + 1} "
+              f"({prefiltered_count} skipped from pop-up text alone).")
 
-            driver.execute_script("arguments[0].click();", following_button)
-            print(f"    Clicked following button for {username}.")
-            time.sleep(random.uniform(3, 6)) # Allow pop-up to load
+    # Checkpoint: this profile is finished and will not be revisited on resume.
+    frontier.mark_done(username, accepted)
+    progress.emit("visited", username=username, depth=depth, accepted=accepted)
+    drain_network_log(driver) # Keeps ChromeDriver's performance log small when resource blocking is on
+    return accepted
 
-            # Call scroll_followers_popup to scroll using element-based method
-            scroll_followers_popup(driver, scroll_attempts=SCROLL_ATTEMPTS_MAX) 
 
-            # After scrolling is done, get the final list of unique usernames from the popup
-            following_list = get_usernames_from_popup(driver)
-            print(f"    Collected {len(following_list)} following for {username} after fixed scrolls.")
+def scrape_followers_and_following(driver, frontier, process_and_live_export_profile_func, scrape_single_profile_function, config_from_main, scraped_usernames_set, rejection_cache=None, should_stop=None, graph_store=None):
+    """
+    Drains the persistent crawl frontier with a single browser session, giving every
+    queued username a single-pass visit (see visit_frontier_item).
 
-            # Filter and live-export profiles
-            processed_count_this_section = 0
-            for following_username in following_list:
-                if processed_count_this_section >= FOLLOWER_LIMIT:
-                    print(f"    Reached FOLLOWER_LIMIT ({FOLLOWER_LIMIT}) for profiles from this section.")
-                    break
+    The frontier replaces the old depth-by-depth recursion. Its state is checkpointed in
+    SQLite after every profile, so a killed run resumes from the next queued username
+    instead of re-visiting the seed followers from scratch.
 
-                # Only perform light scrape and export if not already in the global scraped_usernames_set
-                if following_username not in scraped_usernames_set:
-                    relevant_profile_data = light_scrape_and_filter_profile(driver, following_username, config_from_main) # Pass config_from_main
-                    if relevant_profile_data:
-                        # Perform live export for this relevant profile
-                        # The process_and_live_export_profile_func is responsible for adding
-                        # the profile's username to the scraped_usernames_set.
-                        process_and_live_export_profile_func(relevant_profile_data, config_from_main, scraped_usernames_set)
-                        next_level_seed_usernames.add(following_username) # Add to next recursion seeds
-
-                processed_count_this_section += 1 
-            following_scraped_successfully = True 
-
-        except TimeoutException as e:
-            print(f"    ⚠️ Timeout: Following button not found/clickable or pop-up not visible for {username}. Error: {e}")
-        except NoSuchElementException as e:
-            print(f"    ⚠️ Element not found: Following button or pop-up element for {username}. Error: {e}")
-        except Exception as e:
-            print(f"    ❌ Error scraping following for {username}: {e}")
-        finally:
-            if following_scraped_successfully: 
-                close_popup(driver)
-            time.sleep(random.uniform(DELAY_MIN, DELAY_MAX)) 
-
-
-    # Recursion: Scrape followers of newly found relevant profiles
-    if next_level_seed_usernames and current_depth < RECURSION_DEPTH:
-        print(f"\n    Recursion: Scraping followers of {len(next_level_seed_usernames)} newly found relevant profiles (Depth: {current_depth + 1})...")
-
-        # Pass the accumulated scraped_usernames_set to the next recursion level.
-        # This set is continuously updated by `process_and_live_export_profile_func`.
-        scrape_followers_and_following(
-            driver,
-            list(next_level_seed_usernames), 
-            process_and_live_export_profile_func, 
-            scrape_profiles_function,
-            config_from_main, 
-            current_depth + 1,
-            scraped_usernames_set # Pass the same, *mutated* set
+    Args:
+        driver (WebDriver): The Selenium WebDriver instance.
+        frontier (CrawlFrontier): The disk-backed frontier holding queued/in-flight/done usernames.
+                                  Seeds are queued at depth 0 by the caller.
+        process_and_live_export_profile_func (function): The function to call for live export.
+        scrape_single_profile_function (function): Loads one profile and returns its profile_data dict
+                                                   (scrape_single_profile_details, or a fetch backend
+                                                   from fetch_backends.create_profile_fetcher).
+        config_from_main (dict): The loaded configuration dictionary from main.py.
+        scraped_usernames_set (set): A set of all usernames already *fully processed and exported*.
+                                     This set is managed by the initial caller and updated by
+                                     `process_and_live_export_profile_func`.
+        rejection_cache (RejectionCache, optional): Persistent cache of profiles that already failed
+                                                    the keyword filter; they are skipped without a page load.
+        should_stop (function, optional): Checked before every claim; returning True ends the crawl early
+                                          (e.g. job deadline). Unvisited usernames stay queued for a resume.
+        graph_store (GraphStore, optional): Records every harvested follower/following edge, and serves
+                                            fresh cached lists instead of scrolling the pop-ups again.
+    Returns:
+        None: This function handles live export internally and does not return a list.
+    """
+    max_depth = config_from_main.get("settings", {}).get("recursion_depth", RECURSION_DEPTH)
+    print(f"\n✨ Crawling frontier (max recursion depth: {max_depth}, {frontier.pending_count()} username(s) pending).")
+
+    while True:
+        if should_stop is not None and should_stop():
+            print(f"⏹️ Stopping early: {frontier.pending_count()} username(s) left queued for a later resume.")
+            return
+        item = frontier.claim_next()
+        if item is None:
+            break
+        visit_frontier_item(
+            driver, item, frontier, process_and_live_export_profile_func, scrape_single_profile_function,
+            config_from_main, scraped_usernames_set, rejection_cache, graph_store
         )
 
-    return
\ No newline at end of file
+    print(f"✅ Frontier exhausted. {frontier.total_count()} username(s) visited in this crawl.")
+    if rejection_cache is not None:
+        print(f"    Skipped {rejection_cache.hits} page load(s) for profiles already rejected by the keyword filter.")
@@ -0,0 +1,281 @@
+import os
+import sqlite3
+import time
+import threading
+
+
+class CrawlFrontier:
+    """
+    Disk-backed crawl frontier stored in a small SQLite database.
+
+    Every username the crawler intends to visit is stored here together with the
+    depth it was discovered at, the profile it was discovered from and a priority score.
+    Queued usernames are handed out highest priority first (see candidate_scoring.py),
+    so with a fixed time budget the most promising candidates get the page loads.
+    Each row moves through three states:
+
+        queued     -> waiting to be visited
+        in_flight  -> currently being visited (claimed by the crawler)
+        done       -> visited; 'accepted' records whether it was relevant and exported
+
+    Every state change is committed immediately, so a crash, Chrome hang or job
+    timeout loses at most the profile that was in flight. On the next run,
+    `requeue_in_flight()` puts that profile back in the queue and the crawl
+    continues where it stopped.
+
+    All methods are thread-safe, so several browser sessions can share one frontier.
+    """
+
+    QUEUED = "queued"
+    IN_FLIGHT = "in_flight"
+    DONE = "done"
+
+    def __init__(self, db_path):
+        """
+        Opens (or creates) the frontier database.
+
+        Args:
+            db_path (str): Path to the SQLite file, e.g. "data/crawl_frontier.db".
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS frontier (
+                username   TEXT PRIMARY KEY,
+                depth      INTEGER NOT NULL,
+                parent     TEXT,
+                status     TEXT NOT NULL DEFAULT 'queued',
+                accepted   INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            )
+            """
+        )
+        # Columns added after the first frontier version; older databases are migrated in place.
+        existing_columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(frontier)")}
+        for column, definition in (
+            ("priority", "REAL NOT NULL DEFAULT 0"),
+            ("parent_count", "INTEGER NOT NULL DEFAULT 1"),
+            ("classification", "TEXT"),
+            ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+        ):
+            if column not in existing_columns:
+                self.conn.execute(f"ALTER TABLE frontier ADD COLUMN {column} {definition}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_status_depth ON frontier (status, depth)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_status_priority ON frontier (status, priority DESC)")
+        self.conn.commit()
+
+    def add(self, username, depth, parent=None, priority=0.0):
+        """
+        Queues a username if the frontier has never seen it before.
+        A username is only ever queued once, so the first discovery wins.
+
+        Returns:
+            bool: True if the username was newly queued, False if it was already known.
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO frontier (username, depth, parent, status, priority, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (username, depth, parent, self.QUEUED, priority, time.time())
+            )
+            self.conn.commit()
+            return cursor.rowcount > 0
+
+    def add_many(self, scored_usernames, depth, parent=None, extra_parent_bonus=0.0):
+        """
+        Queues several usernames discovered from the same parent in one transaction.
+
+        A candidate that is still queued when another relevant parent links to it again has
+        its parent count incremented, its priority raised to the better of the two scores,
+        and `extra_parent_bonus` added on top. If the new parent is shallower, the candidate
+        moves up to the new depth and records the new parent, so it can still be expanded.
+
+        Args:
+            scored_usernames (list): (username, priority) tuples.
+            depth (int): Depth to queue new usernames at.
+            parent (str, optional): The profile the usernames were harvested from.
+            extra_parent_bonus (float): Priority added per additional linking parent.
+
+        Returns:
+            int: How many of the usernames were newly queued.
+        """
+        with self._lock:
+            now = time.time()
+            added = 0
+            with self.conn:
+                for username, priority in scored_usernames:
+                    cursor = self.conn.execute(
+                        "INSERT OR IGNORE INTO frontier (username, depth, parent, status, priority, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (username, depth, parent, self.QUEUED, priority, now)
+                    )
+                    if cursor.rowcount:
+                        added += 1
+                    else:
+                        self.conn.execute(
+                            """
+                            UPDATE frontier
+                            SET parent_count = parent_count + 1,
+                                priority = MAX(priority, ?) + ?,
+                                parent = CASE WHEN ? < depth THEN ? ELSE parent END,
+                                depth = MIN(depth, ?),
+                                updated_at = ?
+                            WHERE username = ? AND status = ?
+                            """,
+                            (priority, extra_parent_bonus, depth, parent, depth, now, username, self.QUEUED)
+                        )
+            return added
+
+    def claim_next(self):
+        """
+        Marks the next queued username as in flight and returns it.
+        Usernames are handed out highest priority first, then lowest depth, then discovery order.
+
+        Returns:
+            dict or None: {"username", "depth", "parent", "accepted", "priority", "classification"}
+                          or None if nothing is queued.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT username, depth, parent, accepted, priority, classification FROM frontier "
+                "WHERE status = ? ORDER BY priority DESC, depth, rowid LIMIT 1",
+                (self.QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self.conn.execute(
+                "UPDATE frontier SET status = ?, updated_at = ? WHERE username = ?",
+                (self.IN_FLIGHT, time.time(), row["username"])
+            )
+            self.conn.commit()
+            return dict(row)
+
+    def peek_queued(self, limit):
+        """
+        Returns the usernames that claim_next would hand out next (up to `limit`), without claiming them.
+        Used to prefetch profiles ahead of the sessions that will visit them.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT username FROM frontier WHERE status = ? AND accepted = 0 ORDER BY priority DESC, depth, rowid LIMIT ?",
+                (self.QUEUED, limit)
+            ).fetchall()
+            return [row["username"] for row in rows]
+
+    def mark_accepted(self, username, classification=None):
+        """
+        Records that a profile passed the filter and was exported, before its expansion starts.
+        The classification is kept so a resumed expansion can still score the profile's connections.
+        """
+        with self._lock:
+            self.conn.execute(
+                "UPDATE frontier SET accepted = 1, classification = COALESCE(?, classification), updated_at = ? WHERE username = ?",
+                (classification, time.time(), username)
+            )
+            self.conn.commit()
+
+    def mark_done(self, username, accepted=None):
+        """
+        Marks a username as fully visited (checkpoint after every profile).
+
+        Args:
+            username (str): The username that was visited.
+            accepted (bool, optional): Whether the profile was relevant. Leaves the flag untouched if None.
+        """
+        with self._lock:
+            if accepted is None:
+                self.conn.execute(
+                    "UPDATE frontier SET status = ?, updated_at = ? WHERE username = ?",
+                    (self.DONE, time.time(), username)
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE frontier SET status = ?, accepted = ?, updated_at = ? WHERE username = ?",
+                    (self.DONE, int(bool(accepted)), time.time(), username)
+                )
+            self.conn.commit()
+
+    def requeue(self, username, max_attempts=None, count_attempt=True):
+        """
+        Puts a claimed username back in the queue after its visit failed, so it is retried later
+        instead of being dropped.
+
+        Args:
+            username (str): The username whose visit failed.
+            max_attempts (int, optional): Failed visits after which the username is given up on
+                                          and marked done instead. None retries indefinitely.
+            count_attempt (bool): False when the visit was interrupted rather than failed
+                                  (e.g. the profile limit was reached), so it costs no attempt.
+
+        Returns:
+            bool: True if the username was re-queued, False if it was given up on.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT attempts FROM frontier WHERE username = ?", (username,)).fetchone()
+            if row is None:
+                return False
+            attempts = row["attempts"] + (1 if count_attempt else 0)
+            if max_attempts is not None and attempts >= max_attempts:
+                status = self.DONE
+            else:
+                status = self.QUEUED
+            self.conn.execute(
+                "UPDATE frontier SET status = ?, attempts = ?, updated_at = ? WHERE username = ?",
+                (status, attempts, time.time(), username)
+            )
+            self.conn.commit()
+            return status == self.QUEUED
+
+    def requeue_in_flight(self):
+        """
+        Puts usernames that were in flight when the last run died back in the queue.
+
+        Returns:
+            int: Number of usernames re-queued.
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE frontier SET status = ?, updated_at = ? WHERE status = ?",
+                (self.QUEUED, time.time(), self.IN_FLIGHT)
+            )
+            self.conn.commit()
+            return cursor.rowcount
+
+    def accepted_usernames(self):
+        """Returns every username that has already been accepted and exported."""
+        with self._lock:
+            return [row["username"] for row in self.conn.execute("SELECT username FROM frontier WHERE accepted = 1")]
+
+    def pending_count(self):
+        """Returns how many usernames are still queued or in flight."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE status IN (?, ?)", (self.QUEUED, self.IN_FLIGHT)
+            ).fetchone()
+            return row[0]
+
+    def in_flight_count(self):
+        """Returns how many usernames are currently claimed by a crawler."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM frontier WHERE status = ?", (self.IN_FLIGHT,)).fetchone()[0]
+
+    def total_count(self):
+        """Returns how many usernames the frontier has ever seen."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+    def reset(self):
+        """Forgets the whole crawl so the next run starts from the seeds again."""
+        with self._lock:
+            self.conn.execute("DELETE FROM frontier")
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,418 @@
+import os
+import sys
+import json
+import heapq
+import mmap
+import sqlite3
+import threading
+import time
+from array import array
+
+try:
+    import fcntl # POSIX only; without it the edge log is only locked between threads of one process
+except ImportError:
+    fcntl = None
+
+try:
+    import numpy as np # Sorts the CSR edge keys in place; without it build_csr uses an external merge sort
+except ImportError:
+    np = None
+
+LIST_TYPES = ("followers", "following")
+SQLITE_MAX_VARIABLES = 900 # Stay below SQLite's bound-parameter limit in IN (...) lookups
+SORT_RUN_KEYS = 1 << 20 # Keys sorted in memory per run of the external sort (~50 MB of Python ints)
+
+
+class GraphStore:
+    """
+    Persistent follower/following graph harvested by the crawl.
+
+    - Usernames are interned to integer ids in SQLite (`nodes`, with the display name last
+      seen in a pop-up).
+    - Edges are never held as Python sets: every harvested list is appended to `edges.u32`,
+      an append-only file of 4-byte neighbor ids, and the `expansions` table records where the
+      latest block for (account, list type) starts, how long it is and when it was crawled.
+    - build_csr() compacts the latest blocks into memory-mapped CSR arrays (see CsrGraph)
+      for degree and mutual-connection queries over millions of edges.
+
+    Because each block is contiguous, the cached followers/following of an account are one
+    seek and one read, so a later crawl can expand an account without opening its pop-ups
+    while the cached lists are younger than max_age_hours.
+    Thread-safe, so pooled browser sessions can share one instance, and appends to the edge log
+    hold an exclusive file lock, so several processes (CLI runs, web app workers) can share one
+    graph_dir.
+    """
+
+    def __init__(self, graph_dir, max_age_hours=168):
+        """
+        Args:
+            graph_dir (str): Directory holding nodes.db, edges.u32 and the CSR files.
+            max_age_hours (float): Cached lists older than this are scraped again.
+        """
+        os.makedirs(graph_dir, exist_ok=True)
+        self.graph_dir = graph_dir
+        self.max_age_seconds = max_age_hours * 3600
+        self.cache_hits = 0 # Expansions served from the store during this run
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(os.path.join(graph_dir, "nodes.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS nodes (
+                id           INTEGER PRIMARY KEY,
+                username     TEXT NOT NULL UNIQUE,
+                display_name TEXT
+            );
+            CREATE TABLE IF NOT EXISTS expansions (
+                node_id     INTEGER NOT NULL,
+                list_type   TEXT NOT NULL,
+                log_offset  INTEGER NOT NULL, -- Position of the block in edges.u32, in ids
+                edge_count  INTEGER NOT NULL,
+                crawled_at  REAL NOT NULL,
+                PRIMARY KEY (node_id, list_type)
+            );
+            """
+        )
+        self.conn.commit()
+        self.edge_log_path = os.path.join(graph_dir, "edges.u32")
+        self._edge_log = open(self.edge_log_path, "ab")
+
+    # --- Interning ---
+
+    def intern_many(self, profiles):
+        """
+        Returns the ids of the given usernames, assigning new ids as needed.
+
+        Args:
+            profiles (dict): {username: display_name}; a non-empty display name replaces the stored one.
+
+        Returns:
+            list: ids in the order of `profiles`.
+        """
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO nodes (username, display_name) VALUES (?, ?) "
+                "ON CONFLICT(username) DO UPDATE SET display_name = COALESCE(NULLIF(excluded.display_name, ''), nodes.display_name)",
+                list(profiles.items())
+            )
+            ids_by_username = {}
+            usernames = list(profiles)
+            for start in range(0, len(usernames), SQLITE_MAX_VARIABLES):
+                chunk = usernames[start:start + SQLITE_MAX_VARIABLES]
+                ids_by_username.update(self.conn.execute(
+                    f"SELECT username, id FROM nodes WHERE username IN ({', '.join('?' for _ in chunk)})", chunk
+                ).fetchall())
+            return [ids_by_username[username] for username in usernames]
+
+    def node_id(self, username):
+        """Returns the id of a username, or None if it was never seen."""
+        with self._lock:
+            row = self.conn.execute("SELECT id FROM nodes WHERE username = ?", (username,)).fetchone()
+            return row[0] if row else None
+
+    def _profiles_for_ids(self, node_ids):
+        """Returns {username: display_name} for the given ids, in the ids' order."""
+        rows = {}
+        for start in range(0, len(node_ids), SQLITE_MAX_VARIABLES):
+            chunk = list(node_ids[start:start + SQLITE_MAX_VARIABLES])
+            for node_id, username, display_name in self.conn.execute(
+                f"SELECT id, username, display_name FROM nodes WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+            ):
+                rows[node_id] = (username, display_name or "")
+        return dict(rows[node_id] for node_id in node_ids if node_id in rows)
+
+    # --- Edges ---
+
+    def record_connections(self, username, connections):
+        """
+        Appends a freshly harvested followers/following list of `username` to the edge log.
+        A list type missing from `connections` (its pop-up could not be harvested) is not recorded.
+        An empty list is recorded as an expansion with no edges, so an account without followers
+        (or following) is served from the cache like any other.
+
+        Args:
+            username (str): The account that was expanded.
+            connections (dict): {"followers": {username: display_name}, "following": {...}}
+        """
+        with self._lock:
+            parent_id = self.intern_many({username: ""})[0]
+            for list_type in LIST_TYPES:
+                harvested = connections.get(list_type)
+                if harvested is None:
+                    continue
+                neighbor_ids = array("I", self.intern_many(harvested))
+                log_offset = self._append_block(neighbor_ids) if neighbor_ids else 0
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO expansions (node_id, list_type, log_offset, edge_count, crawled_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (parent_id, list_type, log_offset, len(neighbor_ids), time.time())
+                    )
+
+    def _append_block(self, neighbor_ids):
+        """
+        Appends one block of neighbor ids to the edge log and returns its offset (in ids).
+        The end of the file is read and written under an exclusive lock, so a block appended by
+        another process in between cannot shift the recorded offset.
+        """
+        if fcntl is not None:
+            fcntl.flock(self._edge_log, fcntl.LOCK_EX)
+        try:
+            self._edge_log.seek(0, os.SEEK_END)
+            log_offset = self._edge_log.tell() // neighbor_ids.itemsize
+            neighbor_ids.tofile(self._edge_log)
+            self._edge_log.flush() # Written out before the lock is released
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._edge_log, fcntl.LOCK_UN)
+        return log_offset
+
+    def _read_block(self, log_offset, edge_count):
+        neighbor_ids = array("I")
+        with open(self.edge_log_path, "rb") as edge_log:
+            edge_log.seek(log_offset * neighbor_ids.itemsize)
+            neighbor_ids.fromfile(edge_log, edge_count)
+        return neighbor_ids
+
+    def cached_connections(self, username):
+        """
+        Returns the stored followers/following of `username` in the same shape as
+        expand_current_profile, or None unless both lists were crawled within max_age_hours.
+        A list recorded as empty counts as crawled.
+        """
+        with self._lock:
+            node_id = self.node_id(username)
+            if node_id is None:
+                return None
+            rows = self.conn.execute(
+                "SELECT list_type, log_offset, edge_count FROM expansions WHERE node_id = ? AND crawled_at >= ?",
+                (node_id, time.time() - self.max_age_seconds)
+            ).fetchall()
+            if len(rows) < len(LIST_TYPES):
+                return None
+            connections = {}
+            for list_type, log_offset, edge_count in rows:
+                connections[list_type] = self._profiles_for_ids(self._read_block(log_offset, edge_count)) if edge_count else {}
+            self.cache_hits += 1
+            return connections
+
+    def build_csr(self):
+        """
+        Compacts the latest followers/following block of every expanded account into CSR arrays
+        (edges deduplicated, direction "follower -> followed account"), written next to the edge log.
+
+        Returns:
+            CsrGraph: The freshly built graph.
+        """
+        with self._lock:
+            node_count = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM nodes").fetchone()[0]
+            blocks = self.conn.execute("SELECT node_id, list_type, log_offset, edge_count FROM expansions").fetchall()
+
+            # One 64-bit key per edge (source << 32 | target) keeps the edge list compact while sorting
+            out_keys = array("Q")
+            for node_id, list_type, log_offset, edge_count in blocks:
+                for neighbor_id in self._read_block(log_offset, edge_count):
+                    if list_type == "followers":
+                        out_keys.append(neighbor_id << 32 | node_id) # neighbor follows node
+                    else:
+                        out_keys.append(node_id << 32 | neighbor_id) # node follows neighbor
+            # The keys are sorted in place (or externally) and de-duplicated as adjacent repeats;
+            # converting them to Python ints for sorted(set(...)) would cost ~100 bytes per edge.
+            if np is not None:
+                edge_count = self._write_csr_numpy(out_keys, node_count)
+            else:
+                edge_count = self._write_csr_external(out_keys, node_count)
+
+            with open(os.path.join(self.graph_dir, "csr_meta.json"), "w") as meta_file:
+                json.dump({"node_count": node_count, "edge_count": edge_count, "built_at": time.time()}, meta_file)
+        return CsrGraph(self.graph_dir)
+
+    def _csr_path(self, direction, kind):
+        return os.path.join(self.graph_dir, f"{direction}_{kind}")
+
+    def _write_csr_numpy(self, out_keys, node_count):
+        """Writes both CSR directions from `out_keys` (reused as the sort buffer). Returns the edge count."""
+        keys = np.frombuffer(out_keys, dtype=np.uint64) # Shares out_keys' memory
+        keys.sort()
+        if len(keys):
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))] # Drop adjacent repeats
+        shift, low_bits = np.uint64(32), np.uint64(0xFFFFFFFF)
+        for direction in ("out", "in"):
+            if direction == "in":
+                keys = (keys & low_bits) << shift | keys >> shift # (target, source): still unique
+                keys.sort()
+            offsets = np.zeros(node_count + 1, dtype=np.uint64)
+            np.cumsum(np.bincount((keys >> shift).astype(np.int64), minlength=node_count), out=offsets[1:])
+            offsets.tofile(self._csr_path(direction, "offsets.u64"))
+            (keys & low_bits).astype(np.uint32).tofile(self._csr_path(direction, "targets.u32"))
+        return len(keys)
+
+    def _write_csr_external(self, out_keys, node_count):
+        """Pure-Python fallback of _write_csr_numpy: external merge sort, ~16 bytes per edge at peak."""
+        keys = sorted_unique_keys(out_keys, self.graph_dir)
+        edge_count = len(keys)
+        for direction in ("out", "in"):
+            if direction == "in":
+                keys = sorted_unique_keys(array("Q", ((key & 0xFFFFFFFF) << 32 | key >> 32 for key in keys)), self.graph_dir)
+            offsets = array("Q", [0]) * (node_count + 1)
+            targets = array("I", (key & 0xFFFFFFFF for key in keys))
+            for key in keys:
+                offsets[(key >> 32) + 1] += 1
+            for index in range(1, node_count + 1):
+                offsets[index] += offsets[index - 1]
+            with open(self._csr_path(direction, "offsets.u64"), "wb") as offsets_file:
+                offsets.tofile(offsets_file)
+            with open(self._csr_path(direction, "targets.u32"), "wb") as targets_file:
+                targets.tofile(targets_file)
+        return edge_count
+
+    def close(self):
+        with self._lock:
+            if self.cache_hits:
+                print(f"🕸️ Graph store: {self.cache_hits} expansion(s) served from cached edges (no pop-up scrolling).")
+            self._edge_log.close()
+            self.conn.close()
+
+
+class CsrGraph:
+    """
+    Read-only, memory-mapped CSR view of the graph written by GraphStore.build_csr().
+
+    For node id v, out_targets[out_offsets[v]:out_offsets[v + 1]] are the accounts v follows
+    and in_targets[...] the accounts following v, each sorted by id. Opening maps the files
+    without reading them, and a degree query is two array lookups.
+    """
+
+    def __init__(self, graph_dir):
+        with open(os.path.join(graph_dir, "csr_meta.json")) as meta_file:
+            meta = json.load(meta_file)
+        self.node_count = meta["node_count"]
+        self.edge_count = meta["edge_count"]
+        self._maps = []
+        self.out_offsets = self._map(graph_dir, "out_offsets.u64", "Q")
+        self.out_targets = self._map(graph_dir, "out_targets.u32", "I")
+        self.in_offsets = self._map(graph_dir, "in_offsets.u64", "Q")
+        self.in_targets = self._map(graph_dir, "in_targets.u32", "I")
+
+    def _map(self, graph_dir, filename, typecode):
+        with open(os.path.join(graph_dir, filename), "rb") as array_file:
+            if os.fstat(array_file.fileno()).st_size == 0:
+                return array(typecode) # mmap cannot map an empty file
+            mapped = mmap.mmap(array_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(typecode)
+
+    def _neighbors(self, offsets, targets, node_id):
+        if node_id is None or node_id >= self.node_count:
+            return targets[0:0]
+        return targets[offsets[node_id]:offsets[node_id + 1]]
+
+    def following(self, node_id):
+        """Ids of the accounts node_id follows."""
+        return self._neighbors(self.out_offsets, self.out_targets, node_id)
+
+    def followers(self, node_id):
+        """Ids of the accounts following node_id."""
+        return self._neighbors(self.in_offsets, self.in_targets, node_id)
+
+    def out_degree(self, node_id):
+        return len(self.following(node_id))
+
+    def in_degree(self, node_id):
+        return len(self.followers(node_id))
+
+    def common_following(self, first_id, second_id):
+        """Ids followed by both accounts (sorted-list intersection, no sets of the full lists)."""
+        return sorted_intersection(self.following(first_id), self.following(second_id))
+
+    def common_followers(self, first_id, second_id):
+        """Ids following both accounts."""
+        return sorted_intersection(self.followers(first_id), self.followers(second_id))
+
+    def mutual_follows(self, node_id):
+        """Ids that node_id follows and that follow it back."""
+        return sorted_intersection(self.following(node_id), self.followers(node_id))
+
+    def close(self):
+        for view in (self.out_offsets, self.out_targets, self.in_offsets, self.in_targets):
+            if isinstance(view, memoryview):
+                view.release()
+        for mapped in self._maps:
+            mapped.close()
+
+
+def _read_sort_run(path, block_keys=65536):
+    """Yields the keys of one sorted run file, reading it in blocks."""
+    with open(path, "rb") as run_file:
+        while True:
+            block = array("Q")
+            try:
+                block.fromfile(run_file, block_keys)
+            except EOFError:
+                pass # Last, partial block
+            if not block:
+                return
+            yield from block
+
+
+def sorted_unique_keys(keys, temp_dir):
+    """
+    Returns the distinct values of an array("Q") in ascending order, as a new array("Q").
+
+    External merge sort: runs of SORT_RUN_KEYS keys are sorted and written to temporary files in
+    `temp_dir`, then merged while dropping adjacent repeats. `keys` is emptied along the way, so
+    peak memory stays near the input plus output arrays (16 bytes per key) plus one run.
+    """
+    run_paths = []
+    try:
+        while keys:
+            run = array("Q", sorted(keys[-SORT_RUN_KEYS:]))
+            del keys[-SORT_RUN_KEYS:] # Shrinks the input as the runs are written
+            run_path = os.path.join(temp_dir, f"sort_run_{os.getpid()}_{len(run_paths)}.tmp")
+            with open(run_path, "wb") as run_file:
+                run.tofile(run_file)
+            run_paths.append(run_path)
+        unique_keys = array("Q")
+        previous = None
+        for key in heapq.merge(*(_read_sort_run(path) for path in run_paths)):
+            if key != previous:
+                unique_keys.append(key)
+                previous = key
+        return unique_keys
+    finally:
+        for run_path in run_paths:
+            os.remove(run_path)
+
+
+def sorted_intersection(first, second):
+    """Intersects two ascending id sequences in one merge pass."""
+    common = []
+    first_index = second_index = 0
+    while first_index < len(first) and second_index < len(second):
+        first_value, second_value = first[first_index], second[second_index]
+        if first_value == second_value:
+            common.append(first_value)
+            first_index += 1
+            second_index += 1
+        elif first_value < second_value:
+            first_index += 1
+        else:
+            second_index += 1
+    return common
+
+
+if __name__ == "__main__":
+    # Compact the harvested edges into CSR arrays and print a short summary:
+    #   python -m scrapers.graph_store [graph_dir] [username ...]
+    graph_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "graph")
+    store = GraphStore(graph_dir)
+    started = time.time()
+    graph = store.build_csr()
+    print(f"✅ Built CSR graph: {graph.node_count} node(s), {graph.edge_count} edge(s) in {time.time() - started:.1f}s")
+    for username in sys.argv[2:]:
+        node_id = store.node_id(username)
+        print(f"    @{username}: {graph.in_degree(node_id)} follower(s), {graph.out_degree(node_id)} following, "
+              f"{len(graph.mutual_follows(node_id))} mutual")
+    graph.close()
+    store.close()
@@ -0,0 +1,87 @@
+import json
+
+# URL patterns (Chrome DevTools Network.setBlockedURLs syntax, '*' is a wildcard) per blockable resource type.
+RESOURCE_TYPE_PATTERNS = {
+    "image": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.heic*", "*.avif*"],
+    "media": ["*.mp4*", "*.m4s*", "*.m4a*", "*.webm*"],
+    "font": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*"],
+}
+
+# Rough average transfer size (bytes) of a blocked request per DevTools resource type,
+# used to estimate how much bandwidth blocking saved. Blocked requests never report a size.
+ESTIMATED_BYTES_PER_BLOCKED_REQUEST = {
+    "Image": 40_000,
+    "Media": 500_000,
+    "Font": 30_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+def blocked_url_patterns(block_resource_types, extra_patterns=None):
+    """Builds the Network.setBlockedURLs list for the given resource types plus any extra URL patterns."""
+    patterns = []
+    for resource_type in block_resource_types or []:
+        patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+    patterns.extend(extra_patterns or [])
+    return patterns
+
+
+class NetworkUsage:
+    """
+    Per-driver tally of network traffic, read from Chrome's performance log.
+
+    - transferred_bytes: encoded bytes of every request that completed
+    - blocked_requests: requests refused by the blocklist, per resource type
+    - estimated_saved_bytes: blocked requests times ESTIMATED_BYTES_PER_BLOCKED_REQUEST
+    """
+
+    def __init__(self):
+        self.transferred_bytes = 0
+        self.blocked_requests = {}
+        self.request_types = {} # requestId -> resource type, until the request finishes or fails
+
+    @property
+    def estimated_saved_bytes(self):
+        return sum(
+            count * ESTIMATED_BYTES_PER_BLOCKED_REQUEST.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+            for resource_type, count in self.blocked_requests.items()
+        )
+
+    def record(self, message):
+        """Updates the tally from one DevTools event ({"method": ..., "params": ...})."""
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            self.request_types[params.get("requestId")] = params.get("type", "Other")
+        elif method == "Network.loadingFinished":
+            self.transferred_bytes += int(params.get("encodedDataLength", 0))
+            self.request_types.pop(params.get("requestId"), None)
+        elif method == "Network.loadingFailed":
+            resource_type = self.request_types.pop(params.get("requestId"), params.get("type", "Other"))
+            if params.get("blockedReason"):
+                self.blocked_requests[resource_type] = self.blocked_requests.get(resource_type, 0) + 1
+
+    def summary(self):
+        blocked_count = sum(self.blocked_requests.values())
+        return (f"{self.transferred_bytes / 1_048_576:.1f} MB transferred, {blocked_count} request(s) blocked "
+                f"(~{self.estimated_saved_bytes / 1_048_576:.1f} MB saved)")
+
+
+def drain_network_log(driver):
+    """
+    Reads (and so clears) the driver's buffered performance log into driver.network_usage.
+    Call it regularly, e.g. once per visited profile, so ChromeDriver's log buffer stays small.
+    Does nothing for drivers started without resource blocking.
+    """
+    network_usage = getattr(driver, "network_usage", None)
+    if network_usage is None:
+        return
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return # Logging not available for this session
+    for entry in entries:
+        try:
+            network_usage.record(json.loads(entry["message"])["message"])
+        except (ValueError, KeyError, TypeError):
+            continue
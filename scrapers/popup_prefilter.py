@@ -0,0 +1,61 @@
+import re
+
+from scrapers.candidate_scoring import count_keyword_hits
+from scrapers.classifier import CLASSIFICATION_RULES
+
+ACCEPT = "accept"
+REJECT = "reject"
+DEFER = "defer"
+
+# Pre-filter modes (settings.popup_prefilter_mode in config.yaml):
+#   off           - every candidate is deferred to the normal profile-page filter
+#   skip_personal - candidates whose row looks like a private person are rejected without a page load
+#   keywords_only - only candidates with a keyword in their username or display name are visited
+PREFILTER_MODES = ("off", "skip_personal", "keywords_only")
+
+# A display name made of two to four plain words ("Maria Fernanda Lopez") is almost always a person.
+PERSONAL_NAME_PATTERN = re.compile(r"^[^\W\d_]+(?:[ '-][^\W\d_]+){1,3}$")
+
+# Words that hint at a business even when no configured keyword matches.
+BUSINESS_HINTS = sorted({
+    hint for hints in CLASSIFICATION_RULES.values() for hint in hints
+} | {"oficial", "official", "cell", "cel", "tech", "import", "store", "shop", "ventas", "phone", "fone"})
+
+
+def looks_personal(username, display_name):
+    """
+    Returns True if a pop-up row looks like a private person's account:
+    the display name is two to four capitalised plain words, and neither it nor the
+    username contains a business hint.
+    """
+    if not display_name or not PERSONAL_NAME_PATTERN.match(display_name.strip()):
+        return False
+    if not all(word[0].isupper() for word in re.split(r"[ '-]", display_name.strip()) if word):
+        return False
+    text = f"{username} {display_name}".lower()
+    return not any(hint in text for hint in BUSINESS_HINTS)
+
+
+def prefilter_candidate(username, display_name, keywords, mode="off"):
+    """
+    Decides from the pop-up row text alone whether a candidate is worth a page load.
+
+    Args:
+        username (str): The candidate's username.
+        display_name (str): The display name shown in the pop-up row ("" if none).
+        keywords (list): Lowercase keywords (the same list as LIGHT_SCRAPE_KEYWORDS).
+        mode (str): One of PREFILTER_MODES.
+
+    Returns:
+        str: ACCEPT (keyword hit, visit with priority), REJECT (skip without a page load)
+             or DEFER (let the profile-page filter decide).
+    """
+    if mode == "off":
+        return DEFER
+    if count_keyword_hits(username, keywords) or count_keyword_hits(display_name, keywords):
+        return ACCEPT
+    if mode == "keywords_only":
+        return REJECT
+    if mode == "skip_personal" and looks_personal(username, display_name):
+        return REJECT
+    return DEFER
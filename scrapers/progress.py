@@ -0,0 +1,117 @@
+import time
+import threading
+
+# Event types and the counter each one increments
+EVENT_COUNTERS = {
+    "visited": "visited",
+    "accepted": "accepted",
+    "exported": "exported",
+    "error": "errors",
+}
+
+
+class ProgressReporter:
+    """
+    Receives structured progress events from the crawler and keeps running counters
+    (profiles visited / accepted / exported, errors, current depth).
+
+    This base reporter only keeps the counters in memory; subclasses publish each event
+    somewhere the web app can read it (see RedisStreamReporter). Memory use is constant:
+    no event history is kept in the process.
+    """
+
+    def __init__(self):
+        self.counters = {counter: 0 for counter in EVENT_COUNTERS.values()}
+        self.current_depth = 0
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        """
+        Records one event.
+
+        Args:
+            event (str): "visited", "accepted", "exported", "error" or "status".
+            **fields: Event details, e.g. username="...", depth=2, message="...".
+        """
+        with self._lock:
+            counter = EVENT_COUNTERS.get(event)
+            if counter:
+                self.counters[counter] += 1
+            if fields.get("depth") is not None:
+                self.current_depth = fields["depth"]
+            snapshot = dict(self.counters, current_depth=self.current_depth)
+        self.publish(event, fields, snapshot)
+
+    def publish(self, event, fields, snapshot):
+        """Hook for subclasses; `snapshot` holds the counters after this event."""
+
+    def close(self):
+        pass
+
+
+class RedisStreamReporter(ProgressReporter):
+    """
+    Publishes every event to a capped Redis stream, plus a small summary hash that is
+    overwritten on each event:
+
+        scrape_job:<job_id>:events    XADD ... MAXLEN ~ maxlen  (live event log)
+        scrape_job:<job_id>:progress  HSET counters, current depth, last event
+
+    The stream keeps only the most recent `maxlen` events, so Redis memory stays bounded no
+    matter how long the job runs, and the dashboard reads progress with a single HGETALL.
+    Redis errors are reported once and otherwise ignored: progress must never stop a crawl.
+    """
+
+    def __init__(self, redis_connection, job_id, maxlen=1000, ttl_seconds=7 * 24 * 3600):
+        super().__init__()
+        self.redis = redis_connection
+        self.stream_key = events_stream_key(job_id)
+        self.summary_key = progress_hash_key(job_id)
+        self.maxlen = maxlen
+        self.ttl_seconds = ttl_seconds
+        self._warned = False
+
+    def publish(self, event, fields, snapshot):
+        now = time.time()
+        entry = {"event": event, "ts": f"{now:.3f}"}
+        entry.update({key: "" if value is None else str(value) for key, value in fields.items()})
+        summary = dict(snapshot, last_event=event, updated_at=f"{now:.3f}")
+        if event == "status":
+            summary["status"] = str(fields.get("status", ""))
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.xadd(self.stream_key, entry, maxlen=self.maxlen, approximate=True)
+            pipe.hset(self.summary_key, mapping=summary)
+            pipe.expire(self.stream_key, self.ttl_seconds)
+            pipe.expire(self.summary_key, self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            if not self._warned:
+                print(f"⚠️ Could not publish progress to Redis: {e}. Continuing without live progress.")
+                self._warned = True
+
+
+def events_stream_key(job_id):
+    return f"scrape_job:{job_id}:events"
+
+
+def progress_hash_key(job_id):
+    return f"scrape_job:{job_id}:progress"
+
+
+# Reporter of the crawl currently running in this process (run_crawl installs one per crawl).
+reporter = ProgressReporter()
+
+
+def set_reporter(new_reporter):
+    """Installs `new_reporter` (None restores the in-memory default) and returns the previous one."""
+    global reporter
+    previous = reporter
+    reporter = new_reporter if new_reporter is not None else ProgressReporter()
+    return previous
+
+
+def emit(event, **fields):
+    """Sends an event to the current reporter. See ProgressReporter.emit."""
+    reporter.emit(event, **fields)
+
@@ -0,0 +1,264 @@
+import time
+import random
+import threading
+from collections import deque
+from contextlib import contextmanager
+import yaml
+
+# Load configuration settings
+try:
+    with open("config.yaml", "r") as config_file:
+        config = yaml.safe_load(config_file)
+except FileNotFoundError:
+    print("Error: config.yaml not found in rate_governor.py. Using default pacing.")
+    config = {"settings": {"delay_min": 5, "delay_max": 10}} # Fallback defaults
+
+# Page texts and URL fragments that mean Instagram is pushing back.
+THROTTLE_TEXT_SIGNALS = [
+    "please wait a few minutes before you try again",
+    "try again later",
+    "we restrict certain activity",
+    "we limit how often you can do certain things",
+    "suspicious activity",
+]
+THROTTLE_URL_SIGNALS = ["/challenge/", "/accounts/suspended", "/accounts/login"]
+
+# Actions that hit Instagram's servers. Only these consume rate tokens and count towards hourly caps;
+# the others (bio expansion, closing a dialog) are purely local UI waits. Pop-up scrolls are left
+# out too: each one waits for its rows to load, and that load time (observe_latency) paces them.
+NETWORK_ACTIONS = {"navigate", "click", "login", "fetch"}
+
+
+class TokenBucket:
+    """Tokens refilled at `per_minute` (times a rate scale), holding at most `burst`. Not locked itself."""
+
+    def __init__(self, per_minute, burst):
+        self.refill_per_second = per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+
+    def refill(self, now, rate_scale=1.0):
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.refill_per_second * rate_scale)
+        self.last_refill = now
+
+    def seconds_until_token(self, rate_scale=1.0):
+        """0 if a token is available now, else how long the refill takes to provide one."""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / (self.refill_per_second * rate_scale)
+
+
+class RateGovernor:
+    """
+    Single pacing component that every scraper action goes through.
+
+    - Token bucket: network actions need a token; tokens refill at `actions_per_minute` divided
+      by the current speed factor, with room for a small `burst`. Each pooled browser session
+      (see `session()`) has its own bucket, so N sessions get N times the rate; every other
+      thread shares one default bucket.
+    - Global ceiling: with `max_total_actions_per_minute`, network actions also take a token from
+      one bucket shared by every session, capping the pool's total rate.
+    - Jitter: every action also waits a random delay from its configured range, scaled by the
+      current speed factor, so the timing never looks mechanical.
+    - Adaptive speed: each healthy page check lowers the speed factor (shorter delays, faster
+      refill) down to `min_speed_factor`; each throttling signal doubles it up to
+      `max_speed_factor` (longer delays, slower refill) and triggers an exponential back-off pause.
+      The sustained rate therefore stays between actions_per_minute / max_speed_factor and
+      actions_per_minute / min_speed_factor.
+    - Hourly caps: `hourly_caps` limits how many actions of a type run in any rolling hour.
+    - Load latency: callers that wait on a condition (e.g. new pop-up rows after a scroll) report
+      how long the content took with `observe_latency`. Loads slower than `slow_load_seconds`
+      nudge the speed factor up without a back-off pause, since slow responses usually come
+      right before hard throttling.
+
+    All methods are thread-safe. The speed factor, back-off, hourly caps and global ceiling are
+    shared by every session, since Instagram's pushback applies to the whole account.
+    """
+
+    def __init__(self, action_delays, actions_per_minute=20, burst=3, hourly_caps=None,
+                 min_speed_factor=0.5, max_speed_factor=4.0, speedup_step=0.95,
+                 backoff_base_seconds=60, backoff_max_seconds=1800, slow_load_seconds=4.0,
+                 max_total_actions_per_minute=None):
+        self.action_delays = action_delays
+        self.actions_per_minute = actions_per_minute
+        self.burst = burst
+        self.default_bucket = TokenBucket(actions_per_minute, burst)
+        self.ceiling_bucket = TokenBucket(max_total_actions_per_minute, burst) if max_total_actions_per_minute else None
+        self._session_state = threading.local() # .bucket of the session running in this thread
+        self.hourly_caps = hourly_caps or {}
+        self.action_history = {action: deque() for action in self.hourly_caps}
+        self.min_speed_factor = min_speed_factor
+        self.max_speed_factor = max_speed_factor
+        self.speedup_step = speedup_step
+        self.speed_factor = 1.0
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.consecutive_throttles = 0
+        self.slow_load_seconds = slow_load_seconds
+        self.latency_average = {} # action -> exponentially weighted average load latency in seconds
+        self.total_sleep_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Builds a governor from the 'rate_governor' section of config.yaml."""
+        settings = config.get("settings", {})
+        governor_settings = config.get("rate_governor", {}) or {}
+        action_delays = {
+            "navigate": (settings.get("delay_min", 5), settings.get("delay_max", 10)),
+            "click": (3, 6),
+            "scroll": (0.5, 1.5), # Only the human-like pause; loading is awaited by the caller
+            "popup_close": (2, 4),
+            "ui_dismiss": (1, 2), # Dismissing in-page dialogs such as the post-login prompts
+            "login": (5, 10),
+            "fetch": (0.5, 1.5), # HTTP profile fetches (no page render to wait for)
+        }
+        for action, delay_range in (governor_settings.get("action_delays") or {}).items():
+            action_delays[action] = tuple(delay_range)
+
+        return cls(
+            action_delays,
+            actions_per_minute=governor_settings.get("actions_per_minute", 20),
+            burst=governor_settings.get("burst", 3),
+            hourly_caps=governor_settings.get("hourly_caps", {"navigate": 400}),
+            min_speed_factor=governor_settings.get("min_speed_factor", 0.5),
+            max_speed_factor=governor_settings.get("max_speed_factor", 4.0),
+            backoff_base_seconds=governor_settings.get("backoff_base_seconds", 60),
+            backoff_max_seconds=governor_settings.get("backoff_max_seconds", 1800),
+            slow_load_seconds=governor_settings.get("slow_load_seconds", 4.0),
+            max_total_actions_per_minute=governor_settings.get("max_total_actions_per_minute"),
+        )
+
+    @contextmanager
+    def session(self):
+        """
+        Gives the calling thread its own token bucket (actions_per_minute, burst) while the
+        block runs. Pooled browser sessions wrap their whole run in it.
+        """
+        self._session_state.bucket = TokenBucket(self.actions_per_minute, self.burst)
+        try:
+            yield self
+        finally:
+            del self._session_state.bucket
+
+    def _sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+            with self._lock:
+                self.total_sleep_seconds += seconds
+
+    def _take_token(self):
+        """Waits until a token is available (in this session's bucket and the global ceiling) and consumes it."""
+        bucket = getattr(self._session_state, "bucket", self.default_bucket)
+        while True:
+            with self._lock:
+                # Healthy responses (speed factor < 1) refill faster than the baseline, throttling slower
+                rate_scale = 1.0 / self.speed_factor
+                now = time.monotonic()
+                bucket.refill(now, rate_scale)
+                wait_seconds = bucket.seconds_until_token(rate_scale)
+                if self.ceiling_bucket is not None:
+                    self.ceiling_bucket.refill(now) # The ceiling is a fixed cap, never sped up
+                    wait_seconds = max(wait_seconds, self.ceiling_bucket.seconds_until_token())
+                if wait_seconds == 0:
+                    bucket.tokens -= 1
+                    if self.ceiling_bucket is not None:
+                        self.ceiling_bucket.tokens -= 1
+                    return
+            self._sleep(wait_seconds)
+
+    def _respect_hourly_cap(self, action):
+        """Waits until running one more `action` keeps it under its rolling hourly cap."""
+        cap = self.hourly_caps.get(action)
+        if not cap:
+            return
+        while True:
+            with self._lock:
+                history = self.action_history[action]
+                now = time.monotonic()
+                while history and now - history[0] > 3600:
+                    history.popleft()
+                if len(history) < cap:
+                    history.append(now)
+                    return
+                wait_seconds = 3600 - (now - history[0]) + 1
+            print(f"    ⏸️ Hourly cap of {cap} '{action}' actions reached. Pausing for {wait_seconds / 60:.1f} minutes.")
+            self._sleep(wait_seconds)
+
+    def pace(self, action):
+        """
+        Blocks until `action` may run. Call it right before the action.
+
+        Args:
+            action (str): One of the keys of action_delays, e.g. "navigate", "click", "scroll".
+                Only NETWORK_ACTIONS take a rate token; the others just wait their jittered delay.
+        """
+        if action in NETWORK_ACTIONS:
+            self._respect_hourly_cap(action)
+            self._take_token()
+        delay_min, delay_max = self.action_delays.get(action, self.action_delays["navigate"])
+        with self._lock:
+            speed_factor = self.speed_factor
+        self._sleep(random.uniform(delay_min, delay_max) * speed_factor)
+
+    def report_ok(self):
+        """Records a healthy response: pacing speeds up a little."""
+        with self._lock:
+            self.consecutive_throttles = 0
+            self.speed_factor = max(self.min_speed_factor, self.speed_factor * self.speedup_step)
+
+    def report_throttled(self, reason=""):
+        """Records a throttling signal: pacing slows down and the caller backs off exponentially."""
+        with self._lock:
+            self.consecutive_throttles += 1
+            self.speed_factor = min(self.max_speed_factor, self.speed_factor * 2)
+            backoff_seconds = min(
+                self.backoff_max_seconds,
+                self.backoff_base_seconds * (2 ** (self.consecutive_throttles - 1))
+            )
+            backoff_seconds *= random.uniform(0.8, 1.2)
+        print(f"    🐢 Throttling detected ({reason or 'unknown signal'}). Backing off for {backoff_seconds:.0f}s "
+              f"(speed factor now {self.speed_factor:.2f}).")
+        self._sleep(backoff_seconds)
+
+    def observe_latency(self, action, seconds):
+        """
+        Records how long the content triggered by `action` took to appear.
+
+        Args:
+            action (str): The action that triggered the load, e.g. "scroll".
+            seconds (float): Observed load time. Pass the wait's upper bound if nothing loaded.
+        """
+        with self._lock:
+            previous = self.latency_average.get(action)
+            self.latency_average[action] = seconds if previous is None else 0.8 * previous + 0.2 * seconds
+            if seconds > self.slow_load_seconds:
+                self.speed_factor = min(self.max_speed_factor, self.speed_factor * 1.25)
+
+    def check_page(self, driver):
+        """
+        Looks at the page currently loaded in the driver for signs of throttling and reports
+        the outcome. Reads only the current URL and the first part of the page text, so it is
+        a single cheap round trip.
+
+        Returns:
+            bool: True if the page looks healthy, False if Instagram is pushing back.
+        """
+        try:
+            current_url = driver.current_url
+            page_text = driver.execute_script(
+                "return document.body ? document.body.innerText.slice(0, 2000) : '';"
+            ) or ""
+        except Exception:
+            return True # Can't tell; don't punish pacing for a driver hiccup
+
+        url_signal = next((signal for signal in THROTTLE_URL_SIGNALS if signal in current_url), None)
+        text_signal = next((signal for signal in THROTTLE_TEXT_SIGNALS if signal in page_text.lower()), None)
+        if url_signal or text_signal:
+            self.report_throttled(url_signal or text_signal)
+            return False
+        self.report_ok()
+        return True
+
+
+# One governor per process, built from config.yaml.
+governor = RateGovernor.from_config(config)
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import time
+import hashlib
+import threading
+
+
+def keyword_set_hash(keywords):
+    """
+    Returns a short, order-independent fingerprint of a keyword list.
+    A rejection is only valid for the keyword set it was made with: adding a keyword
+    to config.yaml changes the hash, so previously rejected profiles get re-checked.
+    """
+    normalized = sorted({kw.strip().lower() for kw in keywords if kw and kw.strip()})
+    return hashlib.sha1("\n".join(normalized).encode("utf-8")).hexdigest()[:16]
+
+
+class RejectionCache:
+    """
+    Persistent "seen and rejected" cache for profiles that failed the keyword filter.
+
+    Irrelevant accounts tend to show up in many followers/following lists. Without this
+    cache each appearance costs a full page load plus the scraper's random delays.
+    Entries are keyed by (username, keyword set hash) and expire after `ttl_hours`, so
+    accounts that later rewrite their bio eventually get another look.
+    The cache lives in its own SQLite file, so it is shared across depths and across runs.
+    It is thread-safe, so pooled browser sessions can share one instance.
+    """
+
+    def __init__(self, db_path, keywords, ttl_hours=168):
+        """
+        Args:
+            db_path (str): Path to the SQLite file, e.g. "data/rejected_profiles.db".
+            keywords (list): The keyword list used by the light filter.
+            ttl_hours (float): How long a rejection stays valid.
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.db_path = db_path
+        self.keyword_hash = keyword_set_hash(keywords)
+        self.ttl_seconds = ttl_hours * 3600
+        self.hits = 0 # Page loads avoided during this run
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rejected_profiles (
+                username     TEXT NOT NULL,
+                keyword_hash TEXT NOT NULL,
+                rejected_at  REAL NOT NULL,
+                PRIMARY KEY (username, keyword_hash)
+            )
+            """
+        )
+        self.conn.commit()
+        self.purge_expired()
+
+    def is_rejected(self, username, count_hit=True):
+        """
+        Returns True if the username was rejected with the current keyword set within the TTL.
+        Pass count_hit=False for lookups that do not save a page load (e.g. prefetch filtering).
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT rejected_at FROM rejected_profiles WHERE username = ? AND keyword_hash = ?",
+                (username, self.keyword_hash)
+            ).fetchone()
+            if row is None or time.time() - row[0] > self.ttl_seconds:
+                return False
+            if count_hit:
+                self.hits += 1
+            return True
+
+    def record(self, username):
+        """Remembers that the username failed the keyword filter."""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO rejected_profiles (username, keyword_hash, rejected_at) VALUES (?, ?, ?)",
+                (username, self.keyword_hash, time.time())
+            )
+            self.conn.commit()
+
+    def purge_expired(self):
+        """Deletes expired rejections. Returns how many rows were removed."""
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM rejected_profiles WHERE rejected_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,99 @@
+"""
+Tests for the cross-run collected-username index: the memory-mapped Bloom filter and its exact SQLite store.
+
+Run from the project root:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from scrapers.collected_index import BLOOM_HEADER, CollectedUsernames, MmapBloomFilter, bloom_parameters
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return os.path.join(tmp_path, "collected.bloom"), os.path.join(tmp_path, "collected.db")
+
+
+def test_bloom_parameters_match_the_documented_sizing():
+    num_bits, num_hashes = bloom_parameters(10_000_000, 0.05)
+    assert num_bits % 8 == 0
+    assert 7_000_000 < num_bits // 8 < 8_000_000 # ~7.4 MB
+    assert num_hashes == 4
+
+
+def test_bloom_filter_has_no_false_negatives_and_persists(tmp_path):
+    path = os.path.join(tmp_path, "filter.bloom")
+    bloom = MmapBloomFilter(path, capacity=1000, error_rate=0.01)
+    assert bloom.created
+    for index in range(500):
+        bloom.add(f"user_{index}")
+    bloom.close()
+
+    reopened = MmapBloomFilter(path, capacity=1000, error_rate=0.01)
+    try:
+        assert not reopened.created
+        assert all(f"user_{index}" in reopened for index in range(500))
+        false_positives = sum(f"other_{index}" in reopened for index in range(2000))
+        assert false_positives < 100 # 1% target; generous bound
+    finally:
+        reopened.close()
+    assert os.path.getsize(path) == BLOOM_HEADER.size + bloom.num_bits // 8
+
+
+def test_bloom_filter_is_recreated_when_resized(tmp_path):
+    path = os.path.join(tmp_path, "filter.bloom")
+    MmapBloomFilter(path, capacity=1000, error_rate=0.01).close()
+
+    resized = MmapBloomFilter(path, capacity=5000, error_rate=0.01)
+    try:
+        assert resized.created
+    finally:
+        resized.close()
+
+
+def test_collected_usernames_are_remembered_across_runs(paths):
+    first_run = CollectedUsernames(*paths, capacity=1000, source="cli")
+    first_run.update(["shop_a", "shop_b"])
+    assert "shop_a" in first_run
+    assert len(first_run) == 2
+    first_run.close()
+
+    second_run = CollectedUsernames(*paths, capacity=1000, source="job_7")
+    try:
+        assert "shop_a" in second_run
+        assert "shop_b" in second_run
+        assert "never_seen" not in second_run
+        sources = dict(second_run.conn.execute("SELECT username, source FROM collected_usernames"))
+        assert sources == {"shop_a": "cli", "shop_b": "cli"}
+    finally:
+        second_run.close()
+
+
+def test_filter_false_positives_are_resolved_by_the_exact_store(paths):
+    index = CollectedUsernames(*paths, capacity=1000)
+    try:
+        # Saturate the filter so every lookup is a "maybe" and has to be confirmed in SQLite
+        index.bloom.mm[BLOOM_HEADER.size:] = b"\xff" * (index.bloom.num_bits // 8)
+        assert "never_collected" not in index
+        assert index.exact_lookups == 1
+        assert index.false_positives == 1
+    finally:
+        index.close()
+
+
+def test_missing_filter_is_rebuilt_from_the_exact_store(paths):
+    bloom_path, _ = paths
+    index = CollectedUsernames(*paths, capacity=1000)
+    index.update(["shop_a", "shop_b"])
+    index.close()
+    os.remove(bloom_path)
+
+    rebuilt = CollectedUsernames(*paths, capacity=1000)
+    try:
+        assert "shop_a" in rebuilt.bloom
+        assert "shop_b" in rebuilt
+        assert rebuilt.false_positives == 0
+    finally:
+        rebuilt.close()
@@ -0,0 +1,101 @@
+"""
+Tests for the live exporter's building blocks: count parsing, the Parquet part writer and the SQLite lead store.
+
+Run from the project root:
+    python -m pytest tests
+"""
+import os
+import sqlite3
+
+import pytest
+
+exporter = pytest.importorskip("exporter") # Skips where the export dependencies (pandas, gspread, ...) are missing
+
+
+@pytest.mark.parametrize("shown, expected", [
+    ("1,234", 1234),
+    ("12.9K", 12900),
+    ("12,9k", 12900),
+    ("1.2M", 1200000),
+    ("3b", 3000000000),
+    ("1.234", 1234), # Thousands separator without a suffix
+    (" 987 ", 987),
+    (42, 42),
+    ("", None),
+    (None, None),
+    ("many", None),
+])
+def test_parse_count(shown, expected):
+    assert exporter.parse_count(shown) == expected
+
+
+def part_files(root_dir):
+    return sorted(
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(root_dir) for name in names if name.endswith(".parquet")
+    )
+
+
+def test_parquet_parts_are_readable_once_finished(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.dataset as ds
+
+    root_dir = str(tmp_path)
+    writer = exporter.ParquetPartitionWriter(root_dir, "job_1", row_group_size=1, seconds_per_part=3600)
+    writer.write_rows([
+        {"Username": "shop_a", "Classification": "Retailer", "Follower Count": "12.9K"},
+        {"Username": "shop_b", "Classification": "Distributor", "Follower Count": "1,234"},
+    ])
+    # Open parts keep a dot-prefixed name, which dataset readers skip
+    assert all(os.path.basename(path).startswith(".") for path in part_files(root_dir))
+    assert ds.dataset(root_dir, partitioning="hive").count_rows() == 0
+
+    writer.close()
+    assert len(writer.written_paths) == 2
+    table = ds.dataset(root_dir, partitioning="hive").to_table()
+    rows = {row["Username"]: row for row in table.to_pylist()}
+    assert rows["shop_a"]["Follower Count"] == 12900
+    assert rows["shop_b"]["Classification"] == "Distributor"
+
+
+def test_parquet_parts_roll_over_on_the_time_bound(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.dataset as ds
+
+    root_dir = str(tmp_path)
+    writer = exporter.ParquetPartitionWriter(root_dir, "job_1", seconds_per_part=3600)
+    writer.write_rows([{"Username": "shop_a", "Classification": "Retailer"}])
+    writer._part_started["Retailer"] -= 3600 # The part has been open for the whole bound
+    writer.finish_due_parts()
+
+    # The finished part is complete on disk even though the writer was never closed
+    assert len(writer.written_paths) == 1
+    assert ds.dataset(root_dir, partitioning="hive").count_rows() == 1
+
+    writer.write_rows([{"Username": "shop_b", "Classification": "Retailer"}])
+    writer.close()
+    assert len(writer.written_paths) == 2
+    assert ds.dataset(root_dir, partitioning="hive").count_rows() == 2
+
+
+def test_lead_store_upserts_one_row_per_username(tmp_path):
+    db_path = os.path.join(tmp_path, "leads.db")
+    first_run = exporter.SqliteLeadStore(db_path, run_id="run_1")
+    first_run.upsert_rows([
+        {"Username": "shop_a", "Full Name": "Shop A", "Follower Count": "12.9K", "Classification": "Retailer"},
+        {"Username": "", "Full Name": "no username, skipped"},
+    ])
+    first_run.close()
+
+    second_run = exporter.SqliteLeadStore(db_path, run_id="run_2")
+    second_run.upsert_rows([{"Username": "shop_a", "Full Name": "Shop A Oficial", "Follower Count": "13K", "Classification": "Retailer"}])
+    second_run.close()
+
+    connection = sqlite3.connect(db_path)
+    try:
+        rows = connection.execute(
+            "SELECT username, full_name, follower_count, seen_count, last_run_id, first_seen <= last_seen FROM leads"
+        ).fetchall()
+    finally:
+        connection.close()
+    assert rows == [("shop_a", "Shop A Oficial", 13000, 2, "run_2", 1)]
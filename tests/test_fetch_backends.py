@@ -0,0 +1,148 @@
+"""
+Tests for the HTTP fetch backend against a local stub server that replays recorded profile JSON.
+
+Run from the project root:
+    python -m pytest tests
+"""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+pytest.importorskip("requests") # The HTTP backend itself; no browser or Selenium is needed
+
+from scrapers import fetch_backends
+from scrapers.fetch_backends import HttpProfileFetcher, PROFILE_INFO_PATH
+from scrapers.rate_governor import RateGovernor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "profile_info")
+
+
+class RecordedProfileHandler(BaseHTTPRequestHandler):
+    """Serves fixtures/profile_info/<username>.json for PROFILE_INFO_PATH; unknown usernames get a 404."""
+
+    requested_usernames = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        username = parse_qs(url.query).get("username", [""])[0]
+        self.requested_usernames.append(username)
+        fixture_path = os.path.join(FIXTURES_DIR, f"{username}.json")
+        if url.path != PROFILE_INFO_PATH or not os.path.exists(fixture_path):
+            self.send_response(404)
+            self.end_headers()
+            return
+        with open(fixture_path, "rb") as fixture_file:
+            body = fixture_file.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Keep the test output clean
+
+
+@pytest.fixture
+def stub_server():
+    RecordedProfileHandler.requested_usernames = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordedProfileHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_governor(monkeypatch):
+    # Real pacing would wait seconds between requests; the stub server needs none.
+    monkeypatch.setattr(fetch_backends, "governor", RateGovernor(
+        {"navigate": (0, 0), "fetch": (0, 0)}, actions_per_minute=6000, burst=100, backoff_base_seconds=0
+    ))
+
+
+def make_fetcher(base_url, fallback_calls=None):
+    def fallback(driver, username):
+        fallback_calls.append(username)
+        return {"Username": username, "Bio": "rendered in the browser"}
+
+    return HttpProfileFetcher(base_url=base_url, fallback_function=fallback if fallback_calls is not None else None)
+
+
+def test_fetch_maps_recorded_json_onto_profile_data(stub_server):
+    fetcher = make_fetcher(stub_server)
+    try:
+        profile_data = fetcher.fetch(None, "celulares_mayorista_co")
+    finally:
+        fetcher.close()
+
+    assert profile_data["Username"] == "celulares_mayorista_co"
+    assert profile_data["Full Name"] == "Celulares Mayorista CO"
+    assert profile_data["Follower Count"] == "12900"
+    assert profile_data["Following Count"] == "310"
+    assert profile_data["External Link"] == "https://wa.me/573001234567"
+    assert profile_data["WhatsApp Number"].endswith("3001234567")
+    assert profile_data["Profile URL"] == "https://www.instagram.com/celulares_mayorista_co/"
+    assert not fetcher.leaves_profile_loaded
+
+
+def test_fetch_drops_instagram_external_links(stub_server):
+    fetcher = make_fetcher(stub_server)
+    try:
+        profile_data = fetcher.fetch(None, "meta_link_shop")
+    finally:
+        fetcher.close()
+
+    assert profile_data["External Link"] == ""
+    assert profile_data["Bio"] == "Tienda de accesorios"
+
+
+def test_missing_profile_returns_none_without_fallback(stub_server):
+    fallback_calls = []
+    fetcher = make_fetcher(stub_server, fallback_calls)
+    try:
+        assert fetcher.fetch(None, "no_such_account") is None
+    finally:
+        fetcher.close()
+
+    assert fallback_calls == []
+    assert not fetcher.leaves_profile_loaded
+
+
+def test_unexpected_layout_falls_back_to_the_browser(stub_server):
+    fallback_calls = []
+    fetcher = make_fetcher(stub_server, fallback_calls)
+    try:
+        profile_data = fetcher.fetch(None, "changed_layout")
+        assert fallback_calls == ["changed_layout"]
+        assert profile_data["Bio"] == "rendered in the browser"
+        # The fallback rendered the profile page, so the expansion must not navigate again
+        assert fetcher.leaves_profile_loaded
+
+        fetcher.fetch(None, "celulares_mayorista_co")
+        assert not fetcher.leaves_profile_loaded
+    finally:
+        fetcher.close()
+
+
+def test_leaves_profile_loaded_is_tracked_per_thread(stub_server):
+    fallback_calls = []
+    fetcher = make_fetcher(stub_server, fallback_calls)
+    try:
+        fetcher.fetch(None, "changed_layout")
+        other_thread_flag = []
+        worker = threading.Thread(target=lambda: (
+            fetcher.fetch(None, "celulares_mayorista_co"),
+            other_thread_flag.append(fetcher.leaves_profile_loaded)
+        ))
+        worker.start()
+        worker.join()
+    finally:
+        fetcher.close()
+
+    assert other_thread_flag == [False]
+    assert fetcher.leaves_profile_loaded
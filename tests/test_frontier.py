@@ -0,0 +1,128 @@
+"""
+Tests for the SQLite crawl frontier: priority order, rediscovery, claiming and re-queueing.
+
+Run from the project root:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from scrapers.frontier import CrawlFrontier
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    frontier = CrawlFrontier(os.path.join(tmp_path, "frontier.db"))
+    yield frontier
+    frontier.close()
+
+
+def claim_all(frontier):
+    usernames = []
+    while True:
+        item = frontier.claim_next()
+        if item is None:
+            return usernames
+        usernames.append(item["username"])
+
+
+def test_claims_highest_priority_then_lowest_depth_then_discovery_order(frontier):
+    frontier.add_many([("low", 1.0), ("high", 5.0)], depth=1, parent="seed")
+    frontier.add_many([("tie_deep", 3.0)], depth=2, parent="seed")
+    frontier.add_many([("tie_shallow", 3.0), ("tie_shallow_later", 3.0)], depth=1, parent="seed")
+
+    assert claim_all(frontier) == ["high", "tie_shallow", "tie_shallow_later", "tie_deep", "low"]
+
+
+def test_add_many_only_queues_new_usernames(frontier):
+    assert frontier.add_many([("a", 1.0), ("b", 1.0)], depth=1, parent="seed") == 2
+    assert frontier.add_many([("b", 1.0), ("c", 1.0)], depth=1, parent="other") == 1
+    assert frontier.total_count() == 3
+
+
+def test_rediscovery_raises_priority_and_counts_parents(frontier):
+    frontier.add_many([("candidate", 2.0)], depth=1, parent="first")
+    frontier.add_many([("candidate", 1.0)], depth=1, parent="second", extra_parent_bonus=1.5)
+
+    item = frontier.claim_next()
+    assert item["priority"] == pytest.approx(3.5) # Better of the two scores plus one bonus
+    assert item["parent"] == "first"
+    row = frontier.conn.execute("SELECT parent_count FROM frontier WHERE username = 'candidate'").fetchone()
+    assert row["parent_count"] == 2
+
+
+def test_rediscovery_from_a_shallower_parent_moves_the_candidate_up(frontier):
+    frontier.add_many([("candidate", 1.0)], depth=3, parent="deep_parent")
+    frontier.add_many([("candidate", 2.0)], depth=1, parent="shallow_parent")
+    frontier.add_many([("candidate", 1.5)], depth=2, parent="middle_parent")
+
+    item = frontier.claim_next()
+    assert item["depth"] == 1
+    assert item["parent"] == "shallow_parent"
+
+
+def test_rediscovery_leaves_claimed_and_done_usernames_alone(frontier):
+    frontier.add_many([("visited", 1.0)], depth=2, parent="seed")
+    frontier.mark_done(frontier.claim_next()["username"], accepted=True)
+    frontier.add_many([("visited", 9.0)], depth=1, parent="other")
+
+    row = frontier.conn.execute("SELECT depth, priority, status FROM frontier WHERE username = 'visited'").fetchone()
+    assert (row["depth"], row["priority"], row["status"]) == (2, 1.0, CrawlFrontier.DONE)
+    assert frontier.claim_next() is None
+
+
+def test_claim_marks_in_flight_until_done(frontier):
+    frontier.add("seed", depth=0, priority=100.0)
+    item = frontier.claim_next()
+
+    assert item["username"] == "seed"
+    assert frontier.in_flight_count() == 1
+    assert frontier.pending_count() == 1
+    assert frontier.claim_next() is None
+
+    frontier.mark_done("seed", accepted=True)
+    assert frontier.pending_count() == 0
+    assert frontier.accepted_usernames() == ["seed"]
+
+
+def test_requeue_retries_until_max_attempts(frontier):
+    frontier.add("flaky", depth=1)
+
+    frontier.claim_next()
+    assert frontier.requeue("flaky", max_attempts=2) is True
+    assert frontier.claim_next()["username"] == "flaky"
+    assert frontier.requeue("flaky", max_attempts=2) is False # Second failure: given up on
+    assert frontier.claim_next() is None
+    assert frontier.pending_count() == 0
+
+
+def test_interrupted_visit_costs_no_attempt(frontier):
+    frontier.add("interrupted", depth=1)
+    for _ in range(3):
+        frontier.claim_next()
+        assert frontier.requeue("interrupted", max_attempts=1, count_attempt=False) is True
+    row = frontier.conn.execute("SELECT attempts FROM frontier WHERE username = 'interrupted'").fetchone()
+    assert row["attempts"] == 0
+
+
+def test_in_flight_usernames_are_requeued_after_a_crash(tmp_path):
+    db_path = os.path.join(tmp_path, "frontier.db")
+    crashed = CrawlFrontier(db_path)
+    crashed.add_many([("a", 2.0), ("b", 1.0)], depth=1, parent="seed")
+    crashed.claim_next()
+    crashed.close() # The run dies with "a" in flight
+
+    resumed = CrawlFrontier(db_path)
+    try:
+        assert resumed.requeue_in_flight() == 1
+        assert claim_all(resumed) == ["a", "b"]
+    finally:
+        resumed.close()
+
+
+def test_peek_queued_does_not_claim(frontier):
+    frontier.add_many([("a", 2.0), ("b", 1.0), ("c", 3.0)], depth=1, parent="seed")
+
+    assert frontier.peek_queued(2) == ["c", "a"]
+    assert frontier.in_flight_count() == 0
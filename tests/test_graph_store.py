@@ -0,0 +1,133 @@
+"""
+Tests for the graph store: username interning, the append-only edge log, the expansion cache and CSR building.
+
+Run from the project root:
+    python -m pytest tests
+"""
+import os
+import time
+from array import array
+
+import pytest
+
+from scrapers import graph_store
+from scrapers.graph_store import GraphStore, sorted_intersection, sorted_unique_keys
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = GraphStore(os.path.join(tmp_path, "graph"))
+    yield store
+    store.close()
+
+
+def test_intern_many_assigns_stable_ids_and_keeps_display_names(store):
+    first_ids = store.intern_many({"shop_a": "Shop A", "shop_b": ""})
+    again = store.intern_many({"shop_b": "Shop B", "shop_a": "", "shop_c": ""})
+
+    assert again[:2] == [first_ids[1], first_ids[0]]
+    assert len(set(again)) == 3
+    assert store.node_id("shop_c") == again[2]
+    assert store.node_id("unknown") is None
+    # An empty display name never overwrites a known one
+    assert store._profiles_for_ids([first_ids[0], first_ids[1]]) == {"shop_a": "Shop A", "shop_b": "Shop B"}
+
+
+def test_recorded_lists_are_served_from_the_cache(store):
+    connections = {"followers": {"fan_1": "Fan One", "fan_2": ""}, "following": {"shop_b": "Shop B"}}
+    store.record_connections("shop_a", connections)
+
+    assert store.cached_connections("shop_a") == connections
+    assert store.cache_hits == 1
+
+
+def test_empty_lists_are_cached_but_missing_lists_are_not(store):
+    store.record_connections("new_shop", {"followers": {}, "following": {"supplier": ""}})
+    store.record_connections("half_harvested", {"following": {"supplier": ""}}) # Followers pop-up failed
+
+    assert store.cached_connections("new_shop") == {"followers": {}, "following": {"supplier": ""}}
+    assert store.cached_connections("half_harvested") is None
+
+
+def test_stale_lists_are_not_served(tmp_path):
+    store = GraphStore(os.path.join(tmp_path, "graph"), max_age_hours=1)
+    try:
+        store.record_connections("shop_a", {"followers": {"fan": ""}, "following": {"shop_b": ""}})
+        with store.conn:
+            store.conn.execute("UPDATE expansions SET crawled_at = ?", (time.time() - 7200,))
+        assert store.cached_connections("shop_a") is None
+    finally:
+        store.close()
+
+
+def test_a_new_expansion_replaces_the_cached_block(store):
+    store.record_connections("shop_a", {"followers": {"old_fan": ""}, "following": {}})
+    store.record_connections("shop_a", {"followers": {"new_fan": ""}, "following": {}})
+
+    assert store.cached_connections("shop_a")["followers"] == {"new_fan": ""}
+
+
+def test_appends_from_another_writer_do_not_shift_offsets(tmp_path):
+    graph_dir = os.path.join(tmp_path, "graph")
+    first, second = GraphStore(graph_dir), GraphStore(graph_dir) # e.g. a CLI run and a web app worker
+    try:
+        first.record_connections("shop_a", {"followers": {f"fan_a{index}": "" for index in range(50)}, "following": {}})
+        second.record_connections("shop_b", {"followers": {f"fan_b{index}": "" for index in range(30)}, "following": {}})
+        first.record_connections("shop_c", {"followers": {f"fan_c{index}": "" for index in range(10)}, "following": {}})
+
+        reader = GraphStore(graph_dir)
+        try:
+            for username, prefix, count in (("shop_a", "fan_a", 50), ("shop_b", "fan_b", 30), ("shop_c", "fan_c", 10)):
+                assert set(reader.cached_connections(username)["followers"]) == {f"{prefix}{index}" for index in range(count)}
+        finally:
+            reader.close()
+        assert os.path.getsize(os.path.join(graph_dir, "edges.u32")) == (50 + 30 + 10) * 4
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.fixture(params=["numpy", "external_sort"])
+def sort_backend(request, monkeypatch):
+    if request.param == "numpy":
+        if graph_store.np is None:
+            pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(graph_store, "np", None)
+        monkeypatch.setattr(graph_store, "SORT_RUN_KEYS", 3) # Several runs even for a tiny graph
+    return request.param
+
+
+def test_build_csr_deduplicates_edges_in_both_directions(store, sort_backend):
+    # a and b follow each other; c follows a. Every edge is seen from both ends (and twice for a -> b).
+    store.record_connections("a", {"followers": {"b": "", "c": ""}, "following": {"b": ""}})
+    store.record_connections("b", {"followers": {"a": ""}, "following": {"a": ""}})
+    store.record_connections("c", {"followers": {}, "following": {"a": ""}})
+    a, b, c = (store.node_id(username) for username in ("a", "b", "c"))
+
+    graph = store.build_csr()
+    try:
+        assert graph.edge_count == 3
+        assert list(graph.following(a)) == [b]
+        assert sorted(graph.followers(a)) == sorted([b, c])
+        assert list(graph.following(c)) == [a]
+        assert graph.in_degree(c) == 0
+        assert graph.mutual_follows(a) == [b]
+        assert graph.common_following(b, c) == [a]
+    finally:
+        graph.close()
+    assert not [name for name in os.listdir(store.graph_dir) if name.endswith(".tmp")]
+
+
+def test_sorted_unique_keys_sorts_and_deduplicates(tmp_path, monkeypatch):
+    monkeypatch.setattr(graph_store, "SORT_RUN_KEYS", 4)
+    keys = array("Q", [9, 3, 3, 1 << 40, 7, 9, 0, 3, 5])
+
+    assert list(sorted_unique_keys(keys, str(tmp_path))) == [0, 3, 5, 7, 9, 1 << 40]
+    assert len(keys) == 0 # Consumed to keep peak memory down
+    assert os.listdir(tmp_path) == []
+
+
+def test_sorted_intersection():
+    assert sorted_intersection([1, 3, 5, 7], [2, 3, 4, 7, 9]) == [3, 7]
+    assert sorted_intersection([], [1, 2]) == []
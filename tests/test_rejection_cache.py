@@ -0,0 +1,96 @@
+"""
+Tests for the persistent rejection cache: TTL expiry and keyword-set invalidation.
+
+Run from the project root:
+    python -m pytest tests
+"""
+import os
+import time
+
+import pytest
+
+from scrapers.rejection_cache import RejectionCache, keyword_set_hash
+
+KEYWORDS = ["celulares", "accesorios"]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return os.path.join(tmp_path, "rejected_profiles.db")
+
+
+def backdate(cache, username, hours):
+    with cache.conn:
+        cache.conn.execute(
+            "UPDATE rejected_profiles SET rejected_at = ? WHERE username = ?", (time.time() - hours * 3600, username)
+        )
+
+
+def test_keyword_hash_ignores_order_case_and_blanks():
+    assert keyword_set_hash(["Celulares", " accesorios", ""]) == keyword_set_hash(["accesorios", "celulares"])
+    assert keyword_set_hash(["celulares"]) != keyword_set_hash(["celulares", "mayorista"])
+
+
+def test_recorded_rejection_is_reused_across_runs(db_path):
+    first_run = RejectionCache(db_path, KEYWORDS)
+    first_run.record("personal_account")
+    assert first_run.is_rejected("personal_account")
+    assert not first_run.is_rejected("unknown_account")
+    first_run.close()
+
+    second_run = RejectionCache(db_path, list(reversed(KEYWORDS)))
+    try:
+        assert second_run.is_rejected("personal_account")
+        assert second_run.hits == 1
+    finally:
+        second_run.close()
+
+
+def test_changed_keywords_invalidate_rejections(db_path):
+    cache = RejectionCache(db_path, KEYWORDS)
+    cache.record("personal_account")
+    cache.close()
+
+    widened = RejectionCache(db_path, KEYWORDS + ["mayorista"])
+    try:
+        assert not widened.is_rejected("personal_account")
+    finally:
+        widened.close()
+
+
+def test_rejections_expire_after_the_ttl(db_path):
+    cache = RejectionCache(db_path, KEYWORDS, ttl_hours=24)
+    try:
+        cache.record("recent")
+        cache.record("stale")
+        backdate(cache, "recent", 23)
+        backdate(cache, "stale", 25)
+
+        assert cache.is_rejected("recent")
+        assert not cache.is_rejected("stale")
+        assert cache.purge_expired() == 1
+    finally:
+        cache.close()
+
+
+def test_expired_rows_are_purged_on_open(db_path):
+    cache = RejectionCache(db_path, KEYWORDS, ttl_hours=1)
+    cache.record("stale")
+    backdate(cache, "stale", 2)
+    cache.close()
+
+    reopened = RejectionCache(db_path, KEYWORDS, ttl_hours=1)
+    try:
+        assert reopened.conn.execute("SELECT COUNT(*) FROM rejected_profiles").fetchone()[0] == 0
+    finally:
+        reopened.close()
+
+
+def test_lookups_that_save_no_page_load_are_not_counted(db_path):
+    cache = RejectionCache(db_path, KEYWORDS)
+    try:
+        cache.record("personal_account")
+        assert cache.is_rejected("personal_account", count_hit=False)
+        assert cache.hits == 0
+    finally:
+        cache.close()